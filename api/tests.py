@@ -1,3 +1,288 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO
+from pathlib import Path
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from attendance.models import Attendance
+from attendance.shifts import get_shift_table
+from employees.face_verification_service import get_verification_service
+from employees.models import Employee
+
+FACE_IMAGE = Path(settings.BASE_DIR) / 'media' / 'face_images' / 'face_temp_1761470253725.jpg'
+# A different frame of the same registration session, used for check-ins
+CHECK_IN_IMAGE = FACE_IMAGE.parent / 'face_temp_1761477220332.jpg'
+
+
+def _blank_png():
+    buffer = BytesIO()
+    Image.new('L', (200, 200), color=128).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@override_settings(FACE_VERIFY_WORKERS=0, FACE_VERIFY_QUEUE_SIZE=0)
+class FaceAttendanceApiTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(username='faceuser', password='pass')
+        self.employee = Employee.objects.create(user=self.user, employee_id='EMP300')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _upload(self, path=FACE_IMAGE):
+        return SimpleUploadedFile(path.name, path.read_bytes(), content_type='image/jpeg')
+
+    def test_register_then_check_in_from_memory(self):
+        resp = self.client.post('/api/employee/upload-face/', {'face_image': self._upload()}, format='multipart')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.employee.refresh_from_db()
+        self.assertTrue(self.employee.has_face_encoding)
+
+        resp = self.client.post('/api/attendance/mark-with-face/', {'face_image': self._upload(CHECK_IN_IMAGE)}, format='multipart')
+        self.assertEqual(resp.status_code, 200, resp.data)
+
+        attendance = Attendance.objects.get(employee=self.employee)
+        self.assertTrue(attendance.face_verified)
+        # The upload was consumed for verification but still stored intact
+        self.assertEqual(attendance.check_in_image.read(), CHECK_IN_IMAGE.read_bytes())
+
+    def test_check_in_rejected_with_retry_after_when_queue_full(self):
+        resp = self.client.post('/api/employee/upload-face/', {'face_image': self._upload()}, format='multipart')
+        self.assertEqual(resp.status_code, 200, resp.data)
+
+        service = get_verification_service()
+        service._slots.acquire()
+        self.addCleanup(service._slots.release)
+
+        resp = self.client.post('/api/attendance/mark-with-face/', {'face_image': self._upload(CHECK_IN_IMAGE)}, format='multipart')
+        self.assertEqual(resp.status_code, 429)
+        self.assertEqual(resp['Retry-After'], str(settings.FACE_VERIFY_RETRY_AFTER))
+        self.assertFalse(Attendance.objects.filter(employee=self.employee).exists())
+        self.assertEqual(service.stats()['rejected'], 1)
+
+    def test_enroll_from_several_photos(self):
+        blank = SimpleUploadedFile('blank.png', _blank_png(), content_type='image/png')
+        resp = self.client.post(
+            '/api/employee/enroll-face/',
+            {'face_images': [self._upload(), self._upload(), blank]},
+            format='multipart',
+        )
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(resp.data['accepted'], 2)
+        self.assertEqual(resp.data['rejected'], [{'index': 2, 'reason': 'no face detected'}])
+
+        self.employee.refresh_from_db()
+        self.assertTrue(self.employee.has_face_encoding)
+        self.assertEqual(self.employee.face_samples.count(), 2)
+        fingerprints = self.employee.image_fingerprints.filter(source='FACE')
+        self.assertEqual(list(fingerprints.values_list('image_name', flat=True)), [self.employee.face_image.name])
+
+        resp = self.client.post('/api/attendance/mark-with-face/', {'face_image': self._upload(CHECK_IN_IMAGE)}, format='multipart')
+        self.assertEqual(resp.status_code, 200, resp.data)
+
+    def test_enroll_unknown_employee_is_not_found(self):
+        hr = User.objects.create_user(username='hr', password='pass', is_staff=True)
+        self.client.force_authenticate(hr)
+
+        resp = self.client.post(
+            '/api/employee/enroll-face/', {'employee_id': 'EMP999', 'face_images': [self._upload()]}, format='multipart',
+        )
+        self.assertEqual(resp.status_code, 404)
+
+    def test_check_in_rejected_when_face_was_registered_with_another_backend(self):
+        resp = self.client.post('/api/employee/upload-face/', {'face_image': self._upload()}, format='multipart')
+        self.assertEqual(resp.status_code, 200, resp.data)
+
+        with self.settings(FACE_BACKEND='opencv_template'):
+            resp = self.client.post('/api/attendance/mark-with-face/', {'face_image': self._upload(CHECK_IN_IMAGE)}, format='multipart')
+        self.assertEqual(resp.status_code, 409)
+        self.assertFalse(Attendance.objects.filter(employee=self.employee).exists())
+
+    def test_replayed_photos_are_rejected_before_verification(self):
+        resp = self.client.post('/api/employee/upload-face/', {'face_image': self._upload()}, format='multipart')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        submitted = get_verification_service().stats()['submitted']
+
+        resp = self.client.post('/api/attendance/mark-with-face/', {'face_image': self._upload()}, format='multipart')
+        self.assertEqual(resp.status_code, 409)
+
+        resp = self.client.post('/api/attendance/mark-with-face/', {'face_image': self._upload(CHECK_IN_IMAGE)}, format='multipart')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        resp = self.client.post('/api/attendance/mark-with-face/', {'face_image': self._upload(CHECK_IN_IMAGE)}, format='multipart')
+        self.assertEqual(resp.status_code, 409)
+
+        self.assertIsNone(Attendance.objects.get(employee=self.employee).check_out)
+        self.assertEqual(get_verification_service().stats()['submitted'], submitted + 1)
+
+    def test_identify_needs_a_compact_descriptor(self):
+        self.client.force_authenticate(User.objects.create_user(username='kiosk', password='pass', is_staff=True))
+
+        resp = self.client.post('/api/attendance/identify/', {'face_image': self._upload(CHECK_IN_IMAGE)}, format='multipart')
+        self.assertEqual(resp.status_code, 501)
+
+    @override_settings(FACE_DESCRIPTOR='lbp', FACE_BACKEND='opencv_template')
+    def test_identify_rejects_backends_not_scored_by_distance(self):
+        resp = self.client.post('/api/employee/upload-face/', {'face_image': self._upload()}, format='multipart')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.client.force_authenticate(User.objects.create_user(username='kiosk', password='pass', is_staff=True))
+
+        resp = self.client.post('/api/attendance/identify/', {'face_image': self._upload(CHECK_IN_IMAGE)}, format='multipart')
+        self.assertEqual(resp.status_code, 501)
+        self.assertIn('opencv_template', resp.data['message'])
+
+    @override_settings(FACE_DESCRIPTOR='lbp')
+    def test_identify_finds_the_enrolled_employee(self):
+        from employees.face_index import invalidate_face_index
+
+        invalidate_face_index()
+        resp = self.client.post('/api/employee/upload-face/', {'face_image': self._upload()}, format='multipart')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.client.force_authenticate(User.objects.create_user(username='kiosk', password='pass', is_staff=True))
+
+        resp = self.client.post('/api/attendance/identify/', {'face_image': self._upload(CHECK_IN_IMAGE)}, format='multipart')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertTrue(resp.data['identified'])
+        self.assertEqual(resp.data['matches'][0]['employee_id'], 'EMP300')
+
+    def test_face_check_in_and_later_mobile_tap_fold_in_local_time(self):
+        from datetime import datetime, time, timezone as dt_timezone
+        from unittest import mock
+        from django.utils import timezone
+
+        resp = self.client.post('/api/employee/upload-face/', {'face_image': self._upload()}, format='multipart')
+        self.assertEqual(resp.status_code, 200, resp.data)
+
+        # timezone.now() is UTC, as in production
+        morning = timezone.make_aware(datetime(2025, 1, 6, 9, 0)).astimezone(dt_timezone.utc)
+        with mock.patch('django.utils.timezone.now', return_value=morning):
+            resp = self.client.post('/api/attendance/mark-with-face/', {'face_image': self._upload(CHECK_IN_IMAGE)}, format='multipart')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(resp.data['attendance']['check_in'], '09:00:00')
+
+        resp = self.client.post('/api/attendance/mark/', {'device_time': '2025-01-06T17:00:00'}, format='json')
+        self.assertEqual(resp.status_code, 200, resp.data)
+
+        attendance = Attendance.objects.get(employee=self.employee)
+        self.assertEqual((attendance.check_in, attendance.check_out), (time(9, 0), time(17, 0)))
+        self.assertEqual(attendance.get_hours_worked(), 8.0)
+        self.assertTrue(attendance.face_verified)
+        self.assertTrue(attendance.check_in_image.name.startswith('attendance_images/'))
+
+
+class BulkAttendanceApiTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='gate', password='pass', is_staff=True)
+        self.employees = [
+            Employee.objects.create(user=User.objects.create_user(username=f'worker{i}', password='pass'), employee_id=f'EMP50{i}')
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def _events(self, times, prefix='tap'):
+        return [
+            {'idempotency_key': f'{prefix}-{employee.employee_id}-{moment}', 'employee_id': employee.employee_id,
+             'timestamp': f'2025-01-06T{moment}', 'face_verified': True, 'lat': 6.9271, 'lon': 79.8612}
+            for moment in times for employee in self.employees
+        ]
+
+    def test_taps_become_check_in_and_check_out_in_constant_queries(self):
+        # Out of order on purpose: the terminal replays its buffer as it has it
+        events = self._events(['17:45:00', '08:50:00'])
+        events.append({'employee_id': 'EMP999', 'timestamp': '2025-01-06T09:00:00'})
+        events.append({'employee_id': 'EMP500', 'timestamp': 'yesterday'})
+
+        # Profile lookup, savepoint pair, then keys, employees, existing rows and the
+        # attendance, event and key inserts. After commit the rollup refresh: employees
+        # still present, then daily counts, cells and insert, and monthly counts, upsert
+        # and the payroll dirty mark, each in a savepoint pair; shift rules are compiled
+        # once per process
+        get_shift_table()
+        with self.assertNumQueries(20), self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post('/api/attendance/bulk-mark/', {'events': events}, format='json')
+
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(resp.data['summary'], {'checked_out': 3, 'checked_in': 3, 'error': 2})
+        self.assertEqual(resp.data['results'][-2]['message'], 'Employee not found')
+        for employee in self.employees:
+            attendance = Attendance.objects.get(employee=employee)
+            self.assertEqual((str(attendance.check_in), str(attendance.check_out)), ('08:50:00', '17:45:00'))
+            self.assertEqual(attendance.status, 'PRESENT')
+            self.assertTrue(attendance.face_verified)
+
+    def test_retried_batch_is_reported_as_duplicate(self):
+        events = self._events(['08:55:00'])
+        self.client.post('/api/attendance/bulk-mark/', events, format='json')
+
+        resp = self.client.post('/api/attendance/bulk-mark/', events + self._events(['18:00:00']), format='json')
+
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(resp.data['summary'], {'duplicate': 3, 'checked_out': 3})
+        self.assertEqual(Attendance.objects.count(), 3)
+        self.assertEqual(str(Attendance.objects.first().check_out), '18:00:00')
+
+    def test_batch_racing_another_terminal_is_retried(self):
+        from unittest import mock
+        from attendance.models import AttendanceIdempotencyKey
+
+        events = self._events(['08:55:00'])
+        self.client.post('/api/attendance/bulk-mark/', events, format='json')
+
+        def first_read_is_stale(manager):
+            # As if the first batch committed just after this one read keys and rows
+            real, calls = manager.filter, []
+
+            def read(*args, **kwargs):
+                calls.append(args)
+                return manager.none() if len(calls) == 1 else real(*args, **kwargs)
+            return mock.patch.object(manager, 'filter', read)
+
+        with first_read_is_stale(AttendanceIdempotencyKey.objects), first_read_is_stale(Attendance.objects):
+            resp = self.client.post('/api/attendance/bulk-mark/', events + self._events(['18:00:00']), format='json')
+
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(resp.data['summary'], {'duplicate': 3, 'checked_out': 3})
+        self.assertEqual(Attendance.objects.count(), 3)
+
+    def test_requires_staff_or_hr(self):
+        self.client.force_authenticate(self.employees[0].user)
+        resp = self.client.post('/api/attendance/bulk-mark/', self._events(['09:00:00']), format='json')
+        self.assertEqual(resp.status_code, 403)
+
+
+class MarkAttendanceApiTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='mobile', password='pass')
+        self.employee = Employee.objects.create(user=user, employee_id='EMP600')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_offline_taps_are_logged_and_projected(self):
+        resp = self.client.post('/api/attendance/mark/', {'device_time': '2025-01-06T17:30:00'}, format='json')
+        self.assertEqual(resp.data['message'], 'Check-in marked successfully')
+        # Buffered earlier tap arrives last and still becomes the check-in
+        resp = self.client.post('/api/attendance/mark/', {'device_time': '2025-01-06T08:45:00'}, format='json')
+
+        self.assertEqual(resp.status_code, 200, resp.data)
+        self.assertEqual(resp.data['message'], 'Check-out marked successfully')
+        self.assertEqual((resp.data['attendance']['check_in'], resp.data['attendance']['check_out']), ('08:45:00', '17:30:00'))
+        self.assertEqual(self.employee.attendance_events.count(), 2)
+
+    @override_settings(ATTENDANCE_PROJECT_ON_INGEST=False)
+    def test_ingest_only_appends_when_projection_is_deferred(self):
+        resp = self.client.post('/api/attendance/mark/', {}, format='json')
+
+        self.assertEqual(resp.status_code, 202, resp.data)
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(self.employee.attendance_events.count(), 1)
@@ -23,9 +23,13 @@ urlpatterns = [
 
     # Face registration
     path('employee/upload-face/', views.upload_face_image, name='upload_face'),
+    path('employee/enroll-face/', views.enroll_face_api, name='api_enroll_face'),
 
     # Attendance with face
     path('attendance/mark-with-face/', views.mark_attendance_with_face, name='mark_attendance_face'),
+    path('attendance/identify/', views.identify_face_api, name='api_identify_face'),
+    path('attendance/bulk-mark/', views.bulk_mark_attendance_api, name='api_bulk_mark_attendance'),
+    path('face/stats/', views.face_stats_api, name='api_face_stats'),
 
 ]
 
@@ -38,6 +38,7 @@ from .serializers import (
     EmployeeSerializer, AttendanceSerializer, LeaveRequestSerializer,
     LeaveTypeSerializer, SalaryRecordSerializer, WorkforceEventSerializer
 )
+from smart_hr_backend.dates import month_bounds, month_range
 import logging
 logger = logging.getLogger(__name__)
 
@@ -60,12 +61,11 @@ def login_api(request):
             token, _ = Token.objects.get_or_create(user=user)
             
             # Check if face is registered
-            # Face is considered registered if face_encoding field exists and is not empty
-            face_registered = bool(employee.face_encoding and employee.face_encoding.strip())
+            # Face is considered registered if a binary or legacy JSON encoding is stored
+            face_registered = employee.has_face_encoding
             
             # Debug logging
             print(f"[DEBUG] Employee: {employee.employee_id}")
-            print(f"[DEBUG] Face encoding exists: {bool(employee.face_encoding)}")
             print(f"[DEBUG] Face registered: {face_registered}")
             
             return Response({
@@ -136,23 +136,34 @@ def upload_face_image(request):
                 'message': 'No image provided'
             }, status=400)
         
+        # Generate face encoding from the upload in memory (before storage may move a temp upload)
+        from employees.face_backends import get_face_backend
+        from employees.face_encoding_format import store_face_encoding
+        from employees.face_embedding_cache import invalidate_reference_embedding
+        from attendance.image_hashing import hash_upload, record_fingerprint, upload_digest
+        backend = get_face_backend()
+        encoding = backend.encode(face_image)
+        image_hash = hash_upload(face_image)
+        digest = upload_digest(face_image)
+        
         # Save image
         employee.face_image = face_image
         employee.save()
         
-        # Generate face encoding
-        from employees.face_recognition_utils import encode_face
-        encoding = encode_face(employee.face_image.path)
-        
-        if not encoding:
+        if encoding is None:
             return Response({
                 'success': False,
                 'message': 'No face detected in the image. Please upload a clear photo of your face.'
             }, status=400)
             
         # Store the encoding
-        employee.face_encoding = json.dumps(encoding)
+        store_face_encoding(employee, encoding, descriptor=backend.descriptor, backend=backend.name)
         employee.save()
+        invalidate_reference_embedding(employee.pk)
+
+        # Remember the registration photo so it cannot be replayed at check-in
+        if image_hash is not None:
+            record_fingerprint(image_hash, employee, 'FACE', image_name=employee.face_image.name, digest=digest)
         
         return Response({
             'success': True,
@@ -166,6 +177,68 @@ def upload_face_image(request):
         }, status=400)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser, FormParser])
+def enroll_face_api(request):
+    """Enrol a face from several photos (face_images); HR/staff may pass employee_id to enrol someone else"""
+    try:
+        emp = request.user.employee_profile
+    except Exception:
+        emp = None
+
+    target_id = request.POST.get('employee_id')
+    if target_id and not (emp and emp.employee_id == target_id):
+        if not (request.user.is_staff or request.user.is_superuser or (emp and emp.role in ['HR', 'ADMIN'])):
+            return Response({'success': False, 'message': 'Access denied'}, status=403)
+        emp = Employee.objects.filter(employee_id=target_id).first()
+    if emp is None:
+        return Response({'success': False, 'message': 'Employee profile not found'}, status=404)
+
+    from django.conf import settings
+    images = request.FILES.getlist('face_images') or request.FILES.getlist('face_image')
+    max_samples = getattr(settings, 'FACE_ENROLL_MAX_SAMPLES', 10)
+    if not images:
+        return Response({'success': False, 'message': 'No images provided'}, status=400)
+    if len(images) > max_samples:
+        return Response({'success': False, 'message': f'At most {max_samples} images can be enrolled at once'}, status=400)
+
+    try:
+        from employees.face_enrollment import enroll_employee
+        result = enroll_employee(emp, images)
+    except Exception as e:
+        return Response({'success': False, 'message': str(e)}, status=400)
+
+    if not result['enrolled']:
+        return Response({
+            'success': False,
+            'message': 'Not enough usable face images. Please retake the rejected photos.',
+            'accepted': result['accepted'],
+            'rejected': result['rejected'],
+        }, status=400)
+
+    # Keep the first accepted photo as the profile face image
+    from attendance.image_hashing import hash_upload, record_fingerprint, upload_digest
+    rejected_positions = {item['index'] for item in result['rejected']}
+    face_image = next(image for position, image in enumerate(images) if position not in rejected_positions)
+    face_image.seek(0)
+    image_hash = hash_upload(face_image)
+    digest = upload_digest(face_image)
+    emp.face_image = face_image
+    emp.save(update_fields=['face_image', 'updated_at'])
+
+    # Only the stored photo is fingerprinted, under its stored name so hash_media_images skips it
+    if image_hash is not None:
+        record_fingerprint(image_hash, emp, 'FACE', image_name=emp.face_image.name, digest=digest)
+
+    return Response({
+        'success': True,
+        'message': f"Face enrolled from {result['accepted']} image(s)",
+        'accepted': result['accepted'],
+        'rejected': result['rejected'],
+    })
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser, FormParser])
@@ -176,9 +249,6 @@ def mark_attendance_with_face(request):
             employee = request.user.employee_profile
         except Exception:
             return Response({'success': False, 'message': 'Employee profile not found'}, status=400)
-        today = timezone.now().date()
-        current_time = timezone.now().time()
-        
         face_image = request.FILES.get('face_image')
 
         # Parse and validate coordinates
@@ -191,65 +261,83 @@ def mark_attendance_with_face(request):
             return Response({'success': False, 'message': 'Invalid latitude or longitude values'}, status=400)
 
         # Require that the authenticated user has registered face encoding
-        if not (employee.face_encoding and employee.face_encoding.strip()):
+        if not employee.has_face_encoding:
             return Response({'success': False, 'message': 'Face not registered for this account. Please upload your face image first.'}, status=400)
 
         # Verify the uploaded face matches the registered encoding
         if not face_image:
             return Response({'success': False, 'message': 'No face image provided for verification'}, status=400)
 
-        import tempfile, os
-        from employees.face_recognition_utils import verify_face
+        # Reject replayed photos before running the face pipeline
+        from attendance.image_hashing import find_replays, hash_upload, record_fingerprint, upload_digest
+        image_hash = hash_upload(face_image)
+        if image_hash is None:
+            return Response({'success': False, 'message': 'Uploaded file is not a valid image'}, status=400)
+        digest = upload_digest(face_image)
+        if find_replays(employee, image_hash, digest):
+            return Response({'success': False, 'message': 'This photo has already been used. Please take a new photo.'}, status=409)
+
+        from django.conf import settings
+        import face_descriptors
+        from employees.face_embedding_cache import get_reference_embedding
+        from employees.face_encoding_format import load_face_backend, load_face_descriptor
+        from employees.face_recognition_utils import match_tolerance
+        from employees.face_verification_service import (
+            get_verification_service, VerificationQueueFull, VerificationTimeout,
+        )
 
-        tmp_path = None
-        try:
-            # Save uploaded file to a temporary file for face_recognition library
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp:
-                for chunk in face_image.chunks():
-                    tmp.write(chunk)
-                tmp_path = tmp.name
+        # Stored encoding, decoded once per process until the employee row changes
+        known_encoding = get_reference_embedding(employee)
+        if known_encoding is None:
+            return Response({'success': False, 'message': 'Stored face encoding is invalid'}, status=500)
 
-            # Load stored encoding
-            try:
-                known_encoding = json.loads(employee.face_encoding)
-            except Exception:
-                return Response({'success': False, 'message': 'Stored face encoding is invalid'}, status=500)
-
-            match = verify_face(known_encoding, tmp_path)
-        finally:
-            if tmp_path and os.path.exists(tmp_path):
-                try:
-                    os.remove(tmp_path)
-                except Exception:
-                    pass
+        # The probe must be described the same way as the stored template
+        descriptor, revision = load_face_descriptor(employee)
+        backend = load_face_backend(employee)
+        if backend != settings.FACE_BACKEND or not face_descriptors.is_current(descriptor, revision):
+            return Response({'success': False, 'message': 'Registered face is out of date. Please upload your face image again.'}, status=409)
+
+        # Hand the raw bytes to the verification pool; the upload is still saved as check_in_image below
+        image_bytes = b''.join(face_image.chunks())
+        face_image.seek(0)
+        try:
+            match, _score = get_verification_service().verify(
+                image_bytes, known_encoding, match_tolerance(descriptor, backend),
+                descriptor=descriptor, backend=backend,
+            )
+        except VerificationQueueFull as e:
+            return Response(
+                {'success': False, 'message': 'Face verification is busy, please retry shortly'},
+                status=429, headers={'Retry-After': str(e.retry_after)},
+            )
+        except VerificationTimeout:
+            return Response(
+                {'success': False, 'message': 'Face verification timed out, please retry'},
+                status=503, headers={'Retry-After': str(settings.FACE_VERIFY_RETRY_AFTER)},
+            )
 
         if not match:
             return Response({'success': False, 'message': 'Face does not match the registered user'}, status=401)
 
-        # Face verified — proceed to create/update attendance
-        face_verified = True
-
-        attendance, created = Attendance.objects.get_or_create(
-            employee=employee,
-            date=today,
-            defaults={
-                'check_in': current_time,
-                'status': 'PRESENT',
-                'face_verified': face_verified,
-                'check_in_image': face_image,
-                'latitude': latitude,
-                'longitude': longitude
-            }
+        # Face verified: log the tap and fold the day's row from the log, like mobile taps
+        from attendance.events import fold_slots, record_attendance_event
+        event = record_attendance_event(
+            employee, source='FACE', face_verified=True, latitude=round(latitude, 6), longitude=round(longitude, 6),
         )
-        
-        if not created:
-            attendance.check_out = current_time
-            if face_image:
-                attendance.check_in_image = face_image
-            attendance.save()
+        fold_slots([(employee.pk, event.date)])
+
+        attendance = Attendance.objects.get(employee=employee, date=event.date)
+        attendance.check_in_image = face_image
+        attendance.face_verified = True
+        attendance.save(update_fields=['check_in_image', 'face_verified', 'status', 'updated_at'])
+        if attendance.check_out:
             message = 'Check-out marked successfully'
         else:
             message = 'Check-in marked successfully with face verification'
+
+        record_fingerprint(
+            image_hash, employee, 'CHECK_IN', attendance=attendance, image_name=attendance.check_in_image.name, digest=digest,
+        )
         
         return Response({
             'success': True,
@@ -268,37 +356,140 @@ def mark_attendance_with_face(request):
             'message': str(e)
         }, status=400)
     
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser, FormParser])
+def identify_face_api(request):
+    """Kiosk mode: match one camera frame against every registered employee"""
+    try:
+        emp = request.user.employee_profile
+    except Exception:
+        emp = None
+
+    if not (request.user.is_staff or request.user.is_superuser or (emp and emp.role in ['HR', 'ADMIN'])):
+        return Response({'success': False, 'message': 'Access denied'}, status=403)
+
+    face_image = request.FILES.get('face_image')
+    if not face_image:
+        return Response({'success': False, 'message': 'No face image provided'}, status=400)
+
+    try:
+        top_k = max(1, min(int(request.POST.get('top_k', 5)), 50))
+    except (TypeError, ValueError):
+        return Response({'success': False, 'message': 'Invalid top_k value'}, status=400)
+
+    from employees.face_recognition_utils import encode_face, match_tolerance
+    from employees.face_index import FaceIndexUnavailable, get_face_index
+
+    try:
+        index = get_face_index()
+    except FaceIndexUnavailable as e:
+        return Response({'success': False, 'message': str(e)}, status=501)
+
+    # Decoded straight from the upload buffer, no temporary file
+    encoding = encode_face(face_image)
+    if encoding is None:
+        return Response({'success': False, 'message': 'No face detected in the image'}, status=400)
+
+    candidates = index.search(encoding, k=top_k)
+    employees = Employee.objects.select_related('user').in_bulk([pk for pk, _ in candidates])
+    # The index holds templates of the active backend and descriptor only, and only
+    # for backends whose score is 1 - distance / 2 (FaceBackend.euclidean)
+    tolerance = match_tolerance()
+
+    matches = []
+    for pk, distance in candidates:
+        candidate = employees.get(pk)
+        if candidate is None:
+            continue
+        similarity = 1.0 - (distance / 2.0)
+        matches.append({
+            'employee_id': candidate.employee_id,
+            'full_name': candidate.user.get_full_name(),
+            'distance': round(distance, 4),
+            'similarity': round(similarity, 4),
+            'is_match': similarity > tolerance,
+        })
+
+    return Response({
+        'success': True,
+        'identified': bool(matches and matches[0]['is_match']),
+        'matches': matches,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def face_stats_api(request):
+    """Face pipeline diagnostics for this worker process (staff only)"""
+    if not (request.user.is_staff or request.user.is_superuser):
+        return Response({'success': False, 'message': 'Access denied'}, status=403)
+
+    import face_recognition
+    from employees.face_embedding_cache import embedding_cache
+    from employees.face_verification_service import get_verification_service
+    return Response({
+        'success': True,
+        'detector_pool': face_recognition.detector_pool_stats(),
+        'verification': get_verification_service().stats(),
+        'embedding_cache': embedding_cache.stats(),
+    })
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def mark_attendance_api(request):
-    """Mark attendance via mobile app"""
+    """
+    Mark attendance via mobile app.
+
+    Every tap is appended to the attendance event log; taps buffered offline
+    send their original `device_time`. The day's Attendance row is folded
+    from the log right away unless ATTENDANCE_PROJECT_ON_INGEST is off, in
+    which case `manage.py project_attendance_events` catches up and the
+    response is 202.
+    """
     try:
         try:
             employee = request.user.employee_profile
         except Exception:
             return Response({'success': False, 'message': 'Employee profile not found'}, status=400)
-        today = timezone.now().date()
-        current_time = timezone.now().time()
-        
-        # Check if already marked today
-        attendance, created = Attendance.objects.get_or_create(
-            employee=employee,
-            date=today,
-            defaults={
-                'check_in': current_time,
-                'status': 'PRESENT',
-                'face_verified': request.data.get('face_verified', False)
-            }
-        )
-        
-        if not created:
-            # Mark check-out
-            attendance.check_out = current_time
-            attendance.save()
+
+        from django.conf import settings
+        from django.utils.dateparse import parse_datetime
+        from attendance.events import fold_slots, record_attendance_event
+
+        now = timezone.now()
+        device_time = now
+        if request.data.get('device_time'):
+            device_time = parse_datetime(str(request.data['device_time']))
+            if device_time is None:
+                return Response({'success': False, 'message': 'Invalid device_time'}, status=400)
+            if timezone.is_naive(device_time):
+                device_time = timezone.make_aware(device_time)
+            if device_time > now + timedelta(minutes=5):
+                return Response({'success': False, 'message': 'device_time is in the future'}, status=400)
+
+        kind = str(request.data.get('kind', 'TAP')).upper()
+        if kind not in ('TAP', 'IN', 'OUT'):
+            return Response({'success': False, 'message': 'kind must be TAP, IN or OUT'}, status=400)
+
+        face_verified = str(request.data.get('face_verified', False)).lower() in ('true', '1')
+        event = record_attendance_event(employee, device_time=device_time, kind=kind, face_verified=face_verified)
+
+        if not getattr(settings, 'ATTENDANCE_PROJECT_ON_INGEST', True):
+            return Response({
+                'success': True,
+                'message': 'Attendance recorded',
+                'event': {'id': event.pk, 'date': str(event.date), 'device_time': event.device_time.isoformat()},
+            }, status=202)
+
+        fold_slots([(employee.pk, event.date)])
+        attendance = Attendance.objects.get(employee=employee, date=event.date)
+        if attendance.check_out:
             message = 'Check-out marked successfully'
         else:
             message = 'Check-in marked successfully'
-        
+
         serializer = AttendanceSerializer(attendance)
         return Response({
             'success': True,
@@ -312,6 +503,43 @@ def mark_attendance_api(request):
         }, status=400)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_mark_attendance_api(request):
+    """
+    Gate terminals: apply a batch of buffered taps in one transaction.
+
+    Body is {"events": [...]} (or a bare list) of
+    {employee_id, timestamp, face_verified, lat, lon, idempotency_key}.
+    Retried events with a known idempotency_key come back as 'duplicate'.
+    """
+    try:
+        emp = request.user.employee_profile
+    except Exception:
+        emp = None
+
+    if not (request.user.is_staff or request.user.is_superuser or (emp and emp.role in ['HR', 'ADMIN'])):
+        return Response({'success': False, 'message': 'Access denied'}, status=403)
+
+    events = request.data if isinstance(request.data, list) else request.data.get('events')
+    if not isinstance(events, list) or not events:
+        return Response({'success': False, 'message': 'No events provided'}, status=400)
+
+    from django.conf import settings
+    from attendance.bulk import apply_attendance_events
+
+    limit = getattr(settings, 'ATTENDANCE_BULK_MAX_EVENTS', 1000)
+    if len(events) > limit:
+        return Response({'success': False, 'message': f'At most {limit} events per request'}, status=400)
+
+    results = apply_attendance_events(events)
+    summary = {}
+    for result in results:
+        summary[result['result']] = summary.get(result['result'], 0) + 1
+
+    return Response({'success': True, 'summary': summary, 'results': results})
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_attendance_api(request):
@@ -320,13 +548,18 @@ def my_attendance_api(request):
         employee = request.user.employee_profile
     except Exception:
         return Response({'success': False, 'message': 'Employee profile not found'}, status=400)
-    month = request.GET.get('month', timezone.now().month)
-    year = request.GET.get('year', timezone.now().year)
+    try:
+        month_filter = month_range(
+            'date',
+            request.GET.get('year', timezone.now().year),
+            request.GET.get('month', timezone.now().month),
+        )
+    except ValueError:
+        return Response({'success': False, 'message': 'Invalid month or year'}, status=400)
     
     attendances = Attendance.objects.filter(
         employee=employee,
-        date__month=month,
-        date__year=year
+        **month_filter
     ).order_by('-date')
     
     serializer = AttendanceSerializer(attendances, many=True)
@@ -552,13 +785,17 @@ def leave_types_api(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def my_salary_api(request):
-    """Get my salary records"""
+    """Get my salary record; ?preview=1 computes one when the month has not been generated"""
     try:
         employee = request.user.employee_profile
     except Exception:
         return Response({'success': False, 'message': 'Employee profile not found'}, status=400)
-    month = request.GET.get('month', timezone.now().month)
-    year = request.GET.get('year', timezone.now().year)
+    try:
+        month = int(request.GET.get('month', timezone.now().month))
+        year = int(request.GET.get('year', timezone.now().year))
+        month_bounds(year, month)
+    except ValueError:
+        return Response({'success': False, 'message': 'Invalid month or year'}, status=400)
     
     try:
         salary = SalaryRecord.objects.get(
@@ -572,6 +809,17 @@ def my_salary_api(request):
             'salary': serializer.data
         })
     except SalaryRecord.DoesNotExist:
+        if request.GET.get('preview') in ('1', 'true'):
+            # Not generated yet: compute what payroll would produce so far this month
+            from decimal import Decimal
+            from salary.utils import calculate_monthly_salary
+            preview = calculate_monthly_salary(employee, month, year)
+            return Response({
+                'success': True,
+                'preview': True,
+                # Amounts as strings, like SalaryRecordSerializer
+                'salary': {key: str(value) if isinstance(value, Decimal) else value for key, value in preview.items()}
+            })
         return Response({
             'success': False,
             'message': 'Salary record not found for this month'
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Attendance
+from .models import Attendance, AttendanceEvent, ShiftAssignment, ShiftPolicy, ShiftRotationStep
 
 
 @admin.register(Attendance)
@@ -33,3 +33,40 @@ class AttendanceAdmin(admin.ModelAdmin):
             return f"{hours:.2f} hours"
         return "N/A"
     hours_worked.short_description = 'Hours Worked'
+
+
+@admin.register(AttendanceEvent)
+class AttendanceEventAdmin(admin.ModelAdmin):
+    """Read-only: the log is append-only, fix Attendance rows instead"""
+    list_display = ('employee', 'kind', 'source', 'device_time', 'received_at', 'face_verified')
+    list_filter = ('kind', 'source', 'date')
+    search_fields = ('employee__employee_id',)
+    date_hierarchy = 'date'
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ShiftPolicy)
+class ShiftPolicyAdmin(admin.ModelAdmin):
+    list_display = ('name', 'start_time', 'end_time', 'grace_minutes', 'half_day_hours', 'full_day_hours', 'is_active')
+    list_filter = ('is_active',)
+    search_fields = ('name',)
+
+
+class ShiftRotationStepInline(admin.TabularInline):
+    model = ShiftRotationStep
+    extra = 0
+    ordering = ('position',)
+
+
+@admin.register(ShiftAssignment)
+class ShiftAssignmentAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'policy', 'valid_from', 'valid_until', 'days_per_step')
+    list_filter = ('department', 'policy')
+    search_fields = ('employee__employee_id', 'department__name')
+    date_hierarchy = 'valid_from'
+    inlines = [ShiftRotationStepInline]
@@ -0,0 +1,211 @@
+# attendance/bulk.py
+# Apply a batch of buffered gate-terminal taps in one transaction
+
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from employees.models import Employee
+from .dashboard import invalidate_dashboard_cache
+from .models import Attendance, AttendanceEvent, AttendanceIdempotencyKey
+from .rollups import refresh_rollups
+from .shifts import update_statuses
+
+
+class EventError(ValueError):
+    """An event that cannot be applied; reported per event, the rest of the batch still goes through"""
+
+
+def _parse_timestamp(value):
+    if isinstance(value, datetime):
+        moment = value
+    else:
+        moment = parse_datetime(str(value or ''))
+    if moment is None:
+        raise EventError('Invalid or missing timestamp')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return timezone.localtime(moment)
+
+
+def _parse_coordinate(value):
+    if value in (None, ''):
+        return None
+    try:
+        return Decimal(str(value)).quantize(Decimal('0.000001'))
+    except (InvalidOperation, ValueError):
+        raise EventError('Invalid latitude or longitude')
+
+
+def _parse(index, event):
+    if not isinstance(event, dict):
+        raise EventError('Event must be an object')
+    if not event.get('employee_id'):
+        raise EventError('Missing employee_id')
+    moment = _parse_timestamp(event.get('timestamp'))
+    return {
+        'index': index,
+        'key': str(event['idempotency_key'])[:100] if event.get('idempotency_key') else None,
+        'employee_id': str(event['employee_id']),
+        'moment': moment,
+        'date': moment.date(),
+        'time': moment.time().replace(microsecond=0),
+        'face_verified': bool(event.get('face_verified', False)),
+        'latitude': _parse_coordinate(event.get('lat', event.get('latitude'))),
+        'longitude': _parse_coordinate(event.get('lon', event.get('longitude'))),
+    }
+
+
+def apply_attendance_events(events):
+    """
+    Apply tap events ({employee_id, timestamp, face_verified, lat, lon,
+    idempotency_key}) with a fixed number of queries regardless of batch size.
+
+    The earliest tap of a day is the check-in and the latest later tap the
+    check-out, so events may arrive out of order. Events whose idempotency
+    key was already applied are reported as 'duplicate' and skipped.
+
+    Returns one result dict per event, in input order.
+    """
+    results = [None] * len(events)
+    parsed = []
+    for index, event in enumerate(events):
+        try:
+            parsed.append(_parse(index, event))
+        except EventError as exc:
+            results[index] = {'index': index, 'result': 'error', 'message': str(exc)}
+
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                _apply(parsed, results)
+            break
+        except IntegrityError:
+            # A concurrent batch inserted one of these slots or idempotency keys after
+            # they were read. The rerun reads its rows, so taps merge into them and its
+            # keys come back as duplicates; a second conflict is reported for retry.
+            if attempt:
+                for item in parsed:
+                    results[item['index']] = {
+                        'index': item['index'], 'idempotency_key': item['key'], 'employee_id': item['employee_id'],
+                        'result': 'error', 'message': 'Conflicting concurrent update, please retry',
+                    }
+    return results
+
+
+def _apply(parsed, results):
+    """Apply parsed events in the caller's transaction, filling in their results"""
+    keys = {item['key'] for item in parsed if item['key']}
+    seen = dict(
+        AttendanceIdempotencyKey.objects.filter(key__in=keys).values_list('key', 'result')
+    ) if keys else {}
+
+    batch_keys = set()
+    pending = []
+    for item in parsed:
+        key = item['key']
+        if key and (key in seen or key in batch_keys):
+            results[item['index']] = {
+                'index': item['index'], 'idempotency_key': key, 'employee_id': item['employee_id'],
+                'result': 'duplicate', 'message': 'Event already applied',
+            }
+            continue
+        if key:
+            batch_keys.add(key)
+        pending.append(item)
+
+    # One IN query for the employees, one for their existing rows on the affected dates
+    employee_pks = dict(
+        Employee.objects.filter(employee_id__in={item['employee_id'] for item in pending})
+        .order_by().values_list('employee_id', 'pk')
+    )
+    existing = {
+        (row.employee_id, row.date): row
+        for row in Attendance.objects.filter(
+            employee_id__in=employee_pks.values(),
+            date__in={item['date'] for item in pending},
+        ).order_by()
+    }
+
+    created = {}
+    touched = {}
+    applied = []
+    for item in sorted(pending, key=lambda i: (i['date'], i['time'])):
+        pk = employee_pks.get(item['employee_id'])
+        if pk is None:
+            results[item['index']] = {
+                'index': item['index'], 'idempotency_key': item['key'], 'employee_id': item['employee_id'],
+                'result': 'error', 'message': 'Employee not found',
+            }
+            continue
+
+        slot = (pk, item['date'])
+        row = existing.get(slot) or created.get(slot)
+        if row is None:
+            row = created[slot] = Attendance(
+                employee_id=pk, date=item['date'], check_in=item['time'], face_verified=item['face_verified'],
+            )
+            outcome = 'checked_in'
+        elif row.check_in is None or item['time'] < row.check_in:
+            # A buffered tap older than the recorded check-in becomes the check-in
+            if row.check_in is not None and row.check_out is None:
+                row.check_out = row.check_in
+            row.check_in = item['time']
+            outcome = 'checked_in'
+        else:
+            if row.check_out is None or item['time'] > row.check_out:
+                row.check_out = item['time']
+            outcome = 'checked_out'
+
+        row.face_verified = row.face_verified or item['face_verified']
+        if item['latitude'] is not None and item['longitude'] is not None:
+            row.latitude, row.longitude = item['latitude'], item['longitude']
+        if slot in existing:
+            touched[slot] = row
+        applied.append((item, slot, outcome))
+
+    now = timezone.now()
+    update_statuses(list(created.values()) + list(touched.values()), now)
+    for row in list(created.values()) + list(touched.values()):
+        row.updated_at = now
+
+    Attendance.objects.bulk_create(created.values())
+    if touched:
+        Attendance.objects.bulk_update(
+            touched.values(),
+            ['check_in', 'check_out', 'status', 'face_verified', 'latitude', 'longitude', 'updated_at'],
+        )
+    if any(row.pk is None for row in created.values()):
+        # bulk_create does not return primary keys on every backend
+        for row in Attendance.objects.filter(
+            employee_id__in={pk for pk, _ in created}, date__in={d for _, d in created}
+        ):
+            if (row.employee_id, row.date) in created:
+                created[(row.employee_id, row.date)].pk = row.pk
+
+    # The same taps go into the event log so a projector rebuild reproduces these rows
+    AttendanceEvent.objects.bulk_create([
+        AttendanceEvent(
+            employee_id=slot[0], source='GATE', device_time=item['moment'], date=item['date'],
+            face_verified=item['face_verified'], latitude=item['latitude'], longitude=item['longitude'],
+        )
+        for item, slot, _ in applied
+    ])
+
+    new_keys = []
+    for item, slot, outcome in applied:
+        row = created.get(slot) or touched[slot]
+        results[item['index']] = {
+            'index': item['index'], 'idempotency_key': item['key'], 'employee_id': item['employee_id'],
+            'result': outcome, 'date': str(row.date), 'check_in': str(row.check_in),
+            'check_out': str(row.check_out) if row.check_out else None, 'status': row.status,
+        }
+        if item['key']:
+            new_keys.append(AttendanceIdempotencyKey(key=item['key'], attendance_id=row.pk, result=outcome))
+    AttendanceIdempotencyKey.objects.bulk_create(new_keys)
+    if applied:
+        refresh_rollups({slot for _, slot, _ in applied})
+        transaction.on_commit(invalidate_dashboard_cache)
@@ -0,0 +1,72 @@
+# attendance/dashboard.py
+# Attendance dashboard payload: three queries (counts come from the daily
+# rollup), cached for a short TTL and dropped whenever attendance rows are written
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from employees.models import Employee
+from .models import Attendance
+from .rollups import daily_status_counts
+
+CACHE_KEY = 'attendance:dashboard:{date}'
+
+
+def week_counts(today):
+    """{(date, status): count} for the 7 days ending today, from the daily rollup"""
+    return daily_status_counts(today - timedelta(days=6), today)
+
+
+def week_series(today, counts):
+    """(labels, present, absent) for the 7 days ending today"""
+    days = [today - timedelta(days=i) for i in range(6, -1, -1)]
+    return (
+        [day.strftime('%a') for day in days],
+        [counts.get((day, 'PRESENT'), 0) for day in days],
+        [counts.get((day, 'ABSENT'), 0) for day in days],
+    )
+
+
+def today_rows(today):
+    return list(Attendance.objects.filter(date=today).select_related('employee__user', 'employee__department'))
+
+
+def build_dashboard(today, rows=None):
+    total_employees = Employee.objects.filter(is_active=True).count()
+    counts = week_counts(today)
+    labels, present, absent = week_series(today, counts)
+    if rows is None:
+        rows = today_rows(today)
+    recorded = sum(n for (day, _), n in counts.items() if day == today)
+    return {
+        'today_attendance': rows,
+        'total_employees': total_employees,
+        'present_today': counts.get((today, 'PRESENT'), 0),
+        'absent_today': total_employees - recorded,
+        'late_today': counts.get((today, 'LATE'), 0),
+        'half_day_today': counts.get((today, 'HALF_DAY'), 0),
+        'week_labels': labels,
+        'week_present': present,
+        'week_absent': absent,
+    }
+
+
+def get_dashboard(today):
+    """Dashboard payload for today, from the cache when a fresh copy is there"""
+    key = CACHE_KEY.format(date=today.isoformat())
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_dashboard(today)
+        cache.set(key, payload, getattr(settings, 'ATTENDANCE_DASHBOARD_CACHE_TTL', 60))
+    return payload
+
+
+def invalidate_dashboard_cache(today=None):
+    """
+    Drop the cached dashboard. Called from Attendance save/delete signals;
+    bulk_create/bulk_update callers must call it themselves.
+    """
+    from django.utils import timezone
+    today = today or timezone.localdate()
+    cache.delete(CACHE_KEY.format(date=today.isoformat()))
@@ -0,0 +1,160 @@
+# attendance/events.py
+# Append-only tap log and its projection into Attendance rows.
+#
+# Ingest is a single INSERT into AttendanceEvent. The projector folds events
+# into one Attendance row per (employee, date): the earliest non-OUT tap is
+# the check-in, the latest later non-IN tap the check-out. Folding with
+# min/max is order-independent and idempotent, so replaying an event (or the
+# whole log with --rebuild) always converges on the same rows.
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .dashboard import invalidate_dashboard_cache
+from .models import Attendance, AttendanceEvent, ProjectionCheckpoint
+from .rollups import refresh_rollups
+from .shifts import update_statuses
+
+CHECKPOINT_NAME = 'attendance'
+SUMMARY_FIELDS = ['check_in', 'check_out', 'status', 'face_verified', 'latitude', 'longitude', 'updated_at']
+
+
+def record_attendance_event(employee, device_time=None, kind='TAP', source='MOBILE',
+                            face_verified=False, latitude=None, longitude=None):
+    """Append one tap; device_time defaults to now and may be earlier for taps buffered offline"""
+    device_time = device_time or timezone.now()
+    return AttendanceEvent.objects.create(
+        employee=employee,
+        kind=kind,
+        source=source,
+        device_time=device_time,
+        date=timezone.localdate(device_time),
+        face_verified=face_verified,
+        latitude=latitude,
+        longitude=longitude,
+    )
+
+
+def fold_events(events):
+    """
+    Summary of one (employee, date) slot from its events.
+
+    Returns (check_in, check_out, face_verified, latitude, longitude); times
+    are local wall-clock times truncated to the second.
+    """
+    check_in = check_out = None
+    face_verified = False
+    latitude = longitude = None
+    moments = []
+    for event in sorted(events, key=lambda e: (e.device_time, e.pk or 0)):
+        moment = timezone.localtime(event.device_time).time().replace(microsecond=0)
+        moments.append((moment, event.kind))
+        face_verified = face_verified or event.face_verified
+        if event.latitude is not None and event.longitude is not None:
+            latitude, longitude = event.latitude, event.longitude
+
+    ins = [moment for moment, kind in moments if kind != 'OUT']
+    if ins:
+        check_in = ins[0]
+    outs = [moment for moment, kind in moments if kind != 'IN' and (check_in is None or moment > check_in)]
+    if outs:
+        check_out = outs[-1]
+    return check_in, check_out, face_verified, latitude, longitude
+
+
+def fold_slots(slots, replace=False):
+    """
+    Re-project the given (employee_pk, date) slots from every event they have.
+
+    By default the result is merged into existing rows (earlier check-in,
+    later check-out win) so check-ins recorded outside the log survive;
+    replace=True overwrites them with what the log alone says.
+    Returns the number of rows written.
+    """
+    slots = set(slots)
+    if not slots:
+        return 0
+    employee_pks = {pk for pk, _ in slots}
+    dates = {day for _, day in slots}
+
+    # The IN lists over-fetch the cross product; anything outside the slots is ignored
+    grouped = {}
+    for event in AttendanceEvent.objects.filter(employee_id__in=employee_pks, date__in=dates).order_by():
+        if (event.employee_id, event.date) in slots:
+            grouped.setdefault((event.employee_id, event.date), []).append(event)
+    existing = {
+        (row.employee_id, row.date): row
+        for row in Attendance.objects.filter(employee_id__in=employee_pks, date__in=dates).order_by()
+    }
+
+    now = timezone.now()
+    created, updated = [], []
+    for slot, events in grouped.items():
+        check_in, check_out, face_verified, latitude, longitude = fold_events(events)
+        row = existing.get(slot)
+        if row is None:
+            row = Attendance(employee_id=slot[0], date=slot[1])
+            created.append(row)
+        else:
+            updated.append(row)
+            if not replace:
+                if row.check_in is not None and (check_in is None or row.check_in < check_in):
+                    check_in = row.check_in
+                if row.check_out is not None and (check_out is None or row.check_out > check_out):
+                    check_out = row.check_out
+                face_verified = face_verified or row.face_verified
+                if latitude is None:
+                    latitude, longitude = row.latitude, row.longitude
+
+        row.check_in = check_in
+        row.check_out = check_out if check_out is None or check_in is None or check_out > check_in else None
+        row.face_verified = face_verified
+        row.latitude, row.longitude = latitude, longitude
+        row.updated_at = now
+
+    update_statuses(created + updated, now)
+    # A concurrent fold (a double tap, or the projector) may insert the row after
+    # it was read above. The last writer wins, and the projector's next pass over
+    # those events folds the slot from the whole log again
+    Attendance.objects.bulk_create(
+        created, update_conflicts=True, unique_fields=['employee', 'date'], update_fields=SUMMARY_FIELDS,
+    )
+    if updated:
+        Attendance.objects.bulk_update(updated, SUMMARY_FIELDS)
+    refresh_rollups(grouped)
+    transaction.on_commit(invalidate_dashboard_cache)
+    return len(created) + len(updated)
+
+
+def project_attendance_events(batch_size=1000, rebuild=False):
+    """
+    Fold events appended since the last checkpoint into Attendance rows.
+
+    Only slots touched by new events are re-projected. Events younger than
+    ATTENDANCE_PROJECTION_LAG seconds are left for the next run, so an event
+    whose INSERT commits after a later id is not skipped. rebuild=True starts
+    from the first event and replaces the projected fields of every slot.
+    Returns (events processed, rows written).
+    """
+    lag = timedelta(seconds=getattr(settings, 'ATTENDANCE_PROJECTION_LAG', 5))
+    processed = written = 0
+    if rebuild:
+        ProjectionCheckpoint.objects.update_or_create(name=CHECKPOINT_NAME, defaults={'last_event_id': 0})
+
+    while True:
+        with transaction.atomic():
+            # The row lock keeps concurrent projectors from folding the same batch
+            checkpoint, _ = ProjectionCheckpoint.objects.select_for_update().get_or_create(name=CHECKPOINT_NAME)
+            batch = list(
+                AttendanceEvent.objects.filter(pk__gt=checkpoint.last_event_id, received_at__lte=timezone.now() - lag)
+                .order_by('pk').values_list('pk', 'employee_id', 'date')[:batch_size]
+            )
+            if not batch:
+                return processed, written
+            written += fold_slots({(employee_pk, day) for _, employee_pk, day in batch}, replace=rebuild)
+            checkpoint.last_event_id = batch[-1][0]
+            checkpoint.save(update_fields=['last_event_id', 'updated_at'])
+            processed += len(batch)
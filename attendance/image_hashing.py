@@ -0,0 +1,165 @@
+# attendance/image_hashing.py
+# Perceptual hashes of check-in and face images for replay detection.
+#
+# A 64-bit dHash is stored with its four 16-bit bands indexed. Two hashes
+# within Hamming distance < 4 must agree on at least one band (pigeonhole),
+# so a lookup is four indexed equality matches plus an exact distance check
+# on the handful of candidates.
+#
+# A check-in is only treated as a replay of the same employee's own stored
+# photos: byte-identical files always, re-encoded copies within
+# IMAGE_REPLAY_MAX_DISTANCE bits. Genuine captures taken seconds apart can be
+# as close as 3 bits, so keep that limit below what
+# `manage.py hash_media_images --calibrate` reports for real captures.
+
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.db.models import Q
+
+BANDS = 4
+BAND_BITS = 16
+HASH_SIZE = 8
+# Default for settings.IMAGE_REPLAY_MAX_DISTANCE
+REPLAY_MAX_DISTANCE = 1
+
+
+def dhash(data):
+    """
+    64-bit difference hash of encoded image bytes. Uses PIL's draft mode so
+    large JPEGs are decoded at reduced size; no OpenCV needed.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(BytesIO(data)) as image:
+        image.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))
+        image = ImageOps.exif_transpose(image).convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+        pixels = list(image.getdata())
+
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a, b):
+    return ((a ^ b) & 0xFFFFFFFFFFFFFFFF).bit_count()
+
+
+def to_signed(value):
+    """Unsigned 64-bit hash -> value that fits a BigIntegerField"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_unsigned(value):
+    return value & 0xFFFFFFFFFFFFFFFF
+
+
+def bands(value):
+    value = to_unsigned(value)
+    return [(value >> (BAND_BITS * i)) & 0xFFFF for i in range(BANDS)]
+
+
+def fingerprint_fields(value):
+    """Model field values for a hash"""
+    fields = {'dhash': to_signed(value)}
+    for i, band in enumerate(bands(value)):
+        fields[f'band{i}'] = band
+    return fields
+
+
+def find_near_duplicates(value, max_distance=None, queryset=None):
+    """
+    Stored fingerprints within max_distance bits of value, nearest first,
+    as (fingerprint, distance) pairs
+    """
+    from .models import ImageFingerprint
+
+    if max_distance is None:
+        max_distance = getattr(settings, 'IMAGE_REPLAY_MAX_DISTANCE', REPLAY_MAX_DISTANCE)
+    queryset = ImageFingerprint.objects.all() if queryset is None else queryset
+
+    match_any_band = Q()
+    for i, band in enumerate(bands(value)):
+        match_any_band |= Q(**{f'band{i}': band})
+
+    found = []
+    for fingerprint in queryset.filter(match_any_band).select_related('employee'):
+        distance = hamming(value, fingerprint.dhash)
+        if distance <= max_distance:
+            found.append((fingerprint, distance))
+    found.sort(key=lambda pair: pair[1])
+    return found
+
+
+def find_replays(employee, value, digest=''):
+    """
+    The employee's stored fingerprints that make an upload a replay, as
+    (fingerprint, distance) pairs: the same bytes (digest), or a dHash within
+    IMAGE_REPLAY_MAX_DISTANCE bits
+    """
+    from .models import ImageFingerprint
+
+    own = ImageFingerprint.objects.filter(employee=employee)
+    if digest:
+        exact = own.filter(sha256=digest).first()
+        if exact is not None:
+            return [(exact, hamming(value, exact.dhash))]
+    return find_near_duplicates(value, queryset=own)
+
+
+def upload_digest(upload):
+    """SHA-256 hex digest of an uploaded file's bytes, leaving it rewound"""
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()
+
+
+def hash_upload(upload):
+    """dHash of an uploaded file, leaving it rewound for storage; None if it is not an image"""
+    data = b''.join(upload.chunks())
+    upload.seek(0)
+    try:
+        return dhash(data)
+    except (OSError, ValueError, SyntaxError):
+        return None
+
+
+def record_fingerprint(value, employee, source, attendance=None, image_name='', digest=''):
+    from .models import ImageFingerprint
+
+    return ImageFingerprint.objects.create(
+        employee=employee, attendance=attendance, source=source,
+        image_name=image_name or '', sha256=digest or '', **fingerprint_fields(value)
+    )
+
+
+def closest_distinct_captures(queryset=None):
+    """
+    For every employee with several stored images, the dHash distance between
+    their two closest images that are not byte-identical: how near genuine,
+    separate captures get, for calibrating IMAGE_REPLAY_MAX_DISTANCE
+    """
+    from .models import ImageFingerprint
+
+    queryset = ImageFingerprint.objects.all() if queryset is None else queryset
+    by_employee = {}
+    for employee_id, value, digest in queryset.order_by().values_list('employee_id', 'dhash', 'sha256'):
+        by_employee.setdefault(employee_id, []).append((value, digest))
+
+    closest = {}
+    for employee_id, images in by_employee.items():
+        distances = [
+            hamming(a, b)
+            for i, (a, digest_a) in enumerate(images)
+            for b, digest_b in images[i + 1:]
+            if not (digest_a and digest_a == digest_b)
+        ]
+        if distances:
+            closest[employee_id] = min(distances)
+    return closest
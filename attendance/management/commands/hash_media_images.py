@@ -0,0 +1,98 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+
+from attendance.image_hashing import REPLAY_MAX_DISTANCE, closest_distinct_captures, dhash, fingerprint_fields
+from attendance.models import Attendance, ImageFingerprint
+from employees.models import Employee
+
+
+def _hash_bytes(data):
+    """(dHash, SHA-256 hex digest) of image bytes, or None if they are not an image"""
+    try:
+        return dhash(data), hashlib.sha256(data).hexdigest()
+    except (OSError, ValueError, SyntaxError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Compute perceptual hashes for stored check-in and face images that do not have one yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Hashing processes')
+        parser.add_argument('--batch-size', type=int, default=200, help='Images read and hashed per batch')
+        parser.add_argument('--calibrate', action='store_true',
+                            help='Then report how close genuine captures of the same employee get (for IMAGE_REPLAY_MAX_DISTANCE)')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        workers = max(1, options['workers'])
+
+        check_ins = Attendance.objects.exclude(check_in_image='').exclude(check_in_image__isnull=True).filter(
+            ~Exists(ImageFingerprint.objects.filter(attendance=OuterRef('pk'), source='CHECK_IN'))
+        ).only('pk', 'employee_id', 'check_in_image')
+        faces = Employee.objects.exclude(face_image='').exclude(face_image__isnull=True).filter(
+            ~Exists(ImageFingerprint.objects.filter(
+                employee=OuterRef('pk'), source='FACE', image_name=OuterRef('face_image')
+            ))
+        ).only('pk', 'face_image')
+
+        jobs = [
+            ('CHECK_IN', a.employee_id, a.pk, a.check_in_image) for a in check_ins.iterator(chunk_size=batch_size)
+        ] + [
+            ('FACE', e.pk, None, e.face_image) for e in faces.iterator(chunk_size=batch_size)
+        ]
+
+        hashed = failed = 0
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            for start in range(0, len(jobs), batch_size):
+                batch, payloads = [], []
+                for source, employee_id, attendance_id, field_file in jobs[start:start + batch_size]:
+                    try:
+                        with field_file.open('rb') as handle:
+                            payloads.append(handle.read())
+                        batch.append((source, employee_id, attendance_id, field_file.name))
+                    except OSError as exc:
+                        failed += 1
+                        self.stdout.write(self.style.WARNING(f'Skipping {field_file.name}: {exc}'))
+
+                values = executor.map(_hash_bytes, payloads) if executor else map(_hash_bytes, payloads)
+                rows = []
+                for (source, employee_id, attendance_id, name), value in zip(batch, values):
+                    if value is None:
+                        failed += 1
+                        continue
+                    value, digest = value
+                    rows.append(ImageFingerprint(
+                        employee_id=employee_id, attendance_id=attendance_id, source=source,
+                        image_name=name, sha256=digest, **fingerprint_fields(value)
+                    ))
+                ImageFingerprint.objects.bulk_create(rows)
+                hashed += len(rows)
+                self.stdout.write(f'{hashed}/{len(jobs)} hashed')
+        finally:
+            if executor:
+                executor.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(f'Hashed {hashed} images ({failed} failed)'))
+        if options['calibrate']:
+            self._calibrate()
+
+    def _calibrate(self):
+        from django.conf import settings
+
+        closest = sorted(closest_distinct_captures().values())
+        if not closest:
+            self.stdout.write('No employee has two distinct stored images to compare')
+            return
+        limit = getattr(settings, 'IMAGE_REPLAY_MAX_DISTANCE', REPLAY_MAX_DISTANCE)
+        flagged = sum(1 for distance in closest if distance <= limit)
+        self.stdout.write(
+            f'Closest distinct captures over {len(closest)} employees: min {closest[0]} bits, '
+            f'median {closest[len(closest) // 2]} bits; {flagged} would be rejected at '
+            f'IMAGE_REPLAY_MAX_DISTANCE={limit}'
+        )
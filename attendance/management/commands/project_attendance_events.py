@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from attendance.events import project_attendance_events
+
+
+class Command(BaseCommand):
+    help = 'Fold attendance events appended since the last run into Attendance rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Events folded per transaction')
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Replay the whole event log and overwrite the projected fields of every slot it covers',
+        )
+
+    def handle(self, *args, **options):
+        processed, written = project_attendance_events(
+            batch_size=max(1, options['batch_size']), rebuild=options['rebuild'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Folded {processed} events into {written} attendance rows'))
@@ -0,0 +1,18 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from attendance.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily and monthly attendance rollup tables from Attendance rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='First date to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last date to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--chunk-days', type=int, default=31, help='Days recomputed per batch')
+
+    def handle(self, *args, **options):
+        days = rebuild_rollups(options['start'], options['end'], chunk_days=options['chunk_days'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt attendance rollups for {days} days'))
@@ -1,29 +1,165 @@
-from django.core.management.base import BaseCommand
-from attendance.models import Attendance
-from datetime import datetime, time
+import time as clock
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+
+def _init_worker():
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def recompute_statuses(start, end, chunk_size=2000, on_change=None, on_batch=None):
+    """
+    Recompute Attendance.status for rows dated start..end (inclusive, either may be None).
+
+    Rows are read chunk_size at a time (keyset on pk) and the changed ones in
+    each chunk written back with one bulk_update. No read cursor is held open
+    across writes, so shards in other processes can write to SQLite meanwhile.
+    on_change(attendance, old_status) and on_batch(scanned, updated) are
+    optional progress callbacks. Returns (scanned, updated).
+    """
+    from attendance.dashboard import invalidate_dashboard_cache
+    from attendance.models import Attendance
+    from attendance.rollups import refresh_rollups
+    from attendance.shifts import update_statuses
+
+    rows = Attendance.objects.select_related('employee').only(
+        'pk', 'date', 'check_in', 'check_out', 'status', 'employee__employee_id',
+    ).order_by('pk')
+    if start:
+        rows = rows.filter(date__gte=start)
+    if end:
+        rows = rows.filter(date__lte=end)
+
+    scanned = updated = 0
+    last_pk = 0
+    while True:
+        chunk = list(rows.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            return scanned, updated
+        last_pk = chunk[-1].pk
+        scanned += len(chunk)
+
+        old_statuses = {attendance.pk: attendance.status for attendance in chunk}
+        changed = update_statuses(chunk)
+        if on_change:
+            for attendance in changed:
+                on_change(attendance, old_statuses[attendance.pk])
+        if changed:
+            now = timezone.now()
+            for attendance in changed:
+                attendance.updated_at = now
+            Attendance.objects.bulk_update(changed, ['status', 'updated_at'])
+            refresh_rollups({(attendance.employee_id, attendance.date) for attendance in changed})
+            invalidate_dashboard_cache()
+            updated += len(changed)
+        if on_batch:
+            on_batch(scanned, updated)
+
+
+def _recompute_shard(start, end, chunk_size):
+    from django.db import connections
+    try:
+        return start, end, recompute_statuses(start, end, chunk_size)
+    finally:
+        connections.close_all()
+
+
+def split_date_range(start, end, shards):
+    """Contiguous, non-overlapping (start, end) sub-ranges covering start..end"""
+    days = (end - start).days + 1
+    shards = max(1, min(shards, days))
+    bounds = [start + timedelta(days=days * i // shards) for i in range(shards + 1)]
+    return [(bounds[i], bounds[i + 1] - timedelta(days=1)) for i in range(shards)]
+
 
 class Command(BaseCommand):
     help = 'Recalculate and update attendance statuses'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat, help='Only rows dated on or after YYYY-MM-DD')
+        parser.add_argument(
+            '--date-range', metavar='START:END',
+            help='Only rows dated START..END inclusive (YYYY-MM-DD:YYYY-MM-DD)',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched and written per batch')
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Processes to shard the date range across (each gets its own DB connection)',
+        )
+
+    def _date_bounds(self, options):
+        start = end = None
+        if options['date_range']:
+            try:
+                first, last = options['date_range'].split(':')
+                start, end = date.fromisoformat(first), date.fromisoformat(last)
+            except ValueError:
+                raise CommandError('--date-range must look like 2024-01-01:2024-12-31')
+            if start > end:
+                raise CommandError('--date-range start is after its end')
+        if options['since']:
+            start = max(start, options['since']) if start else options['since']
+        return start, end
+
     def handle(self, *args, **options):
-        attendances = Attendance.objects.all()
-        updated = 0
-
-        for attendance in attendances:
-            old_status = attendance.status
-            attendance.update_status()
-            if old_status != attendance.status:
-                attendance.save()
-                hours = attendance.get_hours_worked()
-                hours_str = f"{hours:.2f}" if hours is not None else "N/A"
-                self.stdout.write(
-                    f"Updated {attendance.employee.employee_id} on {attendance.date}:\n"
-                    f"Check-in: {attendance.check_in}, Check-out: {attendance.check_out}\n"
-                    f"Hours: {hours_str}\n"
-                    f"Old status: {old_status}, New status: {attendance.status}\n"
-                )
-                updated += 1
+        from attendance.models import Attendance
+
+        start, end = self._date_bounds(options)
+        chunk_size = max(1, options['chunk_size'])
+        workers = max(1, options['workers'])
+        verbose = options['verbosity'] >= 2
+        began = clock.monotonic()
+
+        def report(scanned, updated):
+            elapsed = clock.monotonic() - began
+            rate = scanned / elapsed if elapsed else 0.0
+            self.stdout.write(f'{scanned} rows scanned, {updated} updated ({rate:.0f} rows/s)')
+
+        def show_change(attendance, old_status):
+            hours = attendance.get_hours_worked()
+            hours_str = f"{hours:.2f}" if hours is not None else "N/A"
+            self.stdout.write(
+                f"Updated {attendance.employee.employee_id} on {attendance.date}:\n"
+                f"Check-in: {attendance.check_in}, Check-out: {attendance.check_out}\n"
+                f"Hours: {hours_str}\n"
+                f"Old status: {old_status}, New status: {attendance.status}\n"
+            )
+
+        if workers == 1:
+            scanned, updated = recompute_statuses(
+                start, end, chunk_size, on_change=show_change if verbose else None, on_batch=report,
+            )
+        else:
+            # Shard over the dates that actually have rows
+            bounds = Attendance.objects.all()
+            if start:
+                bounds = bounds.filter(date__gte=start)
+            if end:
+                bounds = bounds.filter(date__lte=end)
+            bounds = bounds.aggregate(first=Min('date'), last=Max('date'))
+            scanned = updated = 0
+            if bounds['first'] is not None:
+                from django.db import connections
+                shards = split_date_range(bounds['first'], bounds['last'], workers)
+                # Children must not inherit this process's open connection
+                connections.close_all()
+                with ProcessPoolExecutor(max_workers=len(shards), initializer=_init_worker) as pool:
+                    futures = [pool.submit(_recompute_shard, first, last, chunk_size) for first, last in shards]
+                    for future in as_completed(futures):
+                        first, last, (shard_scanned, shard_updated) = future.result()
+                        scanned += shard_scanned
+                        updated += shard_updated
+                        self.stdout.write(f'{first}..{last} done')
+                        report(scanned, updated)
 
+        elapsed = clock.monotonic() - began
         self.stdout.write(self.style.SUCCESS(
-            f'Updated {updated} attendance records'
-        ))
\ No newline at end of file
+            f'Updated {updated} of {scanned} attendance records in {elapsed:.1f}s'
+        ))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0001_initial'),
+        ('employees', '0003_face_samples'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('CHECK_IN', 'Check-in image'), ('FACE', 'Registered face image')], max_length=10)),
+                ('image_name', models.CharField(blank=True, max_length=255)),
+                ('sha256', models.CharField(blank=True, db_index=True, help_text='Digest of the exact file bytes', max_length=64)),
+                ('dhash', models.BigIntegerField(help_text='Signed 64-bit difference hash')),
+                ('band0', models.PositiveIntegerField(db_index=True)),
+                ('band1', models.PositiveIntegerField(db_index=True)),
+                ('band2', models.PositiveIntegerField(db_index=True)),
+                ('band3', models.PositiveIntegerField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('attendance', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='image_fingerprints', to='attendance.attendance')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_fingerprints', to='employees.employee')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_attendance_idempotency_keys'),
+        ('employees', '0003_face_samples'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectionCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_event_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AttendanceEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('TAP', 'Tap'), ('IN', 'Check-in'), ('OUT', 'Check-out')], default='TAP', max_length=3)),
+                ('source', models.CharField(choices=[('MOBILE', 'Mobile app'), ('FACE', 'Face check-in'), ('GATE', 'Gate terminal')], default='MOBILE', max_length=10)),
+                ('device_time', models.DateTimeField(help_text='When the tap happened, as reported by the device')),
+                ('date', models.DateField(help_text='Local date of device_time; the Attendance row this event folds into')),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('face_verified', models.BooleanField(default=False)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_events', to='employees.employee')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['employee', 'date'], name='attendance__employe_079da6_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:37
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_attendance_event_log'),
+        ('employees', '0003_face_samples'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShiftPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('start_time', models.TimeField(default=datetime.time(9, 0))),
+                ('end_time', models.TimeField(default=datetime.time(17, 0))),
+                ('grace_minutes', models.PositiveIntegerField(default=30, help_text='Check-ins later than start + grace are LATE')),
+                ('half_day_hours', models.DecimalField(decimal_places=2, default=4, help_text='Less than this is HALF_DAY', max_digits=4)),
+                ('full_day_hours', models.DecimalField(decimal_places=2, default=8, max_digits=4)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Shift policies',
+                'ordering': ['start_time', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ShiftAssignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valid_from', models.DateField()),
+                ('valid_until', models.DateField(blank=True, null=True)),
+                ('days_per_step', models.PositiveSmallIntegerField(default=7, help_text='Days on each rotation step')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='shift_assignments', to='employees.department')),
+                ('employee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='shift_assignments', to='employees.employee')),
+                ('policy', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='assignments', to='attendance.shiftpolicy')),
+            ],
+            options={
+                'ordering': ['-valid_from'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ShiftRotationStep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='steps', to='attendance.shiftassignment')),
+                ('policy', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='rotation_steps', to='attendance.shiftpolicy')),
+            ],
+            options={
+                'ordering': ['assignment', 'position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shiftassignment',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('department__isnull', True), ('employee__isnull', False)), models.Q(('department__isnull', False), ('employee__isnull', True)), _connector='OR'), name='shift_assignment_one_target'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='shiftrotationstep',
+            unique_together={('assignment', 'position')},
+        ),
+    ]
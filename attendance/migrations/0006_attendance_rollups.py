@@ -0,0 +1,85 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:45
+#
+# The rollup tables are filled from Attendance the way attendance/rollups.py
+# rebuild_rollups does, with the counting logic frozen here so later changes
+# to the live code cannot change it.
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+MONTHLY_FIELDS = {'PRESENT': 'present', 'LATE': 'late', 'ABSENT': 'absent', 'HALF_DAY': 'half_day'}
+
+
+def backfill_rollups(apps, schema_editor):
+    Attendance = apps.get_model('attendance', 'Attendance')
+    DailyAttendanceRollup = apps.get_model('attendance', 'DailyAttendanceRollup')
+    MonthlyAttendanceRollup = apps.get_model('attendance', 'MonthlyAttendanceRollup')
+    DailyAttendanceRollup.objects.all().delete()
+    MonthlyAttendanceRollup.objects.all().delete()
+
+    daily = Attendance.objects.order_by().values('date', 'employee__department', 'status').annotate(n=Count('pk'))
+    DailyAttendanceRollup.objects.bulk_create(
+        (
+            DailyAttendanceRollup(
+                date=row['date'], department_id=row['employee__department'], status=row['status'], count=row['n'],
+            )
+            for row in daily.iterator(chunk_size=2000)
+        ),
+        batch_size=1000,
+    )
+
+    monthly = {}
+    rows = Attendance.objects.order_by().values('employee', 'date', 'status').annotate(n=Count('pk'))
+    for row in rows.iterator(chunk_size=2000):
+        key = (row['employee'], row['date'].year, row['date'].month)
+        rollup = monthly.get(key)
+        if rollup is None:
+            rollup = monthly[key] = MonthlyAttendanceRollup(employee_id=key[0], year=key[1], month=key[2])
+        field = MONTHLY_FIELDS.get(row['status'])
+        if field:
+            setattr(rollup, field, getattr(rollup, field) + row['n'])
+    MonthlyAttendanceRollup.objects.bulk_create(monthly.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_shift_policies'),
+        ('employees', '0003_face_samples'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('PRESENT', 'Present'), ('ABSENT', 'Absent'), ('LATE', 'Late'), ('HALF_DAY', 'Half Day')], max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to='employees.department')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('date', 'department', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyAttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('half_day', models.PositiveIntegerField(default=0)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_attendance', to='employees.employee')),
+            ],
+            options={
+                'ordering': ['-year', '-month'],
+                'unique_together': {('employee', 'year', 'month')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -66,50 +66,10 @@ class Attendance(models.Model):
         duration = check_out_dt - check_in_dt
         return round(duration.total_seconds() / 3600, 2)  # Convert to hours and round to 2 decimals
 
-    def update_status(self):
-        """Update status based on check-in time and hours worked"""
-        if not self.check_in:
-            self.status = 'ABSENT'
-            return
-
-        # Standard work day settings (can be moved to settings.py)
-        WORK_START_HOUR = 9  # 9:00 AM
-        WORK_START_MIN = 0   # 9:00 AM
-        LATE_THRESHOLD = 30  # 30 minutes grace period
-        HALF_DAY_HOURS = 4.0 # Less than 4 hours is half day
-        FULL_DAY_HOURS = 8.0 # Standard 8-hour workday
-
-        # Get current time in the correct timezone
-        now = timezone.localtime()
-        
-        # Create the standard start time for today
-        standard_start = time(WORK_START_HOUR, 0)  # 9:00 AM
-        late_start = (datetime.combine(self.date, standard_start) + 
-                     timedelta(minutes=LATE_THRESHOLD)).time()
-
-        # Get hours worked
-        hours = self.get_hours_worked()
-
-        # For today's records
-        if self.date == now.date():
-            # If it's before work hours, mark as present but hours will show as 0
-            if now.time() < standard_start:
-                self.status = 'PRESENT'
-                return
-        
-        # Determine status based on hours and check-in time
-        if hours is not None:
-            if hours < HALF_DAY_HOURS:
-                self.status = 'HALF_DAY'
-            elif self.check_in > late_start:
-                self.status = 'LATE'
-            else:
-                self.status = 'PRESENT'
-        else:  # No check-out yet
-            if self.check_in > late_start:
-                self.status = 'LATE'
-            else:
-                self.status = 'PRESENT'
+    def update_status(self, now=None):
+        """Update status from check-in/out times and the employee's shift (see attendance/shifts.py)"""
+        from .shifts import get_shift_table
+        self.status = get_shift_table().status(self, timezone.localtime(now))
 
     def save(self, *args, **kwargs):
         """Override save to update status automatically"""
@@ -121,7 +81,202 @@ class Attendance(models.Model):
 
     class Meta:
         ordering = ['-date', '-check_in']
+        # The unique index also serves (employee, date range) lookups
         unique_together = ['employee', 'date']
+        indexes = [models.Index(fields=['date', 'status'], name='attendance_date_status_idx')]
 
 
+class ImageFingerprint(models.Model):
+    """
+    64-bit difference hash of a stored check-in or face image, split into four
+    indexed 16-bit bands so near-duplicates can be found without a table scan
+    (see attendance/image_hashing.py)
+    """
+    SOURCE_CHOICES = [
+        ('CHECK_IN', 'Check-in image'),
+        ('FACE', 'Registered face image'),
+    ]
+
+    employee = models.ForeignKey('employees.Employee', on_delete=models.CASCADE, related_name='image_fingerprints')
+    attendance = models.ForeignKey(Attendance, on_delete=models.CASCADE, null=True, blank=True, related_name='image_fingerprints')
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    image_name = models.CharField(max_length=255, blank=True)
+    dhash = models.BigIntegerField(help_text="Signed 64-bit difference hash")
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True, help_text="Digest of the exact file bytes")
+    band0 = models.PositiveIntegerField(db_index=True)
+    band1 = models.PositiveIntegerField(db_index=True)
+    band2 = models.PositiveIntegerField(db_index=True)
+    band3 = models.PositiveIntegerField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.get_source_display()} {self.image_name or self.pk}"
+
+    class Meta:
+        ordering = ['-created_at']
+
+
+class AttendanceIdempotencyKey(models.Model):
+    """Client-supplied key of an already applied bulk attendance event, so terminal retries are no-ops"""
+    key = models.CharField(max_length=100, unique=True)
+    attendance = models.ForeignKey(Attendance, on_delete=models.SET_NULL, null=True, blank=True, related_name='idempotency_keys')
+    result = models.CharField(max_length=20)
+    created_at = models.DateTimeField(auto_now_add=True)
 
+    def __str__(self):
+        return self.key
+
+
+class AttendanceEvent(models.Model):
+    """
+    One tap, appended and never updated. Attendance rows are a projection of
+    these (see attendance/events.py), so they can be rebuilt at any time.
+    """
+    KIND_CHOICES = [
+        ('TAP', 'Tap'),
+        ('IN', 'Check-in'),
+        ('OUT', 'Check-out'),
+    ]
+    SOURCE_CHOICES = [
+        ('MOBILE', 'Mobile app'),
+        ('FACE', 'Face check-in'),
+        ('GATE', 'Gate terminal'),
+    ]
+
+    employee = models.ForeignKey('employees.Employee', on_delete=models.CASCADE, related_name='attendance_events')
+    kind = models.CharField(max_length=3, choices=KIND_CHOICES, default='TAP')
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default='MOBILE')
+    device_time = models.DateTimeField(help_text="When the tap happened, as reported by the device")
+    date = models.DateField(help_text="Local date of device_time; the Attendance row this event folds into")
+    received_at = models.DateTimeField(auto_now_add=True)
+    face_verified = models.BooleanField(default=False)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.employee_id} {self.get_kind_display()} {self.device_time}"
+
+    class Meta:
+        ordering = ['id']
+        indexes = [models.Index(fields=['employee', 'date'])]
+
+
+class ProjectionCheckpoint(models.Model):
+    """Last AttendanceEvent id a projector has folded into the summary rows"""
+    name = models.CharField(max_length=50, unique=True)
+    last_event_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_event_id}"
+
+
+class ShiftPolicy(models.Model):
+    """
+    Working hours and thresholds used to derive Attendance.status. A shift
+    whose end_time is not after its start_time runs past midnight (night shift).
+    Compiled into integer lookups by attendance/shifts.py.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    start_time = models.TimeField(default=time(9, 0))
+    end_time = models.TimeField(default=time(17, 0))
+    grace_minutes = models.PositiveIntegerField(default=30, help_text="Check-ins later than start + grace are LATE")
+    half_day_hours = models.DecimalField(max_digits=4, decimal_places=2, default=4, help_text="Less than this is HALF_DAY")
+    full_day_hours = models.DecimalField(max_digits=4, decimal_places=2, default=8)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def is_overnight(self):
+        return self.end_time <= self.start_time
+
+    def __str__(self):
+        return f"{self.name} ({self.start_time:%H:%M}-{self.end_time:%H:%M})"
+
+    class Meta:
+        ordering = ['start_time', 'name']
+        verbose_name_plural = 'Shift policies'
+
+
+class ShiftAssignment(models.Model):
+    """
+    Puts an employee, or everyone in a department, on a shift from valid_from
+    (until valid_until when set). Employee assignments win over department
+    ones, and the most recent valid_from wins among equals. With rotation
+    steps the shift cycles through them, days_per_step days each, counted
+    from valid_from; otherwise policy applies every day.
+    """
+    employee = models.ForeignKey('employees.Employee', on_delete=models.CASCADE, null=True, blank=True, related_name='shift_assignments')
+    department = models.ForeignKey('employees.Department', on_delete=models.CASCADE, null=True, blank=True, related_name='shift_assignments')
+    policy = models.ForeignKey(ShiftPolicy, on_delete=models.PROTECT, null=True, blank=True, related_name='assignments')
+    valid_from = models.DateField()
+    valid_until = models.DateField(null=True, blank=True)
+    days_per_step = models.PositiveSmallIntegerField(default=7, help_text="Days on each rotation step")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        target = self.employee or self.department
+        return f"{target} from {self.valid_from}"
+
+    class Meta:
+        ordering = ['-valid_from']
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(employee__isnull=False, department__isnull=True)
+                | models.Q(employee__isnull=True, department__isnull=False),
+                name='shift_assignment_one_target',
+            ),
+        ]
+
+
+class ShiftRotationStep(models.Model):
+    """One step of a rotating roster"""
+    assignment = models.ForeignKey(ShiftAssignment, on_delete=models.CASCADE, related_name='steps')
+    position = models.PositiveSmallIntegerField()
+    policy = models.ForeignKey(ShiftPolicy, on_delete=models.PROTECT, related_name='rotation_steps')
+
+    def __str__(self):
+        return f"{self.assignment} step {self.position}: {self.policy.name}"
+
+    class Meta:
+        ordering = ['assignment', 'position']
+        unique_together = ['assignment', 'position']
+
+
+class DailyAttendanceRollup(models.Model):
+    """Attendance rows per (date, department, status); maintained by attendance/rollups.py"""
+    date = models.DateField()
+    department = models.ForeignKey('employees.Department', on_delete=models.CASCADE, null=True, blank=True, related_name='attendance_rollups')
+    status = models.CharField(max_length=20, choices=Attendance.STATUS_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.date} {self.department or '-'} {self.status}: {self.count}"
+
+    class Meta:
+        ordering = ['-date']
+        unique_together = ['date', 'department', 'status']
+
+
+class MonthlyAttendanceRollup(models.Model):
+    """Per-employee status counts for one calendar month; maintained by attendance/rollups.py"""
+    employee = models.ForeignKey('employees.Employee', on_delete=models.CASCADE, related_name='monthly_attendance')
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    present = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    half_day = models.PositiveIntegerField(default=0)
+
+    @property
+    def days_worked(self):
+        """Late days count as worked, as in payroll"""
+        return self.present + self.late
+
+    def __str__(self):
+        return f"{self.employee_id} {self.month}/{self.year}"
+
+    class Meta:
+        ordering = ['-year', '-month']
+        unique_together = ['employee', 'year', 'month']
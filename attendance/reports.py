@@ -0,0 +1,93 @@
+# attendance/reports.py
+# Per-employee attendance summary over a date range: one grouped query for a
+# page of employees, and CSV/XLSX exports that stream the same rows
+
+import csv
+import tempfile
+
+from django.db.models import Count, FilteredRelation, Q
+from django.http import FileResponse, StreamingHttpResponse
+
+from employees.models import Employee
+
+SUMMARY_STATUSES = ('PRESENT', 'ABSENT', 'LATE', 'HALF_DAY')
+EXPORT_HEADER = ['Employee ID', 'Name', 'Department', 'Present', 'Absent', 'Late', 'Half Day', 'Attendance %']
+
+
+def summary_employees(department_id=None):
+    employees = Employee.objects.filter(is_active=True)
+    if department_id:
+        employees = employees.filter(department_id=department_id)
+    return employees
+
+
+def summary_queryset(start, end, department_id=None):
+    """
+    Active employees annotated with present/absent/late/half_day counts for
+    start..end. The join is limited to the range, so the whole summary is a
+    single GROUP BY employee query whatever the headcount or range length.
+    """
+    return summary_employees(department_id).select_related('user', 'department').annotate(
+        period=FilteredRelation('attendances', condition=Q(attendances__date__range=(start, end))),
+        **{
+            status.lower(): Count('period', filter=Q(period__status=status))
+            for status in SUMMARY_STATUSES
+        },
+    ).order_by('employee_id')
+
+
+def attendance_percentage(employee):
+    total = employee.present + employee.absent + employee.late
+    return round(employee.present * 100 / total) if total else 0
+
+
+def export_rows(queryset, chunk_size=2000):
+    for employee in queryset.iterator(chunk_size=chunk_size):
+        yield [
+            employee.employee_id,
+            employee.user.get_full_name(),
+            employee.department.name if employee.department else '',
+            employee.present,
+            employee.absent,
+            employee.late,
+            employee.half_day,
+            attendance_percentage(employee),
+        ]
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+def csv_response(queryset, filename):
+    """StreamingHttpResponse that writes the summary row by row, never holding it all in memory"""
+    writer = csv.writer(_Echo())
+    lines = (writer.writerow(row) for row in _with_header(export_rows(queryset)))
+    response = StreamingHttpResponse(lines, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def xlsx_response(queryset, filename):
+    """XLSX export built with openpyxl's write-only workbook into a spooled temp file"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Attendance')
+    for row in _with_header(export_rows(queryset)):
+        sheet.append(row)
+    output = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output, as_attachment=True, filename=filename,
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+def _with_header(rows):
+    yield EXPORT_HEADER
+    yield from rows
@@ -0,0 +1,202 @@
+# attendance/rollups.py
+# Materialized attendance counts for reporting.
+#
+# DailyAttendanceRollup holds rows per (date, department, status) and
+# MonthlyAttendanceRollup per-employee status counts per month. Writes
+# refresh only the dates and employee-months they touch, recomputed from
+# Attendance with a few set-based queries, so readers pay O(days) instead of
+# O(rows). The refresh runs once the writer's transaction commits, so the
+# shared per-day rows are not held locked for the rest of a request and
+# cascades deleting an employee do not recreate the employee's rollups.
+# Rows are attributed to the employee's current department;
+# `manage.py rebuild_attendance_rollups` recomputes everything, e.g. after
+# employees move between departments.
+
+import calendar
+import threading
+from datetime import date, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Min, Sum
+from django.dispatch import Signal
+
+from employees.models import Employee
+from .models import Attendance, DailyAttendanceRollup, MonthlyAttendanceRollup
+
+MONTHLY_FIELDS = {'PRESENT': 'present', 'LATE': 'late', 'ABSENT': 'absent', 'HALF_DAY': 'half_day'}
+
+# Sent with employee_months={(employee_pk, year, month), ...} after their monthly
+# rollups are recomputed, inside the refresh's transaction. Unlike post_save it
+# also fires for bulk writes, so consumers (payroll) see every attendance change.
+monthly_rollups_refreshed = Signal()
+
+# Slots written in this thread whose refresh is waiting for the commit, or None
+_pending = threading.local()
+
+
+def _month_span(year, month):
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _refresh_daily(dates):
+    counts = {
+        (row['date'], row['employee__department'], row['status']): row['n']
+        for row in Attendance.objects.filter(date__in=dates).order_by().values(
+            'date', 'employee__department', 'status',
+        ).annotate(n=Count('pk'))
+    }
+    rows, stale = {}, []
+    for rollup in DailyAttendanceRollup.objects.filter(date__in=dates).order_by('pk'):
+        key = (rollup.date, rollup.department_id, rollup.status)
+        # Cells that emptied, and duplicates of NULL-department cells (NULLs never conflict)
+        if key in rows or key not in counts:
+            stale.append(rollup.pk)
+        else:
+            rows[key] = rollup
+    changed = []
+    for key, rollup in rows.items():
+        if rollup.count != counts[key]:
+            rollup.count = counts[key]
+            changed.append(rollup)
+
+    if stale:
+        DailyAttendanceRollup.objects.filter(pk__in=stale).delete()
+    if changed:
+        DailyAttendanceRollup.objects.bulk_update(changed, ['count'])
+    DailyAttendanceRollup.objects.bulk_create([
+        DailyAttendanceRollup(date=day, department_id=department, status=status, count=n)
+        for (day, department, status), n in counts.items() if (day, department, status) not in rows
+    ])
+
+
+def refresh_daily(dates):
+    """
+    Recompute the daily rollup rows of the given dates. Only cells whose count
+    changed are written, so concurrent refreshes of a busy day do not rewrite
+    each other's rows; one that loses a race to insert the same new cell
+    recomputes once more.
+    """
+    dates = set(dates)
+    if not dates:
+        return
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                _refresh_daily(dates)
+            return
+        except IntegrityError:
+            if attempt:
+                raise
+
+
+def refresh_monthly(employee_months):
+    """Recompute the monthly rollup rows of the given (employee_pk, year, month) triples"""
+    employee_months = set(employee_months)
+    if not employee_months:
+        return
+    months = {(year, month) for _, year, month in employee_months}
+    first = _month_span(*min(months))[0]
+    last = _month_span(*max(months))[1]
+
+    rollups = {
+        key: MonthlyAttendanceRollup(employee_id=key[0], year=key[1], month=key[2])
+        for key in employee_months
+    }
+    rows = Attendance.objects.filter(
+        employee_id__in={pk for pk, _, _ in employee_months}, date__range=(first, last),
+    ).order_by().values('employee', 'date', 'status').annotate(n=Count('pk'))
+    for row in rows:
+        rollup = rollups.get((row['employee'], row['date'].year, row['date'].month))
+        field = MONTHLY_FIELDS.get(row['status'])
+        if rollup is not None and field:
+            setattr(rollup, field, getattr(rollup, field) + row['n'])
+
+    MonthlyAttendanceRollup.objects.bulk_create(
+        rollups.values(),
+        update_conflicts=True,
+        unique_fields=['employee', 'year', 'month'],
+        update_fields=list(MONTHLY_FIELDS.values()),
+    )
+    monthly_rollups_refreshed.send(sender=MonthlyAttendanceRollup, employee_months=employee_months)
+
+
+def _refresh_pending():
+    slots, _pending.slots = _pending.slots, None
+    # Skip employees deleted by the transaction that wrote the slots
+    existing = set(Employee.objects.filter(pk__in={pk for pk, _ in slots}).order_by().values_list('pk', flat=True))
+    refresh_daily({day for _, day in slots})
+    with transaction.atomic():
+        refresh_monthly({(pk, day.year, day.month) for pk, day in slots if pk in existing})
+
+
+def refresh_rollups(slots):
+    """
+    Refresh the rollups covering the given (employee_pk, date) slots once the
+    current transaction commits (right away outside one). Slots from every
+    write in the transaction are refreshed together.
+    """
+    slots = set(slots)
+    if not slots:
+        return
+    queued = any(func is _refresh_pending for _, func, _ in transaction.get_connection().run_on_commit)
+    if queued and getattr(_pending, 'slots', None) is not None:
+        _pending.slots.update(slots)
+        return
+    # Nothing waiting in this transaction; slots left over were rolled back
+    _pending.slots = slots
+    transaction.on_commit(_refresh_pending)
+
+
+def rebuild_rollups(start=None, end=None, chunk_days=31):
+    """
+    Recompute every rollup between start and end (defaults: the first and
+    last attendance dates), chunk_days at a time. Returns the number of days processed.
+    """
+    bounds = Attendance.objects.aggregate(first=Min('date'), last=Max('date'))
+    if bounds['first'] is None:
+        return 0
+    start, end = start or bounds['first'], end or bounds['last']
+
+    days = 0
+    cursor = start
+    while cursor <= end:
+        month_start, month_end = _month_span(cursor.year, cursor.month)
+        span_end = min(end, month_end, cursor + timedelta(days=max(1, chunk_days) - 1))
+        refresh_daily(cursor + timedelta(days=n) for n in range((span_end - cursor).days + 1))
+        if span_end in (month_end, end):
+            # Month finished: recompute it for everyone who has rows in it
+            employees = Attendance.objects.filter(date__range=(month_start, month_end)).order_by().values_list(
+                'employee_id', flat=True,
+            ).distinct()
+            with transaction.atomic():
+                MonthlyAttendanceRollup.objects.filter(year=cursor.year, month=cursor.month).delete()
+                refresh_monthly({(pk, cursor.year, cursor.month) for pk in employees})
+        days += (span_end - cursor).days + 1
+        cursor = span_end + timedelta(days=1)
+    return days
+
+
+def daily_status_counts(start, end, department_id=None):
+    """{(date, status): count} for start..end, summed over departments unless one is given"""
+    rollups = DailyAttendanceRollup.objects.filter(date__range=(start, end))
+    if department_id:
+        rollups = rollups.filter(department_id=department_id)
+    return {
+        (row['date'], row['status']): row['n']
+        for row in rollups.order_by().values('date', 'status').annotate(n=Sum('count'))
+    }
+
+
+def monthly_counts(employee_ids, year, month):
+    """{employee_pk: MonthlyAttendanceRollup} for one month; employees without rows are missing"""
+    return {
+        rollup.employee_id: rollup
+        for rollup in MonthlyAttendanceRollup.objects.filter(employee_id__in=employee_ids, year=year, month=month)
+    }
+
+
+def employee_month(employee_id, year, month):
+    """Rollup for one employee-month, or an all-zero unsaved one"""
+    return monthly_counts([employee_id], year, month).get(employee_id) or MonthlyAttendanceRollup(
+        employee_id=employee_id, year=year, month=month,
+    )
@@ -0,0 +1,196 @@
+# attendance/shifts.py
+# Shift policies compiled into integer lookups for Attendance.update_status.
+#
+# Every policy becomes a CompiledShift of seconds-since-midnight thresholds,
+# and every assignment a (valid_from, valid_until, shifts) range per employee
+# or department, so evaluating a status is a dict lookup plus a few integer
+# comparisons. The table is built once per process and rebuilt when a shift
+# model changes here (signals) or it is older than ATTENDANCE_SHIFT_TABLE_MAX_AGE
+# seconds (changes made by other workers).
+
+import threading
+import time as clock
+from collections import namedtuple
+
+from django.conf import settings
+from django.utils import timezone
+
+DAY = 24 * 3600
+HALF_DAY = DAY // 2
+
+CompiledShift = namedtuple('CompiledShift', 'start late_after half_day full_day overnight')
+
+
+def _seconds(value):
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def compile_shift(start, end, grace_minutes, half_day_hours, full_day_hours):
+    return CompiledShift(
+        start=_seconds(start),
+        late_after=_seconds(start) + int(grace_minutes) * 60,
+        half_day=int(float(half_day_hours) * 3600),
+        full_day=int(float(full_day_hours) * 3600),
+        overnight=end <= start,
+    )
+
+
+def default_shift():
+    """The shift used when no assignment covers an employee (settings.ATTENDANCE_DEFAULT_SHIFT_*)"""
+    from datetime import time
+    start = time.fromisoformat(getattr(settings, 'ATTENDANCE_DEFAULT_SHIFT_START', '09:00'))
+    end = time.fromisoformat(getattr(settings, 'ATTENDANCE_DEFAULT_SHIFT_END', '17:00'))
+    return compile_shift(
+        start, end,
+        getattr(settings, 'ATTENDANCE_DEFAULT_GRACE_MINUTES', 30),
+        getattr(settings, 'ATTENDANCE_DEFAULT_HALF_DAY_HOURS', 4.0),
+        getattr(settings, 'ATTENDANCE_DEFAULT_FULL_DAY_HOURS', 8.0),
+    )
+
+
+def _offset(shift, seconds):
+    """Seconds after shift start; night-shift times past midnight count as the same shift"""
+    offset = seconds - shift.start
+    if shift.overnight and offset < -HALF_DAY:
+        offset += DAY
+    return offset
+
+
+def evaluate(shift, check_in, check_out, is_today, now_seconds):
+    """
+    Status for one day on a compiled shift. check_in/check_out/now_seconds are
+    seconds since local midnight (check_in/check_out may be None).
+    """
+    if check_in is None:
+        return 'ABSENT'
+    if is_today and _offset(shift, now_seconds) < 0:
+        # Before the shift starts nothing can be judged yet
+        return 'PRESENT'
+
+    if check_out is not None:
+        worked = check_out - check_in
+        if worked < 0:
+            worked += DAY
+    elif is_today:
+        worked = now_seconds - check_in
+        if worked < 0 and shift.overnight:
+            worked += DAY
+    else:
+        worked = None
+
+    if worked is not None and worked < shift.half_day:
+        return 'HALF_DAY'
+    if _offset(shift, check_in) > shift.late_after - shift.start:
+        return 'LATE'
+    return 'PRESENT'
+
+
+class ShiftTable:
+    """Compiled shifts plus per-employee and per-department assignment ranges"""
+
+    def __init__(self, default=None):
+        self.default = default or default_shift()
+        self.by_employee = {}
+        self.by_department = {}
+        self.departments = {}
+
+    def build(self):
+        from employees.models import Employee
+        from .models import ShiftAssignment, ShiftPolicy, ShiftRotationStep
+
+        compiled = {
+            pk: compile_shift(start, end, grace, half, full)
+            for pk, start, end, grace, half, full in ShiftPolicy.objects.filter(is_active=True).values_list(
+                'pk', 'start_time', 'end_time', 'grace_minutes', 'half_day_hours', 'full_day_hours',
+            )
+        }
+        steps = {}
+        for assignment_id, policy_id in ShiftRotationStep.objects.order_by('assignment_id', 'position').values_list(
+            'assignment_id', 'policy_id',
+        ):
+            steps.setdefault(assignment_id, []).append(compiled.get(policy_id))
+
+        rows = ShiftAssignment.objects.order_by('valid_from', 'pk').values_list(
+            'pk', 'employee_id', 'department_id', 'policy_id', 'valid_from', 'valid_until', 'days_per_step',
+        )
+        for pk, employee_id, department_id, policy_id, valid_from, valid_until, days_per_step in rows:
+            cycle = tuple(steps.get(pk) or [compiled.get(policy_id)])
+            if any(shift is None for shift in cycle):
+                continue  # inactive or missing policy: fall through to the next rule
+            target = self.by_employee.setdefault(employee_id, []) if employee_id \
+                else self.by_department.setdefault(department_id, [])
+            # Latest valid_from first so the first covering range wins
+            target.insert(0, (valid_from, valid_until, max(1, days_per_step), cycle))
+
+        if self.by_department:
+            self.departments = dict(
+                Employee.objects.filter(department_id__in=self.by_department).values_list('pk', 'department_id')
+            )
+        return self
+
+    @staticmethod
+    def _pick(ranges, day):
+        for valid_from, valid_until, days_per_step, cycle in ranges:
+            if valid_from <= day and (valid_until is None or day <= valid_until):
+                if len(cycle) == 1:
+                    return cycle[0]
+                return cycle[((day - valid_from).days // days_per_step) % len(cycle)]
+        return None
+
+    def shift_for(self, employee_pk, day):
+        shift = None
+        if employee_pk in self.by_employee:
+            shift = self._pick(self.by_employee[employee_pk], day)
+        if shift is None and employee_pk in self.departments:
+            shift = self._pick(self.by_department[self.departments[employee_pk]], day)
+        return shift or self.default
+
+    def status(self, attendance, now):
+        """Status of an Attendance row; now is an aware local datetime"""
+        shift = self.shift_for(attendance.employee_id, attendance.date)
+        return evaluate(
+            shift,
+            _seconds(attendance.check_in) if attendance.check_in else None,
+            _seconds(attendance.check_out) if attendance.check_out else None,
+            attendance.date == now.date(),
+            _seconds(now),
+        )
+
+
+_lock = threading.Lock()
+_table = None
+_built_at = None
+
+
+def get_shift_table():
+    """Process-wide ShiftTable, rebuilt when invalidated or older than ATTENDANCE_SHIFT_TABLE_MAX_AGE seconds"""
+    global _table, _built_at
+    max_age = getattr(settings, 'ATTENDANCE_SHIFT_TABLE_MAX_AGE', 300)
+    with _lock:
+        if _table is None or (max_age and clock.monotonic() - _built_at > max_age):
+            _table = ShiftTable().build()
+            _built_at = clock.monotonic()
+        return _table
+
+
+def invalidate_shift_table():
+    """Force a rebuild on the next lookup"""
+    global _table
+    with _lock:
+        _table = None
+
+
+def update_statuses(attendances, now=None):
+    """
+    Set .status on many Attendance instances in memory with one table lookup
+    and one clock read. Returns the instances whose status changed.
+    """
+    table = get_shift_table()
+    now = timezone.localtime(now)
+    changed = []
+    for attendance in attendances:
+        status = table.status(attendance, now)
+        if status != attendance.status:
+            attendance.status = status
+            changed.append(attendance)
+    return changed
@@ -0,0 +1,38 @@
+# attendance/signals.py
+# Keep this process's compiled shift table, the dashboard cache and the
+# attendance rollups in step with writes
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from employees.models import Employee
+from .dashboard import invalidate_dashboard_cache
+from .models import Attendance, ShiftAssignment, ShiftPolicy, ShiftRotationStep
+from .rollups import refresh_rollups
+from .shifts import invalidate_shift_table
+
+
+@receiver(post_save, sender=ShiftPolicy)
+@receiver(post_delete, sender=ShiftPolicy)
+@receiver(post_save, sender=ShiftAssignment)
+@receiver(post_delete, sender=ShiftAssignment)
+@receiver(post_save, sender=ShiftRotationStep)
+@receiver(post_delete, sender=ShiftRotationStep)
+def shifts_changed(sender, **kwargs):
+    invalidate_shift_table()
+
+
+@receiver(post_save, sender=Employee)
+def employee_department_changed(sender, instance, update_fields=None, **kwargs):
+    """Department shift assignments are resolved through the employee's department"""
+    if update_fields is None or 'department' in update_fields:
+        invalidate_shift_table()
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def attendance_changed(sender, instance, **kwargs):
+    refresh_rollups([(instance.employee_id, instance.date)])
+    # After commit, so a concurrent request cannot cache the pre-write state again
+    transaction.on_commit(invalidate_dashboard_cache)
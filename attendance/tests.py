@@ -1,3 +1,453 @@
-from django.test import TestCase
+import hashlib
+import shutil
+import tempfile
+from datetime import date, datetime, time, timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image, ImageEnhance
+
+from employees.models import Department, Employee
+from smart_hr_backend.dates import month_bounds, month_range
+from .events import fold_slots, project_attendance_events, record_attendance_event
+from .dashboard import get_dashboard
+from .shifts import get_shift_table, update_statuses
+from .image_hashing import dhash, find_near_duplicates, find_replays, hamming, record_fingerprint
+from .models import (
+    Attendance, AttendanceEvent, DailyAttendanceRollup, ImageFingerprint, MonthlyAttendanceRollup,
+    ShiftAssignment, ShiftPolicy, ShiftRotationStep,
+)
+from .reports import EXPORT_HEADER
+from .rollups import daily_status_counts, employee_month
+
+FACE_IMAGE = Path(settings.BASE_DIR) / 'media' / 'face_images' / 'face_temp_1761470253725.jpg'
+
+
+def _reencode(data, quality=60, brightness=1.0):
+    with Image.open(BytesIO(data)) as image:
+        image = ImageEnhance.Brightness(image.convert('RGB')).enhance(brightness)
+        buffer = BytesIO()
+        image.save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+class ImageHashingTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='hasher', password='pass')
+        self.employee = Employee.objects.create(user=user, employee_id='EMP400')
+        self.original = FACE_IMAGE.read_bytes()
+
+    def test_reencoded_frame_stays_within_a_few_bits(self):
+        self.assertLessEqual(hamming(dhash(self.original), dhash(_reencode(self.original, brightness=1.1))), 3)
+        other = (FACE_IMAGE.parent / 'face_temp_1761488166054.jpg').read_bytes()
+        self.assertGreater(hamming(dhash(self.original), dhash(other)), 3)
+
+    def test_lookup_finds_replay_through_band_index(self):
+        stored = record_fingerprint(dhash(self.original), self.employee, 'FACE', image_name='face.jpg')
+        probe = dhash(self.original) ^ (1 << 5) ^ (1 << 40)  # two flipped bits in different bands
+
+        found = find_near_duplicates(probe, max_distance=3)
+
+        self.assertEqual([(fp.pk, distance) for fp, distance in found], [(stored.pk, 2)])
+        self.assertEqual(find_near_duplicates(probe ^ 0xFFFF, max_distance=3), [])
+
+    def test_replays_are_the_same_employees_identical_or_nearly_identical_photos(self):
+        images = Path(settings.BASE_DIR) / 'media' / 'attendance_images'
+        first = (images / 'attendance_1761472368125.jpg').read_bytes()
+        retry = (images / 'attendance_1761472386589.jpg').read_bytes()
+        record_fingerprint(dhash(first), self.employee, 'CHECK_IN', digest=hashlib.sha256(first).hexdigest())
+        other = Employee.objects.create(user=User.objects.create_user(username='other', password='pass'), employee_id='EMP401')
+
+        # A genuine capture 18s later is 3 bits away
+        self.assertEqual(find_replays(self.employee, dhash(retry), hashlib.sha256(retry).hexdigest()), [])
+        self.assertEqual(len(find_replays(self.employee, dhash(first), hashlib.sha256(first).hexdigest())), 1)
+        self.assertEqual(len(find_replays(self.employee, dhash(first) ^ 1)), 1)
+        self.assertEqual(find_replays(other, dhash(first), hashlib.sha256(first).hexdigest()), [])
+
+        record_fingerprint(dhash(retry), self.employee, 'CHECK_IN', digest=hashlib.sha256(retry).hexdigest())
+        out = StringIO()
+        call_command('hash_media_images', workers=1, calibrate=True, stdout=out)
+        self.assertIn('min 3 bits', out.getvalue())
+
+    def test_backfill_hashes_stored_media_once(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=media_root):
+            self.employee.face_image.save('face.jpg', ContentFile(self.original))
+            attendance = Attendance(employee=self.employee, date=date(2025, 1, 6))
+            attendance.check_in_image.save('check_in.jpg', ContentFile(_reencode(self.original)))
+
+            call_command('hash_media_images', workers=2, batch_size=1, stdout=StringIO())
+            call_command('hash_media_images', workers=1, stdout=StringIO())
+
+        fingerprints = ImageFingerprint.objects.filter(employee=self.employee)
+        self.assertEqual(sorted(fingerprints.values_list('source', flat=True)), ['CHECK_IN', 'FACE'])
+        self.assertEqual(fingerprints.get(source='CHECK_IN').attendance, attendance)
+
+
+@override_settings(ATTENDANCE_PROJECTION_LAG=0)
+class AttendanceEventProjectionTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='tapper', password='pass')
+        self.employee = Employee.objects.create(user=user, employee_id='EMP410')
+
+    def _tap(self, hour, minute, **kwargs):
+        moment = timezone.make_aware(datetime(2025, 1, 6, hour, minute))
+        return record_attendance_event(self.employee, device_time=moment, **kwargs)
+
+    def test_out_of_order_taps_fold_to_first_in_and_last_out(self):
+        self._tap(12, 30)
+        self._tap(17, 40, kind='OUT')
+        self._tap(8, 55, face_verified=True)
+
+        self.assertEqual(project_attendance_events(), (3, 1))
+
+        attendance = Attendance.objects.get(employee=self.employee)
+        self.assertEqual((attendance.check_in, attendance.check_out), (time(8, 55), time(17, 40)))
+        self.assertEqual(attendance.status, 'PRESENT')
+        self.assertTrue(attendance.face_verified)
+
+    def test_projection_is_incremental_and_rebuildable(self):
+        self._tap(9, 0)
+        project_attendance_events()
+        self.assertEqual(project_attendance_events(), (0, 0))
+
+        self._tap(18, 0)
+        self.assertEqual(project_attendance_events(batch_size=1), (1, 1))
+        Attendance.objects.filter(employee=self.employee).update(check_in=time(11, 0), check_out=None)
+
+        call_command('project_attendance_events', rebuild=True, stdout=StringIO())
+
+        attendance = Attendance.objects.get(employee=self.employee)
+        self.assertEqual((attendance.check_in, attendance.check_out), (time(9, 0), time(18, 0)))
+        self.assertEqual(AttendanceEvent.objects.count(), 2)
+
+    def test_fold_racing_another_fold_upserts_the_row(self):
+        from unittest import mock
+
+        self._tap(9, 0)
+        fold_slots([(self.employee.pk, date(2025, 1, 6))])
+        self._tap(18, 0)
+        real = Attendance.objects.filter
+
+        def stale(*args, **kwargs):
+            # As if the first tap's row committed just after this fold read the slot
+            return Attendance.objects.none() if 'date__in' in kwargs else real(*args, **kwargs)
+
+        with mock.patch.object(Attendance.objects, 'filter', stale):
+            self.assertEqual(fold_slots([(self.employee.pk, date(2025, 1, 6))]), 1)
+
+        attendance = Attendance.objects.get(employee=self.employee)
+        self.assertEqual((attendance.check_in, attendance.check_out), (time(9, 0), time(18, 0)))
+
+
+class UpdateAttendanceStatusCommandTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='status', password='pass')
+        self.employee = Employee.objects.create(user=user, employee_id='EMP420')
+        for day, check_in, check_out in [(3, time(9, 0), time(17, 30)), (6, time(10, 0), time(18, 0)), (7, time(9, 0), time(11, 0))]:
+            Attendance.objects.create(employee=self.employee, date=date(2025, 1, day), check_in=check_in, check_out=check_out)
+        Attendance.objects.update(status='ABSENT')
+
+    def test_recomputes_only_the_requested_dates_in_batches(self):
+        out = StringIO()
+        call_command('update_attendance_status', since=date(2025, 1, 4), chunk_size=1, stdout=out)
+
+        statuses = dict(Attendance.objects.values_list('date__day', 'status'))
+        self.assertEqual(statuses, {3: 'ABSENT', 6: 'LATE', 7: 'HALF_DAY'})
+        self.assertIn('Updated 2 of 2 attendance records', out.getvalue())
+
+    def test_date_range_is_split_into_contiguous_shards(self):
+        from .management.commands.update_attendance_status import split_date_range
+
+        shards = split_date_range(date(2025, 1, 1), date(2025, 1, 10), 3)
+
+        self.assertEqual(shards[0][0], date(2025, 1, 1))
+        self.assertEqual(shards[-1][1], date(2025, 1, 10))
+        for (_, end), (start, _) in zip(shards, shards[1:]):
+            self.assertEqual(start - end, timedelta(days=1))
+        self.assertEqual(len(split_date_range(date(2025, 1, 1), date(2025, 1, 2), 8)), 2)
+
+
+class ShiftPolicyTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(name='Operations')
+        user = User.objects.create_user(username='shifter', password='pass')
+        self.employee = Employee.objects.create(user=user, employee_id='EMP430', department=self.department)
+        self.night = ShiftPolicy.objects.create(name='Night', start_time=time(22, 0), end_time=time(6, 0), grace_minutes=15)
+        self.early = ShiftPolicy.objects.create(name='Early', start_time=time(6, 0), end_time=time(14, 0), grace_minutes=10)
+
+    def _status(self, day, check_in, check_out=None):
+        attendance = Attendance(employee=self.employee, date=day, check_in=check_in, check_out=check_out)
+        update_statuses([attendance])
+        return attendance.status
+
+    def test_default_shift_matches_the_previous_hardcoded_rules(self):
+        day = date(2025, 1, 6)
+        self.assertEqual(self._status(day, time(9, 30), time(18, 0)), 'PRESENT')
+        self.assertEqual(self._status(day, time(9, 31), time(18, 0)), 'LATE')
+        self.assertEqual(self._status(day, time(9, 0), time(12, 0)), 'HALF_DAY')
+        self.assertEqual(self._status(day, None), 'ABSENT')
+
+    def test_employee_assignment_overrides_department_and_handles_night_shift(self):
+        ShiftAssignment.objects.create(department=self.department, policy=self.early, valid_from=date(2025, 1, 1))
+        day = date(2025, 1, 6)
+        self.assertEqual(self._status(day, time(6, 5), time(14, 0)), 'PRESENT')
+        self.assertEqual(self._status(day, time(9, 0), time(17, 0)), 'LATE')
+
+        ShiftAssignment.objects.create(employee=self.employee, policy=self.night, valid_from=date(2025, 1, 5))
+        self.assertEqual(self._status(day, time(21, 50), time(6, 0)), 'PRESENT')
+        # Past midnight is still the same night, so half an hour late
+        self.assertEqual(self._status(day, time(0, 30), time(6, 0)), 'LATE')
+        self.assertEqual(self._status(date(2025, 1, 4), time(6, 0), time(14, 0)), 'PRESENT')
+
+    def test_rotating_roster_cycles_through_steps(self):
+        roster = ShiftAssignment.objects.create(employee=self.employee, valid_from=date(2025, 1, 6), days_per_step=7)
+        ShiftRotationStep.objects.create(assignment=roster, position=0, policy=self.early)
+        ShiftRotationStep.objects.create(assignment=roster, position=1, policy=self.night)
+
+        table = get_shift_table()
+        self.assertEqual(table.shift_for(self.employee.pk, date(2025, 1, 12)).start, 6 * 3600)
+        self.assertEqual(table.shift_for(self.employee.pk, date(2025, 1, 13)).start, 22 * 3600)
+        self.assertEqual(table.shift_for(self.employee.pk, date(2025, 1, 20)).start, 6 * 3600)
+        self.assertEqual(table.shift_for(self.employee.pk, date(2025, 1, 5)).start, 9 * 3600)
+
+    def test_saving_runs_no_extra_queries_once_compiled(self):
+        get_shift_table()
+        attendance = Attendance(employee=self.employee, date=date(2025, 1, 6), check_in=time(9, 0), check_out=time(17, 0))
+        # The INSERT, then after commit the rollup refresh (employees still present,
+        # daily counts, cells and insert, monthly counts and upsert, each in a
+        # savepoint pair) and the payroll dirty mark; nothing for the shift rules
+        with self.assertNumQueries(12), self.captureOnCommitCallbacks(execute=True):
+            attendance.save()
+        self.assertEqual(attendance.status, 'PRESENT')
+
+
+class AttendanceDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+        self.employees = [
+            Employee.objects.create(user=User.objects.create_user(username=f'dash{i}', password='pass'), employee_id=f'EMP44{i}')
+            for i in range(4)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            for employee, check_in in zip(self.employees, [time(8, 50), time(10, 0), time(8, 55)]):
+                Attendance.objects.create(employee=employee, date=self.today, check_in=check_in)
+            Attendance.objects.create(employee=self.employees[0], date=self.today - timedelta(days=1))
+        get_shift_table()
+
+    def test_payload_takes_three_queries_then_comes_from_cache(self):
+        with self.assertNumQueries(3):
+            payload = get_dashboard(self.today)
+        statuses = [row.status for row in payload['today_attendance']]
+
+        self.assertEqual(payload['total_employees'], 4)
+        self.assertEqual(payload['absent_today'], 1)
+        self.assertEqual(
+            (payload['present_today'], payload['late_today'], payload['half_day_today']),
+            (statuses.count('PRESENT'), statuses.count('LATE'), statuses.count('HALF_DAY')),
+        )
+        self.assertEqual(payload['week_absent'][-2:], [1, 0])
+        self.assertEqual(len(payload['week_labels']), 7)
+        with self.assertNumQueries(0):
+            get_dashboard(self.today)
+
+    def test_attendance_writes_drop_the_cached_payload(self):
+        get_dashboard(self.today)
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(employee=self.employees[3], date=self.today, check_in=time(9, 0))
+
+        self.assertEqual(get_dashboard(self.today)['absent_today'], 0)
+
+        self.client.force_login(User.objects.create_user(username='viewer', password='pass', is_staff=True))
+        resp = self.client.get('/attendance/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['total_employees'], 4)
+
+
+class MonthlySummaryTests(TestCase):
+    def setUp(self):
+        self.sales = Department.objects.create(name='Sales')
+        self.employees = []
+        for i in range(5):
+            user = User.objects.create_user(username=f'sum{i}', password='pass', first_name=f'Name{i}')
+            self.employees.append(Employee.objects.create(
+                user=user, employee_id=f'EMP45{i}', department=self.sales if i < 2 else None,
+            ))
+        for employee in self.employees:
+            Attendance.objects.create(employee=employee, date=date(2025, 1, 31), check_in=time(9, 0), check_out=time(17, 0))
+            Attendance.objects.create(employee=employee, date=date(2025, 2, 3), check_in=time(10, 0), check_out=time(18, 0))
+        Attendance.objects.create(employee=self.employees[0], date=date(2025, 2, 4))
+        self.client.force_login(User.objects.create_user(username='hr', password='pass', is_staff=True))
+
+    def test_range_summary_is_paginated_in_constant_queries(self):
+        # Session and user lookups plus the session save (5), then the page count,
+        # the page itself and the department list
+        with self.assertNumQueries(8):
+            resp = self.client.get('/attendance/monthly-summary/', {
+                'start': '2025-01-01', 'end': '2025-02-28', 'page_size': 2, 'page': 1,
+            })
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['page_obj'].paginator.count, 5)
+        first = resp.context['summary_data'][0]
+        self.assertEqual(first['employee'], self.employees[0])
+        self.assertEqual((first['present'], first['late'], first['absent']), (1, 1, 1))
+
+    def test_month_and_department_filter(self):
+        resp = self.client.get('/attendance/monthly-summary/', {'month': 2, 'year': 2025, 'department': self.sales.pk})
+
+        rows = resp.context['summary_data']
+        self.assertEqual([row['employee'].employee_id for row in rows], ['EMP450', 'EMP451'])
+        self.assertEqual([(row['present'], row['late']) for row in rows], [(0, 1), (0, 1)])
+
+    def test_csv_export_streams_the_whole_summary(self):
+        resp = self.client.get('/attendance/monthly-summary/', {'month': 1, 'year': 2025, 'page_size': 1, 'format': 'csv'})
+
+        self.assertTrue(resp.streaming)
+        lines = b''.join(resp.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'Employee ID,Name,Department,Present,Absent,Late,Half Day,Attendance %')
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(lines[1], 'EMP450,Name0,Sales,1,0,0,0,100')
+
+    def test_xlsx_export_has_the_csv_rows(self):
+        from openpyxl import load_workbook
+
+        resp = self.client.get('/attendance/monthly-summary/', {'month': 1, 'year': 2025, 'format': 'xlsx'})
+
+        self.assertEqual(resp['Content-Type'], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        self.assertIn('attendance_summary_20250101_20250131.xlsx', resp['Content-Disposition'])
+        sheet = load_workbook(BytesIO(b''.join(resp.streaming_content)), read_only=True)['Attendance']
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(list(rows[0]), EXPORT_HEADER)
+        self.assertEqual(list(rows[1]), ['EMP450', 'Name0', 'Sales', 1, 0, 0, 0, 100])
+        self.assertEqual(len(rows), 6)
+
+
+class AttendanceRollupTests(TestCase):
+    def setUp(self):
+        self.sales = Department.objects.create(name='Sales')
+        self.employees = [
+            Employee.objects.create(
+                user=User.objects.create_user(username=f'roll{i}', password='pass'),
+                employee_id=f'EMP46{i}', department=self.sales if i == 0 else None,
+            )
+            for i in range(3)
+        ]
+        self.day = date(2025, 3, 3)
+        get_shift_table()
+
+    def _snapshot(self):
+        return (
+            sorted(DailyAttendanceRollup.objects.values_list('date', 'department_id', 'status', 'count')),
+            sorted(MonthlyAttendanceRollup.objects.values_list(
+                'employee_id', 'year', 'month', 'present', 'late', 'absent', 'half_day',
+            )),
+        )
+
+    def test_saves_and_deletes_refresh_the_touched_cells_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            row = Attendance.objects.create(employee=self.employees[0], date=self.day, check_in=time(9, 0), check_out=time(17, 0))
+            Attendance.objects.create(employee=self.employees[1], date=self.day, check_in=time(10, 0), check_out=time(18, 0))
+            self.assertEqual(daily_status_counts(self.day, self.day), {})
+        self.assertEqual(daily_status_counts(self.day, self.day), {(self.day, 'PRESENT'): 1, (self.day, 'LATE'): 1})
+        self.assertEqual(daily_status_counts(self.day, self.day, self.sales.pk), {(self.day, 'PRESENT'): 1})
+
+        row.check_in = time(9, 45)
+        with self.captureOnCommitCallbacks(execute=True):
+            row.save()
+        self.assertEqual(daily_status_counts(self.day, self.day), {(self.day, 'LATE'): 2})
+        self.assertEqual(employee_month(self.employees[0].pk, 2025, 3).late, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            row.delete()
+        self.assertEqual(daily_status_counts(self.day, self.day), {(self.day, 'LATE'): 1})
+        self.assertEqual(employee_month(self.employees[0].pk, 2025, 3).days_worked, 0)
+        self.assertEqual(DailyAttendanceRollup.objects.count(), 1)
+
+    def test_deleting_an_employee_with_attendance_drops_their_rollups(self):
+        from salary.models import PayrollDirtyMonth
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for employee in self.employees[:2]:
+                Attendance.objects.create(employee=employee, date=self.day, check_in=time(9, 0))
+        PayrollDirtyMonth.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employees[0].delete()
+            self.employees[1].user.delete()
+        connection.check_constraints()
+
+        self.assertEqual(self._snapshot(), ([], []))
+        self.assertFalse(PayrollDirtyMonth.objects.exists())
+
+    def test_rebuild_command_matches_incremental_maintenance(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for offset, employee in enumerate(self.employees):
+                Attendance.objects.create(employee=employee, date=self.day - timedelta(days=offset * 3), check_in=time(9, 0))
+            Attendance.objects.create(employee=self.employees[2], date=date(2025, 2, 27))
+            # bulk_update sends no signals, so these rows drift until someone refreshes them
+            Attendance.objects.filter(employee=self.employees[1]).update(status='HALF_DAY')
+            call_command('update_attendance_status', date_range='2025-02-01:2025-03-31', stdout=StringIO())
+        incremental = self._snapshot()
+
+        DailyAttendanceRollup.objects.all().delete()
+        MonthlyAttendanceRollup.objects.all().delete()
+        call_command('rebuild_attendance_rollups', chunk_days=2, stdout=StringIO())
+        self.assertEqual(self._snapshot(), incremental)
+        self.assertEqual(employee_month(self.employees[2].pk, 2025, 2).absent, 1)
+
+    def test_migration_backfills_what_the_rebuild_computes(self):
+        from importlib import import_module
+        from django.apps import apps
+
+        migration = import_module('attendance.migrations.0006_attendance_rollups')
+        with self.captureOnCommitCallbacks(execute=True):
+            for offset, employee in enumerate(self.employees):
+                Attendance.objects.create(employee=employee, date=self.day - timedelta(days=offset * 3), check_in=time(9, 0))
+            Attendance.objects.create(employee=self.employees[0], date=date(2025, 2, 27))
+        rebuilt = self._snapshot()
+        DailyAttendanceRollup.objects.all().delete()
+        MonthlyAttendanceRollup.objects.all().delete()
+
+        migration.backfill_rollups(apps, None)
+        self.assertEqual(self._snapshot(), rebuilt)
+
+    def test_monthly_salary_reads_the_rollup(self):
+        from salary.utils import calculate_monthly_salary
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(employee=self.employees[0], date=self.day)
+        with self.assertNumQueries(2):
+            salary = calculate_monthly_salary(self.employees[0], 3, 2025)
+        self.assertEqual(salary['days_absent'], 1)
+
+
+class MonthRangeTests(TestCase):
+    def setUp(self):
+        self.employee = Employee.objects.create(user=User.objects.create_user(username='ranger', password='pass'), employee_id='EMP471')
+        for day in [date(2024, 12, 31), date(2025, 1, 1), date(2025, 1, 31), date(2025, 2, 1)]:
+            Attendance.objects.create(employee=self.employee, date=day)
+
+    def test_bounds_are_half_open_and_roll_over_the_year(self):
+        self.assertEqual(month_bounds(2024, 12), (date(2024, 12, 1), date(2025, 1, 1)))
+        self.assertEqual(month_bounds('2025', '1'), (date(2025, 1, 1), date(2025, 2, 1)))
+        days = Attendance.objects.filter(employee=self.employee, **month_range('date', 2025, 1)).values_list('date', flat=True)
+        self.assertEqual(sorted(days), [date(2025, 1, 1), date(2025, 1, 31)])
+
+    def test_month_filters_seek_the_employee_date_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('plan assertions are written against SQLite EXPLAIN QUERY PLAN output')
+        plan = Attendance.objects.filter(employee=self.employee, **month_range('date', 2025, 1)).explain()
+        self.assertIn('(employee_id=? AND date>? AND date<?)', plan)
+        plan = Attendance.objects.filter(**month_range('date', 2025, 1)).order_by().values('status').explain()
+        self.assertIn('USING COVERING INDEX attendance_date_status_idx (date>? AND date<?)', plan)
@@ -1,26 +1,20 @@
 # Create this file: attendance/utils.py
 
-import face_recognition
-import numpy as np
-from PIL import Image
-from io import BytesIO
+from employees.face_backends import get_face_backend
 
 
 def encode_face_from_file(image_file):
     """
-    Generate face encoding from uploaded image file
+    Generate face encoding from uploaded image file (path, bytes, file-like or UploadedFile)
     Returns: face encoding as list or None if no face found
     """
     try:
-        # Load image
-        image = face_recognition.load_image_file(image_file)
+        # The configured backend decides how faces are detected and encoded
+        encoding = get_face_backend().encode(image_file)
         
-        # Get face encodings
-        encodings = face_recognition.face_encodings(image)
-        
-        if encodings:
+        if encoding is not None:
             # Return the first face encoding as a list
-            return encodings[0].tolist()
+            return encoding.tolist()
         else:
             return None
     except Exception as e:
@@ -28,42 +22,34 @@ def encode_face_from_file(image_file):
         return None
 
 
-def verify_face_match(known_encoding_str, image_file, tolerance=0.6):
+def verify_face_match(known_encoding_str, image_file, tolerance=None):
     """
     Verify if the face in the image matches the known encoding
     
     Args:
         known_encoding_str: String representation of known face encoding
-        image_file: Uploaded image file
-        tolerance: How much distance between faces to consider a match (lower is more strict)
+        image_file: Uploaded image file, path or raw bytes (decoded in memory)
+        tolerance: Similarity a match must exceed (defaults to the descriptor's tolerance)
     
     Returns: (is_match: bool, confidence: float)
     """
     try:
-        # Convert string encoding back to numpy array
+        # Parse the stored JSON encoding
         import json
-        known_encoding = np.array(json.loads(known_encoding_str))
-        
-        # Load the image to verify
-        image = face_recognition.load_image_file(image_file)
+        known_encoding = json.loads(known_encoding_str)
         
-        # Find face encodings in the image
-        unknown_encodings = face_recognition.face_encodings(image)
+        # JSON encodings written before descriptors existed are raw 100x100 pixel vectors
+        descriptor = 'raw' if len(known_encoding) == 100 * 100 else None
+        if tolerance is None:
+            from employees.face_recognition_utils import match_tolerance
+            tolerance = match_tolerance(descriptor)
         
-        if not unknown_encodings:
+        is_match, score = get_face_backend().verify(known_encoding, image_file, tolerance, descriptor=descriptor)
+        if score is None:
             return False, 0.0
         
-        # Compare faces
-        unknown_encoding = unknown_encodings[0]
-        results = face_recognition.compare_faces([known_encoding], unknown_encoding, tolerance=tolerance)
-        
-        # Calculate face distance (lower = more similar)
-        face_distance = face_recognition.face_distance([known_encoding], unknown_encoding)[0]
-        
-        # Convert distance to confidence percentage
-        confidence = (1 - face_distance) * 100
-        
-        return results[0], confidence
+        # Convert similarity to confidence percentage
+        return is_match, score * 100
         
     except Exception as e:
         print(f"Error verifying face: {str(e)}")
@@ -76,9 +62,8 @@ def detect_faces_count(image_file):
     Returns: number of faces detected
     """
     try:
-        image = face_recognition.load_image_file(image_file)
-        face_locations = face_recognition.face_locations(image)
-        return len(face_locations)
+        # Detection only needs the reduced-resolution decode
+        return len(get_face_backend().detect(image_file))
     except:
         return 0
 
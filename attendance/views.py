@@ -4,146 +4,118 @@ from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
-from django.db.models import Q, Count
-from datetime import datetime, timedelta
+from datetime import datetime
+from .dashboard import build_dashboard, get_dashboard
+from .rollups import employee_month
 from .models import Attendance
 from employees.models import Employee
+from smart_hr_backend.dates import month_range
 import json
 from types import SimpleNamespace
 from django.db import connection
-from decimal import InvalidOperation
 
-@login_required
-def attendance_dashboard(request):
-    """Display attendance dashboard with today's statistics"""
-    today = timezone.now().date()
-    try:
-        # Primary attempt: use ORM (fast, convenient)
-        today_qs = Attendance.objects.filter(date=today).select_related('employee__user', 'employee__department')
 
-        # Force evaluation now so any DB conversion errors are raised inside this try block
-        today_attendance = list(today_qs)
+def _raw_today_rows(today):
+    """
+    Today's rows as lightweight objects built from raw SQL, for when DB
+    converters (e.g. Decimal.InvalidOperation) raise while the ORM hydrates rows
+    """
+    # Raw fetch attendance rows joined to employee and department names
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT a.id, a.employee_id, e.employee_id as emp_code, u.first_name, u.last_name,
+                   d.name as dept_name, a.check_in, a.check_out, a.status
+            FROM attendance_attendance a
+            LEFT JOIN employees_employee e ON e.id = a.employee_id
+            LEFT JOIN auth_user u ON u.id = e.user_id
+            LEFT JOIN employees_department d ON d.id = e.department_id
+            WHERE a.date = %s
+            ORDER BY a.check_in DESC
+        """, [today])
+        rows = cursor.fetchall()
 
-        # Today's statistics (compute from the in-memory list)
-        total_employees = Employee.objects.filter(is_active=True).count()
-        present_today = sum(1 for r in today_attendance if getattr(r, 'status', None) == 'PRESENT')
-        absent_today = total_employees - len(today_attendance)
-        late_today = sum(1 for r in today_attendance if getattr(r, 'status', None) == 'LATE')
-        half_day_today = sum(1 for r in today_attendance if getattr(r, 'status', None) == 'HALF_DAY')
-    except Exception as exc:
-        # Defensive fallback: if DB converters (e.g. Decimal.InvalidOperation) raise while ORM hydrates rows,
-        # build a lightweight, safe structure using raw SQL and avoid Django field converters.
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.exception('ORM attendance load failed; using raw fallback: %s', exc)
+    today_attendance = []
 
-        # Raw fetch attendance rows joined to employee and department names
-        with connection.cursor() as cursor:
-            cursor.execute("""
-                SELECT a.id, a.employee_id, e.employee_id as emp_code, u.first_name, u.last_name,
-                       d.name as dept_name, a.check_in, a.check_out, a.status
-                FROM attendance_attendance a
-                LEFT JOIN employees_employee e ON e.id = a.employee_id
-                LEFT JOIN auth_user u ON u.id = e.user_id
-                LEFT JOIN employees_department d ON d.id = e.department_id
-                WHERE a.date = %s
-                ORDER BY a.check_in DESC
-            """, [today])
-            rows = cursor.fetchall()
+    for r in rows:
+        aid, emp_fk, emp_code, first_name, last_name, dept_name, check_in, check_out, status = r
 
-        today_attendance = []
-        present_today = 0
-        late_today = 0
-        half_day_today = 0
-
-        for r in rows:
-            aid, emp_fk, emp_code, first_name, last_name, dept_name, check_in, check_out, status = r
-
-            # Build nested employee.user.get_full_name callable for template compatibility
-            full_name = ' '.join(filter(None, [first_name, last_name])) if first_name or last_name else emp_code or ''
-            user_obj = SimpleNamespace(**{
-                'get_full_name': (lambda name=full_name: (lambda: name))()
-            })
+        # Build nested employee.user.get_full_name callable for template compatibility
+        full_name = ' '.join(filter(None, [first_name, last_name])) if first_name or last_name else emp_code or ''
+        user_obj = SimpleNamespace(**{
+            'get_full_name': (lambda name=full_name: (lambda: name))()
+        })
 
-            employee_obj = SimpleNamespace(**{
-                'employee_id': emp_code,
-                'user': user_obj,
-                'department': SimpleNamespace(name=dept_name) if dept_name else None
-            })
+        employee_obj = SimpleNamespace(**{
+            'employee_id': emp_code,
+            'user': user_obj,
+            'department': SimpleNamespace(name=dept_name) if dept_name else None
+        })
 
-            # compute hours worked (float hours) if both times present
-            hours = None
-            try:
-                if check_in and check_out:
-                    # cursor returns strings for time columns; parse as HH:MM[:SS]
-                    fmt = '%H:%M:%S' if len(str(check_in)) > 5 else '%H:%M'
+        # compute hours worked (float hours) if both times present
+        hours = None
+        try:
+            if check_in and check_out:
+                # cursor returns strings for time columns; parse as HH:MM[:SS]
+                fmt = '%H:%M:%S' if len(str(check_in)) > 5 else '%H:%M'
+                try:
+                    cin = datetime.strptime(str(check_in), '%H:%M:%S').time()
+                    cout = datetime.strptime(str(check_out), '%H:%M:%S').time()
+                except Exception:
                     try:
-                        cin = datetime.strptime(str(check_in), '%H:%M:%S').time()
-                        cout = datetime.strptime(str(check_out), '%H:%M:%S').time()
+                        cin = datetime.strptime(str(check_in), '%H:%M').time()
+                        cout = datetime.strptime(str(check_out), '%H:%M').time()
                     except Exception:
-                        try:
-                            cin = datetime.strptime(str(check_in), '%H:%M').time()
-                            cout = datetime.strptime(str(check_out), '%H:%M').time()
-                        except Exception:
-                            cin = None
-                            cout = None
+                        cin = None
+                        cout = None
 
-                    if cin and cout:
-                        dt_in = datetime.combine(today, cin)
-                        dt_out = datetime.combine(today, cout)
-                        delta = dt_out - dt_in
-                        hours = delta.total_seconds() / 3600.0
-            except Exception:
-                hours = None
+                if cin and cout:
+                    dt_in = datetime.combine(today, cin)
+                    dt_out = datetime.combine(today, cout)
+                    delta = dt_out - dt_in
+                    hours = delta.total_seconds() / 3600.0
+        except Exception:
+            hours = None
 
-            record = SimpleNamespace(**{
-                'id': aid,
-                'employee': employee_obj,
-                'check_in': check_in,
-                'check_out': check_out,
-                'status': status,
-                'get_hours_worked': hours
-            })
+        record = SimpleNamespace(**{
+            'id': aid,
+            'employee': employee_obj,
+            'check_in': check_in,
+            'check_out': check_out,
+            'status': status,
+            'get_hours_worked': hours
+        })
 
-            today_attendance.append(record)
+        today_attendance.append(record)
 
-            if status == 'PRESENT':
-                present_today += 1
-            if status == 'LATE':
-                late_today += 1
-            if status == 'HALF_DAY':
-                half_day_today += 1
+    return today_attendance
+
+
+@login_required
+def attendance_dashboard(request):
+    """Display attendance dashboard with today's statistics"""
+    today = timezone.localdate()
+    try:
+        # Three queries (counts, weekly trend, today's rows), cached briefly
+        payload = get_dashboard(today)
+    except Exception as exc:
+        # Defensive fallback: if DB converters (e.g. Decimal.InvalidOperation) raise while ORM hydrates rows,
+        # build a lightweight, safe structure using raw SQL and avoid Django field converters.
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.exception('ORM attendance load failed; using raw fallback: %s', exc)
+        payload = build_dashboard(today, rows=_raw_today_rows(today))
 
-        # total_employees should avoid hydrating Employee objects; use count() only
-        try:
-            total_employees = Employee.objects.filter(is_active=True).count()
-        except Exception:
-            total_employees = 0
-        absent_today = total_employees - len(today_attendance)
-    
-    # Weekly data for charts (last 7 days)
-    week_labels = []
-    week_present = []
-    week_absent = []
-    
-    for i in range(6, -1, -1):
-        day = today - timedelta(days=i)
-        week_labels.append(day.strftime('%a'))
-        daily_attendance = Attendance.objects.filter(date=day)
-        week_present.append(daily_attendance.filter(status='PRESENT').count())
-        week_absent.append(daily_attendance.filter(status='ABSENT').count())
-    
     context = {
-        'today_attendance': today_attendance,
+        'today_attendance': payload['today_attendance'],
         'current_date': today,
-        'total_employees': total_employees,
-        'present_today': present_today,
-        'absent_today': absent_today,
-        'late_today': late_today,
-        'half_day_today': half_day_today,
-        'week_labels': json.dumps(week_labels),
-        'week_present': json.dumps(week_present),
-        'week_absent': json.dumps(week_absent),
+        'total_employees': payload['total_employees'],
+        'present_today': payload['present_today'],
+        'absent_today': payload['absent_today'],
+        'late_today': payload['late_today'],
+        'half_day_today': payload['half_day_today'],
+        'week_labels': json.dumps(payload['week_labels']),
+        'week_present': json.dumps(payload['week_present']),
+        'week_absent': json.dumps(payload['week_absent']),
     }
     return render(request, 'attendance/dashboard.html', context)
 
@@ -203,15 +175,11 @@ def attendance_report(request, employee_id):
     
     attendances = Attendance.objects.filter(
         employee=employee,
-        date__month=month,
-        date__year=year
+        **month_range('date', year, month)
     ).order_by('date')
     
-    # Calculate statistics
-    total_present = attendances.filter(status='PRESENT').count()
-    total_absent = attendances.filter(status='ABSENT').count()
-    total_late = attendances.filter(status='LATE').count()
-    total_half_day = attendances.filter(status='HALF_DAY').count()
+    # Statistics come from the monthly rollup
+    rollup = employee_month(employee.pk, year, month)
     
     context = {
         'employee': employee,
@@ -219,40 +187,82 @@ def attendance_report(request, employee_id):
         'month': month,
         'year': year,
         'years': [2023, 2024, 2025, 2026],
-        'total_present': total_present,
-        'total_absent': total_absent,
-        'total_late': total_late,
-        'total_half_day': total_half_day,
+        'total_present': rollup.present,
+        'total_absent': rollup.absent,
+        'total_late': rollup.late,
+        'total_half_day': rollup.half_day,
     }
     return render(request, 'attendance/report.html', context)
 
 @login_required
 def attendance_monthly_summary(request):
-    """Display monthly attendance summary for all employees"""
-    month = int(request.GET.get('month', timezone.now().month))
-    year = int(request.GET.get('year', timezone.now().year))
-    
-    employees = Employee.objects.filter(is_active=True).select_related('user', 'department')
-    
-    summary_data = []
-    for employee in employees:
-        attendances = Attendance.objects.filter(
-            employee=employee,
-            date__month=month,
-            date__year=year
-        )
-        
-        summary_data.append({
+    """
+    Attendance summary for all employees over a month (month/year) or any
+    range (start/end, YYYY-MM-DD), filterable by department and paginated.
+    ?format=csv or ?format=xlsx exports the whole filtered summary.
+    """
+    import calendar
+    from django.core.paginator import Paginator
+    from django.http import HttpResponseBadRequest
+    from employees.models import Department
+    from .reports import csv_response, summary_employees, summary_queryset, xlsx_response
+
+    try:
+        month = int(request.GET.get('month', timezone.localdate().month))
+        year = int(request.GET.get('year', timezone.localdate().year))
+        if request.GET.get('start') and request.GET.get('end'):
+            start = datetime.strptime(request.GET['start'], '%Y-%m-%d').date()
+            end = datetime.strptime(request.GET['end'], '%Y-%m-%d').date()
+        else:
+            start = datetime(year, month, 1).date()
+            end = start.replace(day=calendar.monthrange(year, month)[1])
+        department_id = int(request.GET['department']) if request.GET.get('department') else None
+        page_size = max(1, min(int(request.GET.get('page_size', 50)), 500))
+    except ValueError:
+        return HttpResponseBadRequest('Invalid period, department or page size')
+    if start > end:
+        return HttpResponseBadRequest('start must not be after end')
+
+    summary = summary_queryset(start, end, department_id)
+
+    export = request.GET.get('format')
+    filename = f'attendance_summary_{start:%Y%m%d}_{end:%Y%m%d}'
+    if export == 'csv':
+        return csv_response(summary, f'{filename}.csv')
+    if export == 'xlsx':
+        return xlsx_response(summary, f'{filename}.xlsx')
+
+    paginator = Paginator(summary, page_size)
+    # Counting the plain employee filter skips the attendance join and GROUP BY
+    paginator.count = summary_employees(department_id).count()
+    page = paginator.get_page(request.GET.get('page'))
+    summary_data = [
+        {
             'employee': employee,
-            'present': attendances.filter(status='PRESENT').count(),
-            'absent': attendances.filter(status='ABSENT').count(),
-            'late': attendances.filter(status='LATE').count(),
-        })
-    
+            'present': employee.present,
+            'absent': employee.absent,
+            'late': employee.late,
+            'half_day': employee.half_day,
+        }
+        for employee in page
+    ]
+
+    # Links keep the current filters and only swap the page or format
+    params = request.GET.copy()
+    params.pop('page', None)
+    params.pop('format', None)
+
     context = {
         'summary_data': summary_data,
+        'page_obj': page,
         'month': month,
         'year': year,
+        'start': start,
+        'end': end,
+        'custom_range': bool(request.GET.get('start') and request.GET.get('end')),
+        'departments': Department.objects.all(),
+        'department_id': department_id,
+        'query_string': params.urlencode(),
     }
     return render(request, 'attendance/monthly_summary.html', context)
 
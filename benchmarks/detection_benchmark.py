@@ -0,0 +1,120 @@
+"""
+Detection benchmark: full-resolution face_locations vs the downscale-then-detect pipeline
+
+Replays every image in the given directories through both paths and reports
+per-image latency and how well the downscaled boxes agree with the
+full-resolution ones (recall at IoU >= 0.5 and mean IoU).
+
+Usage:
+    python benchmarks/detection_benchmark.py
+    python benchmarks/detection_benchmark.py --max-dimension 480 --repeat 5 media/attendance_images
+    python benchmarks/detection_benchmark.py --json bench_output.txt
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import face_recognition  # noqa: E402
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.bmp'}
+DEFAULT_DIRS = [ROOT / 'media' / 'attendance_images', ROOT / 'media' / 'face_images']
+
+
+def iou(a, b):
+    """Intersection over union of two (top, right, bottom, left) boxes"""
+    top, right = max(a[0], b[0]), min(a[1], b[1])
+    bottom, left = min(a[2], b[2]), max(a[3], b[3])
+    inter = max(0, right - left) * max(0, bottom - top)
+    area_a = (a[1] - a[3]) * (a[2] - a[0])
+    area_b = (b[1] - b[3]) * (b[2] - b[0])
+    union = area_a + area_b - inter
+    return inter / union if union else 0.0
+
+
+def best_ious(reference, candidate):
+    """For each reference box, the IoU of the best matching candidate box"""
+    return [max((iou(ref, box) for box in candidate), default=0.0) for ref in reference]
+
+
+def timed(func, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def collect_images(dirs):
+    for directory in dirs:
+        for path in sorted(Path(directory).glob('*')):
+            if path.suffix.lower() in IMAGE_SUFFIXES:
+                yield path
+
+
+def run(dirs, max_dimension, repeat):
+    face_recognition.warm_detector_pool()
+    rows = []
+    for path in collect_images(dirs):
+        full, full_ms = timed(
+            lambda: face_recognition.face_locations(face_recognition.load_image_file(path), max_dimension=0),
+            repeat,
+        )
+        fast, fast_ms = timed(lambda: face_recognition.detect_faces_in_file(path, max_dimension=max_dimension), repeat)
+        ious = best_ious(full, fast)
+        rows.append({
+            'image': str(path.relative_to(ROOT) if path.is_relative_to(ROOT) else path),
+            'faces_full': len(full),
+            'faces_downscaled': len(fast),
+            'full_ms': round(full_ms, 2),
+            'downscaled_ms': round(fast_ms, 2),
+            'mean_iou': round(statistics.mean(ious), 3) if ious else None,
+            'matched': sum(1 for value in ious if value >= 0.5),
+        })
+
+    reference_faces = sum(r['faces_full'] for r in rows)
+    summary = {
+        'images': len(rows),
+        'max_dimension': max_dimension,
+        'repeat': repeat,
+        'full_ms_total': round(sum(r['full_ms'] for r in rows), 2),
+        'downscaled_ms_total': round(sum(r['downscaled_ms'] for r in rows), 2),
+        'recall_iou_0_5': round(sum(r['matched'] for r in rows) / reference_faces, 3) if reference_faces else None,
+        'extra_detections': sum(max(0, r['faces_downscaled'] - r['faces_full']) for r in rows),
+    }
+    if summary['downscaled_ms_total']:
+        summary['speedup'] = round(summary['full_ms_total'] / summary['downscaled_ms_total'], 2)
+    return {'summary': summary, 'images': rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('dirs', nargs='*', default=DEFAULT_DIRS, help='Directories of images to replay')
+    parser.add_argument('--max-dimension', type=int, default=face_recognition.DETECTION_MAX_DIMENSION)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per image; the median is reported')
+    parser.add_argument('--json', dest='json_path', help='Also write the results as JSON to this file')
+    args = parser.parse_args()
+
+    results = run(args.dirs, args.max_dimension, max(1, args.repeat))
+
+    print(f"{'image':60} {'faces':>7} {'full ms':>9} {'down ms':>9} {'IoU':>6}")
+    for row in results['images']:
+        faces = f"{row['faces_full']}/{row['faces_downscaled']}"
+        mean_iou = '-' if row['mean_iou'] is None else f"{row['mean_iou']:.3f}"
+        print(f"{row['image'][-60:]:60} {faces:>7} {row['full_ms']:>9.1f} {row['downscaled_ms']:>9.1f} {mean_iou:>6}")
+    print(json.dumps(results['summary'], indent=2))
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+"""
+Face verification benchmark: per-stage latency, throughput, memory and FAR/FRR
+
+Every image in the given directories becomes one identity: the original is
+enrolled and synthetic augmentations of it (lighting, blur, rotation, scale,
+noise, JPEG quality) are the genuine probes; probes of every other identity
+are impostors. Pass --labels with a JSON {"file name": "person"} map when
+several files show the same person.
+
+Backends:
+    face_recognition:<descriptor>   face_recognition.py with each available descriptor
+    face_recognition_opencv         the legacy FaceRecognition class (template correlation)
+
+Reported per backend: decode/detect/encode/compare latency percentiles and
+FAR/FRR across tolerances (with the equal error rate). Throughput of the
+check-in path (face_recognition.face_encodings_from_file + compare) is
+measured at 1..N threads, and peak RSS for the whole run.
+
+Usage:
+    python benchmarks/face_benchmark.py
+    python benchmarks/face_benchmark.py --augmentations 4 --workers 4 media/face_images
+    python benchmarks/face_benchmark.py --json bench_output.txt
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+import face_descriptors  # noqa: E402
+import face_recognition  # noqa: E402
+import face_recognition_opencv  # noqa: E402
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.bmp'}
+DEFAULT_DIRS = [ROOT / 'media' / 'face_images', ROOT / 'media' / 'attendance_images']
+# Fine steps near 1.0, where compact descriptors put most of their scores
+TOLERANCES = [round(float(t), 3) for t in np.concatenate([np.arange(0.30, 0.90, 0.02), np.arange(0.90, 1.0, 0.0025)])]
+
+
+def _rotate(image, degrees):
+    height, width = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), degrees, 1.0)
+    return cv2.warpAffine(image, matrix, (width, height), borderMode=cv2.BORDER_REFLECT)
+
+
+def _noise(image, sigma, rng):
+    return np.clip(image + rng.normal(0, sigma, image.shape), 0, 255).astype(np.uint8)
+
+
+def _scale(image, factor):
+    height, width = image.shape[:2]
+    return cv2.resize(image, (max(1, int(width * factor)), max(1, int(height * factor))), interpolation=cv2.INTER_AREA)
+
+
+# (name, function(image, rng) -> image, JPEG quality of the re-encoded probe)
+AUGMENTATIONS = [
+    ('brighter', lambda img, rng: cv2.convertScaleAbs(img, alpha=1.0, beta=35), 90),
+    ('darker', lambda img, rng: cv2.convertScaleAbs(img, alpha=1.0, beta=-35), 90),
+    ('blur', lambda img, rng: cv2.GaussianBlur(img, (5, 5), 0), 90),
+    ('rotate', lambda img, rng: _rotate(img, 8), 90),
+    ('smaller', lambda img, rng: _scale(img, 0.6), 90),
+    ('noise', lambda img, rng: _noise(img, 8, rng), 90),
+    ('low_contrast', lambda img, rng: cv2.convertScaleAbs(img, alpha=0.7, beta=30), 90),
+    ('jpeg_q40', lambda img, rng: img, 40),
+]
+
+
+def collect_images(dirs):
+    for directory in dirs:
+        for path in sorted(Path(directory).glob('*')):
+            if path.suffix.lower() in IMAGE_SUFFIXES:
+                yield path
+
+
+def build_corpus(dirs, augmentations, labels, seed):
+    """Enrolment and probe images as encoded bytes, each tagged with its identity"""
+    rng = np.random.default_rng(seed)
+    enrollments, probes = [], []
+    for path in collect_images(dirs):
+        identity = labels.get(path.name, path.name)
+        data = path.read_bytes()
+        if any(identity == known for known, _, _ in enrollments):
+            probes.append((identity, path.name, data))
+        else:
+            enrollments.append((identity, path.name, data))
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            continue
+        for name, augment, quality in AUGMENTATIONS[:augmentations]:
+            ok, encoded = cv2.imencode('.jpg', augment(image, rng), [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if ok:
+                probes.append((identity, f'{path.name}:{name}', encoded.tobytes()))
+    return enrollments, probes
+
+
+def percentiles(samples):
+    if not samples:
+        return None
+    values = np.asarray(samples)
+    return {
+        'p50': round(float(np.percentile(values, 50)), 3),
+        'p90': round(float(np.percentile(values, 90)), 3),
+        'p99': round(float(np.percentile(values, 99)), 3),
+        'mean': round(float(values.mean()), 3),
+        'count': int(values.size),
+    }
+
+
+def _timed(stage_samples, stage, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    stage_samples[stage].append((time.perf_counter() - started) * 1000)
+    return result
+
+
+class FaceRecognitionBackend:
+    """face_recognition.py with one descriptor; score = 1 - distance / 2 (what compare_faces thresholds)"""
+
+    def __init__(self, descriptor):
+        self.descriptor = descriptor
+        self.name = f'face_recognition:{descriptor}'
+
+    def encode(self, data, stages):
+        buffer = face_recognition.read_image_bytes(data)
+
+        def decode():
+            return face_recognition.decode_for_detection(buffer), cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE)
+
+        small, gray = _timed(stages, 'decode', decode)
+        boxes = _timed(stages, 'detect', face_recognition.face_locations, small, 1, 'hog', 0)
+        if not boxes:
+            return None
+        # Same mapping and ROI encoding as face_encodings_from_file, timed separately
+        boxes = face_recognition._map_locations(boxes, small.shape, gray.shape)
+        encodings = _timed(stages, 'encode', face_recognition._encode_gray, gray, boxes[:1], self.descriptor)
+        return encodings[0] if encodings else None
+
+    def scores(self, templates, probe, stages):
+        matrix = np.asarray(templates)
+        distances = _timed(stages, 'compare', face_recognition.face_distance, matrix, probe)
+        return 1.0 - distances / 2.0
+
+
+class OpenCVLegacyBackend:
+    """face_recognition_opencv.FaceRecognition; score = normalized template correlation"""
+    name = 'face_recognition_opencv'
+
+    def __init__(self):
+        self.recognizer = face_recognition_opencv.FaceRecognition()
+
+    def encode(self, data, stages):
+        image = _timed(stages, 'decode', cv2.imdecode, np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return None
+        boxes = _timed(stages, 'detect', self.recognizer.face_locations, image)
+        if not len(boxes):
+            return None
+        encodings = _timed(stages, 'encode', self.recognizer.face_encodings, image, boxes[:1])
+        return encodings[0] if encodings else None
+
+    def scores(self, templates, probe, stages):
+        def correlate():
+            probe_img = probe.reshape(100, 100).astype(np.uint8)
+            return np.asarray([
+                cv2.matchTemplate(probe_img, t.reshape(100, 100).astype(np.uint8), cv2.TM_CCOEFF_NORMED)[0][0]
+                for t in templates
+            ])
+        return _timed(stages, 'compare', correlate)
+
+
+def available_backends(requested):
+    backends = []
+    for name in requested:
+        if name == 'face_recognition_opencv':
+            backends.append(OpenCVLegacyBackend())
+            continue
+        descriptor = name.split(':', 1)[1] if ':' in name else name
+        if descriptor == 'pca' and not os.path.exists(face_descriptors.PCA_MODEL_PATH):
+            print(f'Skipping {name}: no PCA model at {face_descriptors.PCA_MODEL_PATH}', file=sys.stderr)
+            continue
+        backends.append(FaceRecognitionBackend(descriptor))
+    return backends
+
+
+def far_frr(genuine, impostor):
+    """False accept / false reject rates for a score >= tolerance acceptance rule"""
+    genuine = np.asarray(genuine)
+    impostor = np.asarray(impostor)
+    curve = []
+    for tolerance in TOLERANCES:
+        curve.append({
+            'tolerance': tolerance,
+            'far': round(float((impostor > tolerance).mean()), 4) if impostor.size else None,
+            'frr': round(float((genuine <= tolerance).mean()), 4) if genuine.size else None,
+        })
+    scored = [point for point in curve if point['far'] is not None and point['frr'] is not None]
+    eer = min(scored, key=lambda p: abs(p['far'] - p['frr'])) if scored else None
+    return curve, eer
+
+
+def evaluate(backend, enrollments, probes):
+    stages = {'decode': [], 'detect': [], 'encode': [], 'compare': []}
+    identities, templates = [], []
+    for identity, _, data in enrollments:
+        encoding = backend.encode(data, stages)
+        if encoding is not None:
+            identities.append(identity)
+            templates.append(encoding)
+
+    genuine, impostor = [], []
+    no_face = 0
+    for identity, _, data in probes:
+        probe = backend.encode(data, stages)
+        if probe is None or not templates:
+            no_face += 1
+            # An undetected genuine probe is a rejection at every tolerance
+            if identity in identities:
+                genuine.append(-np.inf)
+            continue
+        scores = backend.scores(templates, probe, stages)
+        for enrolled, score in zip(identities, scores):
+            (genuine if enrolled == identity else impostor).append(float(score))
+
+    curve, eer = far_frr(genuine, impostor)
+    return {
+        'enrolled': len(templates),
+        'probes': len(probes),
+        'probes_without_face': no_face,
+        'genuine_pairs': len(genuine),
+        'impostor_pairs': len(impostor),
+        'latency_ms': {stage: percentiles(samples) for stage, samples in stages.items()},
+        'eer': eer,
+        'far_frr': curve,
+    }
+
+
+def throughput(enrollments, probes, max_workers, descriptor):
+    """Check-in path (encode from bytes + compare against every template) at 1..max_workers threads"""
+    templates = []
+    for _, _, data in enrollments:
+        found = face_recognition.face_encodings_from_file(data, descriptor=descriptor)
+        if found:
+            templates.append(found[0])
+    matrix = np.asarray(templates)
+
+    def check_in(data):
+        found = face_recognition.face_encodings_from_file(data, descriptor=descriptor)
+        if found and len(matrix):
+            face_recognition.compare_faces(matrix, found[0])
+
+    results = []
+    payloads = [data for _, _, data in probes] or [data for _, _, data in enrollments]
+    for workers in range(1, max_workers + 1):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(check_in, payloads))
+        elapsed = time.perf_counter() - started
+        results.append({
+            'workers': workers,
+            'images': len(payloads),
+            'seconds': round(elapsed, 3),
+            'images_per_sec': round(len(payloads) / elapsed, 2) if elapsed else None,
+        })
+    return results
+
+
+def run(dirs, backends, augmentations, workers, labels, seed):
+    face_recognition.warm_detector_pool()
+    enrollments, probes = build_corpus(dirs, augmentations, labels, seed)
+    results = {
+        'corpus': {
+            'dirs': [str(d) for d in dirs],
+            'identities': len({identity for identity, _, _ in enrollments}),
+            'enrollments': len(enrollments),
+            'probes': len(probes),
+            'augmentations': [name for name, _, _ in AUGMENTATIONS[:augmentations]],
+        },
+        'config': {
+            'detection_max_dimension': face_recognition.DETECTION_MAX_DIMENSION,
+            'default_descriptor': face_descriptors.default_descriptor(),
+            'detector_pool_size': face_recognition.detector_pool.size,
+            'seed': seed,
+        },
+        'backends': {},
+    }
+    for backend in available_backends(backends):
+        results['backends'][backend.name] = evaluate(backend, enrollments, probes)
+    results['throughput'] = throughput(enrollments, probes, workers, face_descriptors.default_descriptor())
+    # ru_maxrss is in kilobytes on Linux
+    results['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('dirs', nargs='*', default=DEFAULT_DIRS, help='Directories of images to replay')
+    parser.add_argument('--backends', default='face_recognition:raw,face_recognition:lbp,face_recognition:pca,face_recognition_opencv',
+                        help='Comma separated backends to evaluate')
+    parser.add_argument('--augmentations', type=int, default=len(AUGMENTATIONS),
+                        help=f'Synthetic probes per image (max {len(AUGMENTATIONS)})')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Measure throughput at 1..N threads')
+    parser.add_argument('--labels', help='JSON file mapping image file names to identities')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', dest='json_path', help='Also write the results as JSON to this file')
+    args = parser.parse_args()
+
+    labels = json.loads(Path(args.labels).read_text()) if args.labels else {}
+    results = run(
+        args.dirs, [b.strip() for b in args.backends.split(',') if b.strip()],
+        max(0, min(args.augmentations, len(AUGMENTATIONS))), max(1, args.workers), labels, args.seed,
+    )
+
+    print(f"{'backend':28} {'decode p50':>11} {'detect p50':>11} {'encode p50':>11} {'compare p50':>12} {'EER':>14}")
+    for name, backend in results['backends'].items():
+        latency = backend['latency_ms']
+        cells = [f"{latency[s]['p50']:.2f}" if latency[s] else '-' for s in ('decode', 'detect', 'encode', 'compare')]
+        eer = backend['eer']
+        eer_text = f"{statistics.mean([eer['far'], eer['frr']]):.3f}@{eer['tolerance']}" if eer else '-'
+        print(f"{name:28} {cells[0]:>11} {cells[1]:>11} {cells[2]:>11} {cells[3]:>12} {eer_text:>14}")
+    for point in results['throughput']:
+        print(f"{point['workers']} worker(s): {point['images_per_sec']} images/s")
+    print(f"peak RSS: {results['peak_rss_mb']} MB")
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Department, Employee
+from .models import Department, Employee, FaceSample
 
 
 @admin.register(Department)
@@ -10,13 +10,22 @@ class DepartmentAdmin(admin.ModelAdmin):
     ordering = ('name',)
 
 
+class FaceSampleInline(admin.TabularInline):
+    model = FaceSample
+    extra = 0
+    can_delete = True
+    fields = ('sharpness', 'brightness', 'face_size', 'created_at')
+    readonly_fields = fields
+
+
 @admin.register(Employee)
 class EmployeeAdmin(admin.ModelAdmin):
     list_display = ('employee_id', 'get_full_name', 'phone_number', 'department', 'role', 'is_active', 'date_joined')
     list_filter = ('department', 'role', 'is_active', 'date_joined')
     search_fields = ('employee_id', 'user__first_name', 'user__last_name', 'user__email', 'phone_number')
-    readonly_fields = ('employee_id', 'date_joined', 'updated_at')
+    readonly_fields = ('employee_id', 'date_joined', 'updated_at', 'has_face_encoding')
     ordering = ('-date_joined',)
+    inlines = [FaceSampleInline]
     
     fieldsets = (
         ('Personal Information', {
@@ -26,7 +35,7 @@ class EmployeeAdmin(admin.ModelAdmin):
             'fields': ('department', 'role', 'date_joined', 'salary_base', 'floor_number', 'cabin_number', 'is_active')
         }),
         ('Face Recognition', {
-            'fields': ('face_image', 'face_encoding'),
+            'fields': ('face_image', 'has_face_encoding'),
             'classes': ('collapse',)
         }),
         ('Metadata', {
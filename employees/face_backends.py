@@ -0,0 +1,186 @@
+# employees/face_backends.py
+# Face engine registry: both OpenCV engines behind one detect/encode/compare
+# interface, selected with settings.FACE_BACKEND. cv2 and numpy are only
+# imported when a backend is first used, so processes that never touch faces
+# (management commands, non-face workers) do not load them.
+
+import threading
+
+BUILTIN_BACKENDS = {
+    'opencv': 'employees.face_backends.OpenCVBackend',
+    'opencv_template': 'employees.face_backends.OpenCVTemplateBackend',
+}
+
+
+class FaceBackend:
+    """
+    Interface every engine implements. Images may be a path, bytes, a
+    file-like object or an UploadedFile; boxes are (top, right, bottom, left).
+    """
+    name = None
+    # Encodings are unit vectors and score() is 1 - Euclidean distance / 2, so the
+    # kiosk index (employees/face_index.py) ranks them the way score() would
+    euclidean = False
+
+    @property
+    def descriptor(self):
+        """face_descriptors name recorded with encodings this backend stores"""
+        raise NotImplementedError
+
+    def detect(self, image):
+        raise NotImplementedError
+
+    def encodings(self, image, descriptor=None):
+        raise NotImplementedError
+
+    def score(self, known_encoding, encoding):
+        """Similarity in [0, 1]-ish, higher is more alike"""
+        raise NotImplementedError
+
+    def encode(self, image, descriptor=None):
+        """Encoding of the first face in the image, or None"""
+        found = self.encodings(image, descriptor=descriptor)
+        return found[0] if found else None
+
+    def enrollment_sample(self, image, descriptor=None):
+        """(encoding, quality) for the largest face, or None; quality as face_recognition.face_quality"""
+        raise NotImplementedError
+
+    def compare(self, known_encoding, encoding, tolerance):
+        return self.score(known_encoding, encoding) > tolerance
+
+    def verify(self, known_encoding, image, tolerance, descriptor=None):
+        """(is_match, score) for the first face in image; score is None when no face is found"""
+        encoding = self.encode(image, descriptor=descriptor)
+        if encoding is None:
+            return False, None
+        score = self.score(known_encoding, encoding)
+        return score > tolerance, score
+
+
+class OpenCVBackend(FaceBackend):
+    """face_recognition.py: Haar detection on a downscaled decode, face_descriptors encodings, Euclidean distance"""
+    name = 'opencv'
+    euclidean = True
+
+    @property
+    def descriptor(self):
+        import face_descriptors
+        return face_descriptors.get_descriptor().name
+
+    def detect(self, image):
+        import face_recognition
+        return face_recognition.detect_faces_in_file(image)
+
+    def encodings(self, image, descriptor=None):
+        import face_recognition
+        return face_recognition.face_encodings_from_file(image, descriptor=descriptor)
+
+    def enrollment_sample(self, image, descriptor=None):
+        import face_recognition
+        return face_recognition.enrollment_sample(image, descriptor=descriptor)
+
+    def distance(self, known_encoding, encoding):
+        import numpy as np
+        import face_recognition
+        known = np.asarray(known_encoding, dtype=np.float32)
+        return float(face_recognition.face_distance([known], encoding)[0])
+
+    def score(self, known_encoding, encoding):
+        # Same similarity face_recognition.compare_faces thresholds
+        return 1.0 - self.distance(known_encoding, encoding) / 2.0
+
+
+class OpenCVTemplateBackend(FaceBackend):
+    """face_recognition_opencv.FaceRecognition: full-resolution BGR detection, normalized template correlation"""
+    name = 'opencv_template'
+
+    def __init__(self):
+        self._engine = None
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self):
+        with self._lock:
+            if self._engine is None:
+                from face_recognition_opencv import FaceRecognition
+                self._engine = FaceRecognition()
+            return self._engine
+
+    @property
+    def descriptor(self):
+        # Unnormalized 100x100 pixels; only comparable with this backend's own templates,
+        # which is why encodings also record the backend (Employee.face_encoding_backend)
+        return 'raw'
+
+    def _bgr(self, image):
+        import cv2
+        import face_recognition
+        decoded = cv2.imdecode(face_recognition.read_image_bytes(image), cv2.IMREAD_COLOR)
+        if decoded is None:
+            raise ValueError("Could not decode image data")
+        return decoded
+
+    def detect(self, image):
+        return [tuple(int(v) for v in box) for box in self.engine.face_locations(self._bgr(image))]
+
+    def encodings(self, image, descriptor=None):
+        import numpy as np
+        bgr = self._bgr(image)
+        locations = self.engine.face_locations(bgr)
+        if not len(locations):
+            return []
+        return [np.asarray(e, dtype=np.float32) for e in self.engine.face_encodings(bgr, locations)]
+
+    def enrollment_sample(self, image, descriptor=None):
+        import cv2
+        import numpy as np
+        import face_recognition
+        bgr = self._bgr(image)
+        locations = self.engine.face_locations(bgr)
+        if not len(locations):
+            return None
+        largest = max(locations, key=lambda box: (box[2] - box[0]) * (box[1] - box[3]))
+        encodings = self.engine.face_encodings(bgr, [largest])
+        if not encodings:
+            return None
+        gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+        return np.asarray(encodings[0], dtype=np.float32), face_recognition.face_quality(gray, largest)
+
+    def score(self, known_encoding, encoding):
+        import cv2
+        import numpy as np
+        # matchTemplate on float32 so normalized (non-uint8) stored encodings correlate correctly
+        known = np.asarray(known_encoding, dtype=np.float32).reshape(100, 100)
+        probe = np.asarray(encoding, dtype=np.float32).reshape(100, 100)
+        return float(cv2.matchTemplate(probe, known, cv2.TM_CCOEFF_NORMED)[0][0])
+
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def _backend_path(name):
+    if name in BUILTIN_BACKENDS:
+        return BUILTIN_BACKENDS[name]
+    from django.conf import settings
+    extra = getattr(settings, 'FACE_BACKENDS', {})
+    if name not in extra:
+        raise ValueError(f"Unknown face backend: {name}")
+    return extra[name]
+
+
+def get_face_backend(name=None):
+    """
+    Shared backend instance by name (defaults to settings.FACE_BACKEND).
+    Extra engines can be registered with settings.FACE_BACKENDS = {'name': 'dotted.path.Class'}.
+    """
+    if name is None:
+        from django.conf import settings
+        name = getattr(settings, 'FACE_BACKEND', 'opencv')
+    with _instances_lock:
+        backend = _instances.get(name)
+        if backend is None:
+            from django.utils.module_loading import import_string
+            backend = _instances[name] = import_string(_backend_path(name))()
+        return backend
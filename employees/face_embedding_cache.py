@@ -0,0 +1,100 @@
+# employees/face_embedding_cache.py
+# Process-level LRU of decoded reference embeddings so repeat check-ins skip
+# decoding the stored encoding
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+
+
+class EmbeddingCache:
+    """
+    LRU of float32 reference embeddings keyed by employee pk.
+
+    Each entry remembers the employee's updated_at; a row saved since (for
+    example a re-registration in another worker) misses and is reloaded.
+    Entries are evicted least-recently-used once max_bytes is exceeded.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, employee):
+        """Reference embedding for an Employee instance, or None if none is stored"""
+        from .face_encoding_format import load_face_encoding
+
+        key = (employee.pk, employee.updated_at)
+        with self._lock:
+            entry = self._entries.get(employee.pk)
+            if entry is not None and entry[0] == key[1]:
+                self._entries.move_to_end(employee.pk)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        encoding = load_face_encoding(employee)
+        if encoding is None:
+            return None
+        vector = np.ascontiguousarray(encoding, dtype=np.float32).ravel()
+        vector.flags.writeable = False
+        self._put(employee.pk, key[1], vector)
+        return vector
+
+    def _put(self, pk, updated_at, vector):
+        with self._lock:
+            old = self._entries.pop(pk, None)
+            if old is not None:
+                self._bytes -= old[1].nbytes
+            if vector.nbytes > self.max_bytes:
+                return
+            self._entries[pk] = (updated_at, vector)
+            self._bytes += vector.nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def invalidate(self, pk):
+        with self._lock:
+            entry = self._entries.pop(pk, None)
+            if entry is not None:
+                self._bytes -= entry[1].nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'evictions': self.evictions,
+            }
+
+
+embedding_cache = EmbeddingCache(getattr(settings, 'FACE_EMBEDDING_CACHE_BYTES', 64 * 1024 * 1024))
+
+
+def get_reference_embedding(employee):
+    """Cached float32 reference embedding for an employee (read-only array), or None"""
+    return embedding_cache.get(employee)
+
+
+def invalidate_reference_embedding(employee_pk):
+    """Drop an employee's cached embedding after their face is re-registered"""
+    embedding_cache.invalidate(employee_pk)
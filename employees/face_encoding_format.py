@@ -0,0 +1,170 @@
+# employees/face_encoding_format.py
+# Compact binary storage for face encodings (Employee.face_encoding_data)
+#
+# Layout: 12 byte little-endian header followed by the raw vector
+#   magic      2s  b'FE'
+#   version    B   FORMAT_VERSION
+#   dtype      B   DTYPE_CODES key
+#   descriptor B   face_descriptors code (1 raw, 2 lbp, 3 pca)
+#   (pad)      x
+#   revision   H   descriptor revision (the PCA model revision)
+#   count      I   number of elements
+#
+# Version 1 blobs have an 8 byte header (magic, version, dtype, count) and
+# always hold raw pixel encodings; they are still read.
+
+import json
+import struct
+
+import numpy as np
+from django.conf import settings
+
+import face_descriptors
+
+# Engine assumed for encodings stored before Employee.face_encoding_backend existed
+DEFAULT_BACKEND = 'opencv'
+
+MAGIC = b'FE'
+FORMAT_VERSION = 2
+HEADER = struct.Struct('<2sBBBxHI')
+HEADER_V1 = struct.Struct('<2sBBI')
+
+DTYPE_CODES = {
+    1: np.dtype('<f4'),
+    2: np.dtype('<f2'),
+}
+_CODES_BY_NAME = {'float32': 1, 'float16': 2}
+
+
+class InvalidEncodingError(ValueError):
+    """Raised when a stored encoding blob cannot be decoded"""
+
+
+def pack_encoding(encoding, dtype=None, descriptor=None, revision=None):
+    """
+    Serialize a face encoding into the versioned binary format
+
+    Args:
+        encoding: Sequence or numpy array of floats
+        dtype: 'float16' or 'float32' (defaults to settings.FACE_ENCODING_DTYPE)
+        descriptor: face_descriptors backend that produced it (defaults to the active one)
+        revision: descriptor revision, when re-packing a vector from an older model
+
+    Returns:
+        bytes suitable for Employee.face_encoding_data
+    """
+    dtype = dtype or getattr(settings, 'FACE_ENCODING_DTYPE', 'float16')
+    try:
+        code = _CODES_BY_NAME[dtype]
+    except KeyError:
+        raise ValueError(f"Unsupported face encoding dtype: {dtype}")
+
+    backend = face_descriptors.get_descriptor(descriptor)
+    vector = np.ascontiguousarray(np.asarray(encoding).ravel(), dtype=DTYPE_CODES[code])
+    revision = backend.revision if revision is None else revision
+    return HEADER.pack(MAGIC, FORMAT_VERSION, code, backend.code, revision, vector.size) + vector.tobytes()
+
+
+def _parse_header(blob):
+    """(header size, dtype, count, descriptor name, descriptor revision) of a blob"""
+    if blob is None or len(blob) < HEADER_V1.size:
+        raise InvalidEncodingError("Face encoding blob is empty or truncated")
+
+    magic, version = HEADER_V1.unpack_from(blob)[:2]
+    if magic != MAGIC:
+        raise InvalidEncodingError("Not a face encoding blob")
+    if version == 1:
+        _, _, code, count = HEADER_V1.unpack_from(blob)
+        size, descriptor, revision = HEADER_V1.size, 'raw', 1
+    elif version == FORMAT_VERSION:
+        if len(blob) < HEADER.size:
+            raise InvalidEncodingError("Face encoding blob is empty or truncated")
+        _, _, code, descriptor_code, revision, count = HEADER.unpack_from(blob)
+        descriptor = face_descriptors.DESCRIPTORS_BY_CODE.get(descriptor_code)
+        if descriptor is None:
+            raise InvalidEncodingError(f"Unknown face descriptor code {descriptor_code}")
+        size = HEADER.size
+    else:
+        raise InvalidEncodingError(f"Unsupported face encoding format version {version}")
+
+    dtype = DTYPE_CODES.get(code)
+    if dtype is None:
+        raise InvalidEncodingError(f"Unknown face encoding dtype code {code}")
+    if len(blob) != size + count * dtype.itemsize:
+        raise InvalidEncodingError("Face encoding blob length does not match its header")
+    return size, dtype, count, descriptor, revision
+
+
+def unpack_encoding(blob):
+    """
+    Decode a binary encoding without copying the payload
+
+    Returns:
+        A read-only numpy view over the stored bytes (float16 or float32)
+    """
+    size, dtype, count, _, _ = _parse_header(blob)
+    return np.frombuffer(blob, dtype=dtype, count=count, offset=size)
+
+
+def encoding_descriptor(blob):
+    """(descriptor name, revision) recorded in a blob, without decoding the vector"""
+    return _parse_header(blob)[3:]
+
+
+def stored_descriptor(data, legacy_text=''):
+    """
+    Descriptor of whatever an employee row holds (legacy JSON is always raw).
+    Returns None when nothing usable is stored.
+    """
+    if data:
+        try:
+            return encoding_descriptor(data)
+        except InvalidEncodingError:
+            return None
+    if legacy_text and legacy_text.strip():
+        return ('raw', 1)
+    return None
+
+
+def decode_stored_encoding(data, legacy_text=''):
+    """
+    Decode whatever an employee row holds: the binary column when present,
+    otherwise the legacy JSON text. Returns None when nothing usable is stored.
+    """
+    if data:
+        try:
+            return unpack_encoding(data)
+        except InvalidEncodingError:
+            return None
+    if legacy_text and legacy_text.strip():
+        try:
+            return np.asarray(json.loads(legacy_text), dtype=np.float32)
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def load_face_encoding(employee):
+    """Stored reference encoding for an employee as a numpy array, or None"""
+    return decode_stored_encoding(employee.face_encoding_data, employee.face_encoding)
+
+
+def load_face_descriptor(employee):
+    """(descriptor name, revision) of the employee's stored encoding, or None"""
+    return stored_descriptor(employee.face_encoding_data, employee.face_encoding)
+
+
+def load_face_backend(employee):
+    """Name of the face_backends engine that produced the employee's stored encoding"""
+    return employee.face_encoding_backend or DEFAULT_BACKEND
+
+
+def store_face_encoding(employee, encoding, descriptor=None, backend=None):
+    """
+    Set the employee's encoding in binary form and drop any legacy JSON copy
+    (caller saves). backend names the engine that produced it (defaults to
+    settings.FACE_BACKEND).
+    """
+    employee.face_encoding_data = pack_encoding(encoding, descriptor=descriptor)
+    employee.face_encoding = ''
+    employee.face_encoding_backend = backend or getattr(settings, 'FACE_BACKEND', DEFAULT_BACKEND)
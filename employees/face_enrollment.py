@@ -0,0 +1,135 @@
+# employees/face_enrollment.py
+# Multi-photo face enrolment: score each sample, drop poor ones and store a
+# template built from the rest together with the per-sample vectors
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+
+def _thresholds():
+    return {
+        'min_sharpness': getattr(settings, 'FACE_ENROLL_MIN_SHARPNESS', 30.0),
+        'min_brightness': getattr(settings, 'FACE_ENROLL_MIN_BRIGHTNESS', 40.0),
+        'max_brightness': getattr(settings, 'FACE_ENROLL_MAX_BRIGHTNESS', 220.0),
+        'min_face_size': getattr(settings, 'FACE_ENROLL_MIN_FACE_SIZE', 80),
+    }
+
+
+def rejection_reason(quality, thresholds=None):
+    """Why a sample is unusable, or None when it passes every check"""
+    limits = thresholds or _thresholds()
+    if quality['face_size'] < limits['min_face_size']:
+        return 'face too small'
+    if quality['sharpness'] < limits['min_sharpness']:
+        return 'image too blurry'
+    if not limits['min_brightness'] <= quality['brightness'] <= limits['max_brightness']:
+        return 'too dark' if quality['brightness'] < limits['min_brightness'] else 'too bright'
+    return None
+
+
+def score_samples(images, backend=None):
+    """
+    Encode and score uploads in parallel (OpenCV releases the GIL) with the
+    given face backend (defaults to settings.FACE_BACKEND).
+
+    Returns one (encoding, quality) pair per image, or None where no face was found.
+    """
+    import face_recognition
+    from .face_backends import get_face_backend
+
+    if not images:
+        return []
+    backend = backend or get_face_backend()
+    # Read the uploads on this thread; only the decode/detect/encode work is parallel
+    buffers = [face_recognition.read_image_bytes(image) for image in images]
+    workers = min(len(buffers), os.cpu_count() or 1)
+    if workers == 1:
+        return [backend.enrollment_sample(buffer) for buffer in buffers]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(backend.enrollment_sample, buffers))
+
+
+def build_template(vectors, method=None):
+    """
+    Combine accepted sample vectors into one unit-length reference template.
+
+    'medoid' picks the sample closest to all others. 'mean' (default) averages
+    the samples after dropping outliers far from the medoid, then renormalizes.
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim != 2 or not len(matrix):
+        raise ValueError("No sample vectors to build a template from")
+    if len(matrix) == 1:
+        return matrix[0]
+
+    sq = np.einsum('ij,ij->i', matrix, matrix)
+    pairwise = np.sqrt(np.maximum(sq[:, None] + sq[None, :] - 2.0 * (matrix @ matrix.T), 0.0))
+    medoid = int(pairwise.sum(axis=1).argmin())
+
+    method = method or getattr(settings, 'FACE_ENROLL_TEMPLATE', 'mean')
+    if method == 'medoid':
+        return matrix[medoid]
+
+    to_medoid = pairwise[medoid]
+    spread = np.median(to_medoid[to_medoid > 0]) if (to_medoid > 0).any() else 0.0
+    keep = to_medoid <= 2.0 * spread if spread else np.ones(len(matrix), dtype=bool)
+    template = matrix[keep].mean(axis=0)
+    norm = np.linalg.norm(template)
+    return template / norm if norm else matrix[medoid]
+
+
+def enroll_employee(employee, images):
+    """
+    Enrol an employee from several photos.
+
+    Returns a dict with the number of accepted samples and the rejected ones
+    (index and reason). When at least FACE_ENROLL_MIN_SAMPLES pass, the
+    employee's template and FaceSample rows are replaced in one transaction.
+    """
+    from .face_backends import get_face_backend
+    from .face_embedding_cache import invalidate_reference_embedding
+    from .face_encoding_format import pack_encoding, store_face_encoding
+    from .models import FaceSample
+
+    backend = get_face_backend()
+    limits = _thresholds()
+    accepted = []
+    rejected = []
+    for position, sample in enumerate(score_samples(images, backend)):
+        if sample is None:
+            rejected.append({'index': position, 'reason': 'no face detected'})
+            continue
+        encoding, quality = sample
+        reason = rejection_reason(quality, limits)
+        if reason:
+            rejected.append({'index': position, 'reason': reason, 'quality': quality})
+        else:
+            accepted.append((encoding, quality))
+
+    result = {'accepted': len(accepted), 'rejected': rejected, 'enrolled': False}
+    if len(accepted) < getattr(settings, 'FACE_ENROLL_MIN_SAMPLES', 1):
+        return result
+
+    template = build_template([encoding for encoding, _ in accepted])
+    with transaction.atomic():
+        employee.face_samples.all().delete()
+        FaceSample.objects.bulk_create([
+            FaceSample(
+                employee=employee,
+                encoding_data=pack_encoding(encoding, descriptor=backend.descriptor),
+                sharpness=quality['sharpness'],
+                brightness=quality['brightness'],
+                face_size=quality['face_size'],
+            )
+            for encoding, quality in accepted
+        ])
+        store_face_encoding(employee, template, descriptor=backend.descriptor, backend=backend.name)
+        employee.save()
+    invalidate_reference_embedding(employee.pk)
+
+    result['enrolled'] = True
+    return result
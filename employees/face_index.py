@@ -0,0 +1,270 @@
+# employees/face_index.py
+# In-process 1:N face identification index ("kiosk identify" mode)
+
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+
+# Only compact descriptors are indexed: raw 10,000-d pixel vectors cost about
+# 400 MB per worker and tens of milliseconds per search at 10k employees
+INDEXED_DESCRIPTORS = ('lbp', 'pca')
+
+
+class FaceIndexUnavailable(Exception):
+    """Kiosk identification is not possible with the active face settings"""
+
+
+class FaceIndex:
+    """
+    Holds every registered face encoding in one contiguous float32 matrix so a
+    probe can be compared against all employees with a single matrix product.
+    """
+
+    def __init__(self):
+        self.key = None
+        self.employee_ids = np.empty(0, dtype=np.int64)
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        self.sq_norms = np.empty(0, dtype=np.float32)
+        self._positions = {}
+
+    def __len__(self):
+        return len(self.employee_ids)
+
+    def __contains__(self, pk):
+        return pk in self._positions
+
+    def _assign(self, ids, matrix):
+        self.employee_ids = np.asarray(ids, dtype=np.int64)
+        self.matrix = matrix
+        self.sq_norms = np.einsum('ij,ij->i', matrix, matrix) if len(ids) else np.empty(0, dtype=np.float32)
+        self._positions = {int(pk): i for i, pk in enumerate(ids)}
+        return self
+
+    def build(self, entries):
+        """
+        Build the index from an iterable of (employee_pk, encoding) pairs.
+        Encodings whose dimension differs from the first one are skipped.
+        """
+        ids = []
+        rows = []
+        dim = None
+        for pk, encoding in entries:
+            vector = np.asarray(encoding, dtype=np.float32).ravel()
+            if dim is None:
+                dim = vector.size
+            if vector.size != dim or dim == 0:
+                continue
+            ids.append(pk)
+            rows.append(vector)
+
+        if rows:
+            matrix = np.ascontiguousarray(np.vstack(rows), dtype=np.float32)
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        return self._assign(ids, matrix)
+
+    def replace(self, pk, encoding):
+        """
+        Overwrite the row of an already indexed employee in place.
+        Returns False when the employee is not indexed or the dimension differs,
+        in which case the caller should rebuild.
+        """
+        position = self._positions.get(pk)
+        if position is None:
+            return False
+        vector = np.asarray(encoding, dtype=np.float32).ravel()
+        if vector.size != self.matrix.shape[1]:
+            return False
+        self.matrix[position] = vector
+        self.sq_norms[position] = vector.dot(vector)
+        return True
+
+    def added(self, pk, encoding):
+        """
+        Copy of the index with a new employee's row appended, or None when the
+        dimension differs. Searches running on this index are not disturbed.
+        """
+        vector = np.asarray(encoding, dtype=np.float32).ravel()
+        if not vector.size or (len(self) and vector.size != self.matrix.shape[1]):
+            return None
+        index = FaceIndex()
+        index.key = self.key
+        matrix = np.vstack([self.matrix.reshape(len(self), vector.size), vector[None]])
+        return index._assign(np.append(self.employee_ids, pk), matrix)
+
+    def removed(self, pk):
+        """Copy of the index without the employee's row"""
+        position = self._positions.get(pk)
+        if position is None:
+            return self
+        index = FaceIndex()
+        index.key = self.key
+        return index._assign(np.delete(self.employee_ids, position), np.delete(self.matrix, position, axis=0))
+
+    def distances(self, encoding):
+        """Euclidean distance from the probe to every indexed encoding"""
+        if not len(self):
+            return np.empty(0, dtype=np.float32)
+        probe = np.asarray(encoding, dtype=np.float32).ravel()
+        # ||a - b||^2 = ||a||^2 + ||b||^2 - 2 a.b, with a.b for all rows in one GEMV
+        sq = self.sq_norms + probe.dot(probe) - 2.0 * (self.matrix @ probe)
+        return np.sqrt(np.maximum(sq, 0.0))
+
+    def search(self, encoding, k=5):
+        """
+        Return the k closest employees as a list of (employee_pk, distance)
+        pairs, nearest first.
+        """
+        if not len(self):
+            return []
+        probe = np.asarray(encoding, dtype=np.float32).ravel()
+        if probe.size != self.matrix.shape[1]:
+            return []
+
+        distances = self.distances(probe)
+        k = max(1, min(k, len(distances)))
+        if k < len(distances):
+            top = np.argpartition(distances, k - 1)[:k]
+        else:
+            top = np.arange(len(distances))
+        top = top[np.argsort(distances[top])]
+        return [(int(self.employee_ids[i]), float(distances[i])) for i in top]
+
+
+_index = None
+_built_at = None
+_refreshing = False
+_generation = 0
+_lock = threading.Lock()
+
+
+def _index_key():
+    """(backend, descriptor, revision) the index must be built for; raises FaceIndexUnavailable"""
+    import face_descriptors
+    from .face_backends import get_face_backend
+
+    backend = get_face_backend()
+    if not backend.euclidean:
+        raise FaceIndexUnavailable(f"Kiosk identification is not supported by the '{backend.name}' face backend")
+    active = face_descriptors.get_descriptor()
+    if active.name not in INDEXED_DESCRIPTORS:
+        raise FaceIndexUnavailable(
+            f"Kiosk identification needs a compact face descriptor ({' or '.join(INDEXED_DESCRIPTORS)}), "
+            f"not '{active.name}'"
+        )
+    return backend.name, active.name, active.revision
+
+
+def _load_entries(key):
+    """Yield (pk, encoding) for every active employee with a template made as key"""
+    from django.db.models import Q
+    from .models import Employee
+    from .face_encoding_format import DEFAULT_BACKEND, decode_stored_encoding, stored_descriptor
+
+    backend, name, revision = key
+    rows = Employee.objects.filter(
+        Q(face_encoding_data__isnull=False) | ~Q(face_encoding=''),
+        is_active=True,
+    ).values_list('pk', 'face_encoding_data', 'face_encoding', 'face_encoding_backend')
+    for pk, data, legacy, stored_backend in rows.iterator(chunk_size=500):
+        # Probes use the active backend and descriptor; other templates need re-encoding
+        if (stored_backend or DEFAULT_BACKEND) != backend or stored_descriptor(data, legacy) != (name, revision):
+            continue
+        encoding = decode_stored_encoding(data, legacy)
+        if encoding is not None:
+            yield pk, encoding
+
+
+def _build(key):
+    index = FaceIndex().build(_load_entries(key))
+    index.key = key
+    return index
+
+
+def _refresh(key):
+    """Rebuild in a background thread (other workers' enrolments) and swap the result in"""
+    global _index, _built_at, _refreshing
+    from django.db import connection
+
+    try:
+        generation, started = _generation, time.monotonic()
+        index = _build(key)
+        with _lock:
+            if _index is not None and _index.key == key:
+                _index = index
+                # Saves seen while building may be missing from it: refresh again soon
+                _built_at = started if _generation == generation else None
+    finally:
+        with _lock:
+            _refreshing = False
+        connection.close()
+
+
+def get_face_index():
+    """
+    Return the process-wide face index. It is built on first use (or after
+    invalidate_face_index()); after that this worker's saves patch it in place
+    and, once it is older than FACE_INDEX_MAX_AGE seconds, a background thread
+    rebuilds it while lookups keep using the current one. Raises
+    FaceIndexUnavailable when the active descriptor is not indexed.
+    """
+    global _built_at, _refreshing, _index
+
+    key = _index_key()
+    max_age = getattr(settings, 'FACE_INDEX_MAX_AGE', 300)
+    with _lock:
+        if _index is None or _index.key != key:
+            _index = _build(key)
+            _built_at = time.monotonic()
+        elif max_age and not _refreshing and (_built_at is None or time.monotonic() - _built_at > max_age):
+            _refreshing = True
+            threading.Thread(target=_refresh, args=(key,), name='face-index-refresh', daemon=True).start()
+        return _index
+
+
+def invalidate_face_index():
+    """Drop the index so the next lookup rebuilds it"""
+    global _index
+    with _lock:
+        _index = None
+
+
+def update_face_index(employee):
+    """
+    Reflect a single employee change in the index without a rebuild.
+    Re-enrolments are patched in place, new and removed templates swap in an
+    updated copy.
+    """
+    global _index, _generation
+    with _lock:
+        if _index is None:
+            return
+        _generation += 1
+        encoding = None
+        if employee.is_active and employee.has_face_encoding:
+            from .face_encoding_format import load_face_backend, load_face_descriptor, load_face_encoding
+            backend, name, revision = _index.key
+            if load_face_backend(employee) == backend and load_face_descriptor(employee) == (name, revision):
+                encoding = load_face_encoding(employee)
+        if encoding is None:
+            _index = _index.removed(employee.pk)
+        elif not _index.replace(employee.pk, encoding):
+            # Not indexed yet; a dimension mismatch (None) means the next lookup rebuilds
+            _index = _index.removed(employee.pk).added(employee.pk, encoding)
+
+
+def drop_from_face_index(pk):
+    """Remove a deleted employee from the index"""
+    global _index, _generation
+    with _lock:
+        if _index is not None:
+            _generation += 1
+            _index = _index.removed(pk)
+
+
+def identify_face(encoding, k=5):
+    """Top-k (employee_pk, distance) candidates for a probe encoding"""
+    return get_face_index().search(encoding, k=k)
@@ -1,26 +1,27 @@
 # employees/face_recognition_utils.py
-import face_recognition
-import numpy as np
-from PIL import Image
+# Thin helpers over the configured face backend (see face_backends.py); cv2 is loaded on first use
+from .face_backends import get_face_backend
 
-def encode_face(image_path):
-    """Generate face encoding from image"""
-    image = face_recognition.load_image_file(image_path)
-    encodings = face_recognition.face_encodings(image)
-    if encodings:
-        return encodings[0].tolist()
-    return None
+def encode_face(image):
+    """Generate face encoding (numpy array) from an image path, bytes, file-like or UploadedFile"""
+    return get_face_backend().encode(image)
 
-def verify_face(known_encoding, image_path):
-    """Verify face against known encoding"""
-    image = face_recognition.load_image_file(image_path)
-    unknown_encodings = face_recognition.face_encodings(image)
-    
-    if not unknown_encodings:
-        return False
-    
-    known = np.array(known_encoding)
-    unknown = unknown_encodings[0]
-    
-    results = face_recognition.compare_faces([known], unknown)
-    return results[0]
\ No newline at end of file
+def match_tolerance(descriptor=None, backend=None):
+    """
+    Similarity threshold for encodings made by `backend` with `descriptor` (both default
+    to the active ones): FACE_BACKEND_TOLERANCES, then FACE_DESCRIPTOR_TOLERANCES,
+    then FACE_RECOGNITION_TOLERANCE
+    """
+    from django.conf import settings
+    import face_descriptors
+    backend = backend or getattr(settings, 'FACE_BACKEND', 'opencv')
+    backend_tolerances = getattr(settings, 'FACE_BACKEND_TOLERANCES', {})
+    if backend in backend_tolerances:
+        return backend_tolerances[backend]
+    name = face_descriptors.get_descriptor(descriptor).name
+    tolerances = getattr(settings, 'FACE_DESCRIPTOR_TOLERANCES', {})
+    return tolerances.get(name, getattr(settings, 'FACE_RECOGNITION_TOLERANCE', 0.6))
+
+def verify_face(known_encoding, image, descriptor=None):
+    """Verify face in an image path, bytes, file-like or UploadedFile against a known encoding"""
+    return get_face_backend().verify(known_encoding, image, match_tolerance(descriptor), descriptor=descriptor)[0]
@@ -0,0 +1,190 @@
+# employees/face_verification_service.py
+# Off-request face verification: a process pool that owns the OpenCV models,
+# fronted by a bounded submission queue so bursts get HTTP 429 instead of
+# tying up every web worker.
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout, Future
+import multiprocessing
+
+
+class VerificationQueueFull(Exception):
+    """All worker slots and queue slots are taken; the client should retry later"""
+
+    def __init__(self, retry_after):
+        super().__init__('Face verification queue is full')
+        self.retry_after = retry_after
+
+
+class VerificationTimeout(Exception):
+    """The verification job did not finish within its deadline"""
+
+
+def _init_worker():
+    """Load the detectors and descriptor model once per worker process"""
+    import face_descriptors
+    import face_recognition
+    face_recognition.warm_detector_pool()
+    face_descriptors.load_descriptor()
+
+
+def verify_job(image_bytes, known_encoding, tolerance, descriptor=None, backend='opencv'):
+    """
+    Runs inside a worker process. The probe is described with the same
+    face_descriptors backend as the stored template.
+
+    Returns:
+        (is_match, score) - score is None when no face was found
+    """
+    from .face_backends import get_face_backend
+    return get_face_backend(backend).verify(known_encoding, image_bytes, tolerance, descriptor=descriptor)
+
+
+class FaceVerificationService:
+    """
+    Bounded front-end for verify_job.
+
+    At most `workers + queue_size` jobs are accepted at a time; further
+    submissions raise VerificationQueueFull immediately. With workers=0 jobs
+    run inline on the calling thread (development and tests), still bounded.
+    """
+
+    def __init__(self, workers, queue_size, timeout, retry_after=2, start_method='spawn'):
+        self.workers = max(0, workers)
+        self.queue_size = max(0, queue_size)
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.start_method = start_method
+        self._slots = threading.BoundedSemaphore(max(1, self.workers + self.queue_size))
+        self._executor = None
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._in_flight = 0
+        self._abandoned = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+        self._slots.release()
+
+    def _finish_abandoned(self, _future=None):
+        with self._lock:
+            self._abandoned -= 1
+
+    def submit(self, image_bytes, known_encoding, tolerance, descriptor=None, backend='opencv'):
+        """Queue a job and return its Future, or raise VerificationQueueFull"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise VerificationQueueFull(self.retry_after)
+
+        with self._lock:
+            self._submitted += 1
+            self._in_flight += 1
+
+        if self.workers == 0:
+            future = Future()
+            try:
+                future.set_result(verify_job(image_bytes, known_encoding, tolerance, descriptor, backend))
+            except Exception as exc:
+                future.set_exception(exc)
+            finally:
+                self._release()
+            return future
+
+        try:
+            future = self._get_executor().submit(
+                verify_job, image_bytes, known_encoding, tolerance, descriptor, backend
+            )
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def verify(self, image_bytes, known_encoding, tolerance, timeout=None, descriptor=None, backend='opencv'):
+        """Submit and wait for (is_match, score)"""
+        future = self.submit(image_bytes, known_encoding, tolerance, descriptor, backend)
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except FuturesTimeout:
+            # cancel() only drops a job that has not started. A job already running in a
+            # worker cannot be interrupted: it keeps that worker busy and holds its slot
+            # (released by the done callback) until it finishes, so timeouts do not free
+            # capacity. 'abandoned' in stats() counts those jobs while they are running.
+            if not future.cancel():
+                with self._lock:
+                    self._abandoned += 1
+                future.add_done_callback(self._finish_abandoned)
+            with self._lock:
+                self._timed_out += 1
+            raise VerificationTimeout(f'Face verification did not finish within {timeout or self.timeout}s')
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'capacity': self.workers + self.queue_size,
+                'in_flight': self._in_flight,
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'timed_out': self._timed_out,
+                'abandoned': self._abandoned,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_verification_service():
+    """Process-wide service configured from the FACE_VERIFY_* settings"""
+    global _service
+    from django.conf import settings
+
+    with _service_lock:
+        if _service is None:
+            workers = getattr(settings, 'FACE_VERIFY_WORKERS', None)
+            if workers is None:
+                workers = os.cpu_count() or 1
+            _service = FaceVerificationService(
+                workers=workers,
+                queue_size=getattr(settings, 'FACE_VERIFY_QUEUE_SIZE', workers * 2),
+                timeout=getattr(settings, 'FACE_VERIFY_TIMEOUT', 10),
+                retry_after=getattr(settings, 'FACE_VERIFY_RETRY_AFTER', 2),
+            )
+        return _service
+
+
+def reset_verification_service(**kwargs):
+    """Drop the service so the next call picks up changed settings"""
+    global _service
+    setting = kwargs.get('setting')
+    if setting is not None and not setting.startswith('FACE_VERIFY_'):
+        return
+    with _service_lock:
+        service, _service = _service, None
+    if service is not None:
+        service.shutdown()
@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+import json
+
+from employees.face_embedding_cache import invalidate_reference_embedding
+from employees.face_index import invalidate_face_index
+from employees.models import Employee
+from employees.face_encoding_format import encoding_descriptor, pack_encoding, unpack_encoding, InvalidEncodingError
+
+
+class Command(BaseCommand):
+    help = 'Convert JSON face encodings to the binary format (use --rewrite to re-pack existing blobs, e.g. after changing dtype)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dtype', choices=['float16', 'float32'], default=None, help='Storage dtype (defaults to settings.FACE_ENCODING_DTYPE)')
+        parser.add_argument('--batch-size', type=int, default=200, help='Rows converted per transaction')
+        parser.add_argument('--rewrite', action='store_true', help='Also re-pack rows that already have binary data')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be converted')
+
+    def handle(self, *args, **options):
+        dtype = options['dtype']
+        batch_size = max(1, options['batch_size'])
+
+        qs = Employee.objects.exclude(face_encoding='')
+        if options['rewrite']:
+            qs = Employee.objects.filter(face_encoding_data__isnull=False) | qs
+        else:
+            qs = qs.filter(face_encoding_data__isnull=True)
+        rows = qs.values_list('pk', 'employee_id', 'face_encoding', 'face_encoding_data')
+
+        converted = failed = 0
+        json_bytes = binary_bytes = 0
+        batch = []
+
+        for pk, emp_code, raw, data in rows.iterator(chunk_size=batch_size):
+            try:
+                if raw and raw.strip():
+                    # JSON encodings predate descriptors and are raw pixel vectors
+                    vector, descriptor, revision = json.loads(raw), 'raw', 1
+                    json_bytes += len(raw)
+                else:
+                    vector, (descriptor, revision) = unpack_encoding(data), encoding_descriptor(data)
+                blob = pack_encoding(vector, dtype=dtype, descriptor=descriptor, revision=revision)
+            except (TypeError, ValueError, InvalidEncodingError) as exc:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'Skipping {emp_code}: {exc}'))
+                continue
+
+            binary_bytes += len(blob)
+            batch.append((pk, blob))
+            if len(batch) >= batch_size:
+                converted += self._flush(batch, options['dry_run'])
+                batch = []
+
+        converted += self._flush(batch, options['dry_run'])
+
+        action = 'Would convert' if options['dry_run'] else 'Converted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {converted} face encodings ({failed} failed); '
+            f'JSON {json_bytes / 1024:.1f} KB -> binary {binary_bytes / 1024:.1f} KB'
+        ))
+
+    def _flush(self, batch, dry_run):
+        if dry_run or not batch:
+            return len(batch)
+        # update() skips auto_now and post_save: bump updated_at so every process's
+        # (pk, updated_at) embedding cache misses, and drop this process's caches now
+        now = timezone.now()
+        with transaction.atomic():
+            for pk, blob in batch:
+                Employee.objects.filter(pk=pk).update(face_encoding_data=blob, face_encoding='', updated_at=now)
+        for pk, _ in batch:
+            invalidate_reference_embedding(pk)
+        invalidate_face_index()
+        return len(batch)
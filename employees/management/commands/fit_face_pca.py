@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+import face_descriptors
+import face_recognition
+from attendance.models import Attendance
+from employees.models import Employee
+
+
+class Command(BaseCommand):
+    help = 'Fit the PCA face descriptor on stored face and check-in images and write a new model revision'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--components', type=int, default=128, help='Maximum descriptor dimension')
+        parser.add_argument('--output', default=face_descriptors.PCA_MODEL_PATH, help='Model file to write')
+        parser.add_argument('--limit', type=int, default=5000, help='Maximum number of images to read')
+        parser.add_argument('--no-attendance', action='store_true', help='Only use registered face images')
+
+    def handle(self, *args, **options):
+        files = [e.face_image for e in Employee.objects.exclude(face_image='').only('face_image')]
+        if not options['no_attendance']:
+            files += [a.check_in_image for a in Attendance.objects.exclude(check_in_image='').only('check_in_image')]
+        files = files[:options['limit']]
+
+        vectors = []
+        for field_file in files:
+            try:
+                with field_file.open('rb') as handle:
+                    vectors.extend(face_recognition.face_encodings_from_file(handle, descriptor='raw'))
+            except (OSError, ValueError) as exc:
+                self.stdout.write(self.style.WARNING(f'Skipping {field_file.name}: {exc}'))
+
+        try:
+            mean, components = face_descriptors.fit_pca(vectors, options['components'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        revision = face_descriptors.pca_model_revision(options['output']) + 1
+        face_descriptors.save_pca_model(options['output'], mean, components, revision)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote PCA model revision {revision} ({components.shape[0]} components from {len(vectors)} faces) '
+            f"to {options['output']}. Run reencode_faces so stored templates use it."
+        ))
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+
+import face_descriptors
+import face_recognition
+from employees.face_embedding_cache import invalidate_reference_embedding
+from employees.face_encoding_format import load_face_descriptor, store_face_encoding
+from employees.models import Employee
+
+
+class Command(BaseCommand):
+    help = 'Re-encode registered faces from Employee.face_image with the active descriptor (FACE_DESCRIPTOR)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=64, help='Images decoded and encoded together')
+        parser.add_argument('--all', action='store_true', help='Also re-encode templates already on the active descriptor')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be re-encoded')
+
+    def handle(self, *args, **options):
+        active = face_descriptors.get_descriptor()
+        current = (active.name, active.revision)
+        batch_size = max(1, options['batch_size'])
+
+        employees = Employee.objects.exclude(face_image='').order_by('pk')
+        pending = [e for e in employees.iterator(chunk_size=batch_size)
+                   if options['all'] or load_face_descriptor(e) != current]
+
+        updated = missing = 0
+        for start in range(0, len(pending), batch_size):
+            batch, images = [], []
+            for employee in pending[start:start + batch_size]:
+                try:
+                    with employee.face_image.open('rb') as handle:
+                        images.append(face_recognition.load_image_file(handle))
+                    batch.append(employee)
+                except (OSError, ValueError) as exc:
+                    missing += 1
+                    self.stdout.write(self.style.WARNING(f'Skipping {employee.employee_id}: {exc}'))
+
+            encodings = face_recognition.batch_face_encodings(images, batch_size=batch_size)
+            for employee, found in zip(batch, encodings):
+                if not found:
+                    missing += 1
+                    self.stdout.write(self.style.WARNING(f'No face found for {employee.employee_id}'))
+                    continue
+                updated += 1
+                if options['dry_run']:
+                    continue
+                # Encoded with face_recognition.py, i.e. the 'opencv' backend
+                store_face_encoding(employee, found[0], backend='opencv')
+                employee.save(update_fields=['face_encoding_data', 'face_encoding', 'face_encoding_backend', 'updated_at'])
+                invalidate_reference_embedding(employee.pk)
+
+        action = 'Would re-encode' if options['dry_run'] else 'Re-encoded'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {updated} faces with {active.name} ({active.dimension}-d); {missing} skipped'
+        ))
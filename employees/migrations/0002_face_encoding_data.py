@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:08
+#
+# Legacy JSON encodings are raw pixel vectors. They are packed here with the
+# blob layout frozen (employees/face_encoding_format.py, format version 2) so
+# later changes to the live code cannot change what this migration does.
+# Encodings are attributed to the 'opencv' backend (blank), except raw pixel
+# templates stored by 'opencv_template': those are unnormalized 0-255 pixels,
+# while face_recognition.py's raw vectors have unit length.
+
+import json
+import math
+import struct
+
+from django.conf import settings
+from django.db import migrations, models
+
+MAGIC = b'FE'
+HEADER = struct.Struct('<2sBBBxHI')
+DTYPE_CODES = {'float32': (1, 'f'), 'float16': (2, 'e')}
+RAW_CODE = 1
+
+
+def pack_raw(values):
+    code, fmt = DTYPE_CODES.get(getattr(settings, 'FACE_ENCODING_DTYPE', 'float16'), DTYPE_CODES['float16'])
+    return HEADER.pack(MAGIC, 2, code, RAW_CODE, 1, len(values)) + struct.pack(f'<{len(values)}{fmt}', *values)
+
+
+def convert_json_encodings(apps, schema_editor):
+    """Move legacy JSON encodings into the binary column"""
+    Employee = apps.get_model('employees', 'Employee')
+    pending = Employee.objects.filter(face_encoding_data__isnull=True).exclude(face_encoding='')
+    for pk, raw in pending.values_list('pk', 'face_encoding').iterator(chunk_size=200):
+        try:
+            values = [float(v) for v in json.loads(raw)]
+            blob = pack_raw(values)
+        except (TypeError, ValueError, struct.error):
+            continue
+        backend = 'opencv_template' if math.sqrt(sum(v * v for v in values)) > 2.0 else ''
+        Employee.objects.filter(pk=pk).update(face_encoding_data=blob, face_encoding='', face_encoding_backend=backend)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='face_encoding_data',
+            field=models.BinaryField(blank=True, help_text='Binary face encoding, see employees/face_encoding_format.py', null=True),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='face_encoding_backend',
+            field=models.CharField(blank=True, editable=False, help_text='Face backend that produced face_encoding_data (blank: opencv)', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='employee',
+            name='face_encoding',
+            field=models.TextField(blank=True, help_text='Legacy JSON face encoding (superseded by face_encoding_data)'),
+        ),
+        migrations.RunPython(convert_json_encodings, migrations.RunPython.noop),
+    ]
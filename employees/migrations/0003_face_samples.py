@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_face_encoding_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FaceSample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('encoding_data', models.BinaryField(help_text='Binary face encoding, see employees/face_encoding_format.py')),
+                ('sharpness', models.FloatField(default=0)),
+                ('brightness', models.FloatField(default=0)),
+                ('face_size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='face_samples', to='employees.employee')),
+            ],
+            options={
+                'ordering': ['employee', 'created_at'],
+            },
+        ),
+    ]
@@ -47,7 +47,9 @@ class Employee(models.Model):
     salary_base = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     
     # Face Recognition
-    face_encoding = models.TextField(blank=True, help_text="Stored face encoding for recognition")
+    face_encoding = models.TextField(blank=True, help_text="Legacy JSON face encoding (superseded by face_encoding_data)")
+    face_encoding_data = models.BinaryField(null=True, blank=True, editable=False, help_text="Binary face encoding, see employees/face_encoding_format.py")
+    face_encoding_backend = models.CharField(max_length=50, blank=True, editable=False, help_text="Face backend that produced face_encoding_data (blank: opencv)")
     face_image = models.ImageField(upload_to='face_images/', null=True, blank=True)
     
     # Status
@@ -59,7 +61,28 @@ class Employee(models.Model):
     def __str__(self):
         return f"{self.employee_id} - {self.user.get_full_name()}"
 
+    @property
+    def has_face_encoding(self):
+        """True when a face encoding is stored in either the binary or legacy JSON column"""
+        return bool(self.face_encoding_data) or bool(self.face_encoding and self.face_encoding.strip())
+
     class Meta:
         ordering = ['-created_at']
 
 
+class FaceSample(models.Model):
+    """One accepted enrolment photo; the employee's template is built from these"""
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='face_samples')
+    encoding_data = models.BinaryField(editable=False, help_text="Binary face encoding, see employees/face_encoding_format.py")
+    sharpness = models.FloatField(default=0)
+    brightness = models.FloatField(default=0)
+    face_size = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.employee.employee_id} sample {self.pk}"
+
+    class Meta:
+        ordering = ['employee', 'created_at']
+
+
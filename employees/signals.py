@@ -1,7 +1,7 @@
 # Create this file: employees/signals.py
 # Django signals for automatic actions
 
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 from .models import Employee
@@ -27,3 +27,19 @@ def check_birthday(sender, instance, **kwargs):
             # Birthday detected - can trigger email here or log it
             pass
 
+
+
+@receiver(post_save, sender=Employee)
+def refresh_face_index(sender, instance, update_fields=None, **kwargs):
+    """Keep the kiosk identification index in sync with face_encoding changes"""
+    if update_fields is not None and not {'face_encoding', 'face_encoding_data', 'face_encoding_backend', 'is_active'} & set(update_fields):
+        return
+    from .face_index import update_face_index
+    update_face_index(instance)
+
+
+@receiver(post_delete, sender=Employee)
+def drop_from_face_index(sender, instance, **kwargs):
+    from .face_index import drop_from_face_index
+    drop_from_face_index(instance.pk)
+
@@ -1,3 +1,455 @@
-from django.test import TestCase
+import json
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from .face_encoding_format import (
+    InvalidEncodingError, load_face_encoding, pack_encoding, store_face_encoding, unpack_encoding,
+)
+from .face_backends import get_face_backend
+from .face_embedding_cache import EmbeddingCache
+from .face_enrollment import build_template, rejection_reason
+from .face_verification_service import FaceVerificationService, VerificationQueueFull
+from .face_index import FaceIndex, get_face_index, invalidate_face_index
+from .models import Employee
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float64)
+    return vector / np.linalg.norm(vector)
+
+
+class FaceIndexTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.encodings = [_unit(rng.random(64)) for _ in range(20)]
+
+    def test_search_returns_nearest_first(self):
+        index = FaceIndex().build(enumerate(self.encodings, start=1))
+        probe = self.encodings[6]
+
+        results = index.search(probe, k=3)
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0][0], 7)
+        self.assertAlmostEqual(results[0][1], 0.0, places=3)
+        distances = [d for _, d in results]
+        self.assertEqual(distances, sorted(distances))
+        expected = np.linalg.norm(np.asarray(self.encodings) - probe, axis=1)
+        self.assertAlmostEqual(distances[1], float(np.sort(expected)[1]), places=4)
+
+    def test_replace_patches_row_in_place(self):
+        index = FaceIndex().build(enumerate(self.encodings, start=1))
+
+        self.assertTrue(index.replace(3, self.encodings[10]))
+        self.assertFalse(index.replace(99, self.encodings[10]))
+        self.assertEqual({pk for pk, _ in index.search(self.encodings[10], k=2)}, {3, 11})
+
+    @override_settings(FACE_DESCRIPTOR='lbp')
+    def test_index_follows_employee_face_encoding(self):
+        user = User.objects.create_user(username='kiosk', password='pass')
+        employee = Employee.objects.create(user=user, employee_id='EMP200')
+        store_face_encoding(employee, self.encodings[0])
+        employee.save()
+        legacy_user = User.objects.create_user(username='legacy-kiosk', password='pass')
+        Employee.objects.create(user=legacy_user, employee_id='EMP199', face_encoding=json.dumps(self.encodings[0].tolist()))
+        invalidate_face_index()
+
+        # The legacy JSON template is a raw-pixel vector, so it is left out until re-encoded
+        results = get_face_index().search(self.encodings[0], k=5)
+        self.assertEqual([pk for pk, _ in results], [employee.pk])
+
+        store_face_encoding(employee, self.encodings[5])
+        employee.save()
+        self.assertAlmostEqual(get_face_index().search(self.encodings[5], k=1)[0][1], 0.0, places=3)
+
+        employee.is_active = False
+        employee.save()
+        self.assertEqual(get_face_index().search(self.encodings[5], k=1), [])
+
+    def test_added_and_removed_copy_the_index(self):
+        index = FaceIndex().build(enumerate(self.encodings[:5], start=1))
+
+        grown = index.added(9, self.encodings[9])
+        self.assertEqual((len(index), len(grown)), (5, 6))
+        self.assertEqual(grown.search(self.encodings[9], k=1)[0][0], 9)
+        self.assertIsNone(index.added(10, self.encodings[9][:10]))
+        shrunk = grown.removed(2)
+        self.assertNotIn(2, shrunk)
+        self.assertEqual(shrunk.search(self.encodings[3], k=1)[0][0], 4)
+
+    @override_settings(FACE_DESCRIPTOR='lbp')
+    def test_saves_update_the_index_and_expiry_rebuilds_in_the_background(self):
+        from unittest import mock
+        from . import face_index
+
+        invalidate_face_index()
+        index = get_face_index()
+        employee = Employee.objects.create(user=User.objects.create_user(username='late', password='pass'), employee_id='EMP202')
+        store_face_encoding(employee, self.encodings[3])
+        employee.save()
+
+        # New enrolments are added without reading the table again
+        with self.assertNumQueries(0):
+            self.assertEqual(get_face_index().search(self.encodings[3], k=1)[0][0], employee.pk)
+        self.assertEqual(len(index), 0)
+
+        with mock.patch.object(face_index, '_built_at', 0.0), \
+                mock.patch.object(face_index.threading, 'Thread') as thread, \
+                self.settings(FACE_INDEX_MAX_AGE=1), self.assertNumQueries(0):
+            get_face_index()
+        thread.return_value.start.assert_called_once_with()
+        self.assertIs(thread.call_args.kwargs['target'], face_index._refresh)
+        face_index._refreshing = False
+
+        employee.delete()
+        self.assertEqual(get_face_index().search(self.encodings[3], k=1), [])
+
+    def test_raw_descriptor_is_not_indexed(self):
+        from .face_index import FaceIndexUnavailable
+
+        with self.assertRaises(FaceIndexUnavailable):
+            get_face_index()
+
+
+class FaceEncodingFormatTests(TestCase):
+    def test_round_trip_is_zero_copy_view(self):
+        vector = _unit(np.arange(1, 10001))
+        blob = pack_encoding(vector, dtype='float16')
+
+        decoded = unpack_encoding(blob)
+
+        self.assertEqual(decoded.dtype, np.float16)
+        self.assertFalse(decoded.flags.owndata)
+        self.assertLess(len(blob), len(json.dumps(vector.tolist())) / 8)
+        np.testing.assert_allclose(decoded, vector, atol=1e-3)
+
+    def test_rejects_corrupt_blob(self):
+        blob = pack_encoding([0.1, 0.2, 0.3], dtype='float32')
+        with self.assertRaises(InvalidEncodingError):
+            unpack_encoding(blob[:-1])
+        with self.assertRaises(InvalidEncodingError):
+            unpack_encoding(b'XX' + blob[2:])
+
+    def test_legacy_json_still_loads(self):
+        user = User.objects.create_user(username='legacy', password='pass')
+        employee = Employee.objects.create(user=user, employee_id='EMP201', face_encoding=json.dumps([0.6, 0.8]))
+
+        self.assertTrue(employee.has_face_encoding)
+        np.testing.assert_allclose(load_face_encoding(employee), [0.6, 0.8], rtol=1e-6)
+
+        store_face_encoding(employee, [0.6, 0.8])
+        employee.save()
+        employee.refresh_from_db()
+        self.assertEqual(employee.face_encoding, '')
+        np.testing.assert_allclose(load_face_encoding(employee), [0.6, 0.8], atol=1e-3)
+
+
+class FaceVerificationServiceTests(TestCase):
+    def test_worker_process_verifies_image_bytes(self):
+        import face_recognition
+
+        image_bytes = (Path(settings.BASE_DIR) / 'media' / 'face_images' / 'face_temp_1761470253725.jpg').read_bytes()
+        known = face_recognition.face_encodings_from_file(image_bytes)[0]
+        service = FaceVerificationService(workers=1, queue_size=0, timeout=60)
+        self.addCleanup(service.shutdown)
+
+        match, score = service.verify(image_bytes, known, 0.6)
+
+        self.assertTrue(match)
+        self.assertAlmostEqual(score, 1.0, places=3)
+        self.assertEqual(service.stats()['completed'], 1)
+
+    def test_full_queue_rejects_without_blocking(self):
+        service = FaceVerificationService(workers=0, queue_size=2, timeout=1, retry_after=7)
+        for _ in range(2):
+            service._slots.acquire()
+
+        with self.assertRaises(VerificationQueueFull) as ctx:
+            service.submit(b'', [0.0], 0.6)
+        self.assertEqual(ctx.exception.retry_after, 7)
+        self.assertEqual(service.stats()['rejected'], 1)
+
+
+class EmbeddingCacheTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='cached', password='pass')
+        self.employee = Employee.objects.create(user=user, employee_id='EMP202')
+        store_face_encoding(self.employee, [0.6, 0.8])
+        self.employee.save()
+
+    def test_repeat_lookups_hit_until_row_changes(self):
+        cache = EmbeddingCache(max_bytes=1024)
+
+        first = cache.get(self.employee)
+        self.assertIs(cache.get(Employee.objects.get(pk=self.employee.pk)), first)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(first.dtype, np.float32)
+
+        store_face_encoding(self.employee, [0.8, 0.6])
+        self.employee.save()
+        np.testing.assert_allclose(cache.get(self.employee), [0.8, 0.6], atol=1e-3)
+        self.assertEqual(cache.misses, 2)
+
+    def test_converted_rows_are_not_served_from_the_cache(self):
+        from django.core.management import call_command
+
+        cache = EmbeddingCache(max_bytes=1024)
+        cache.get(self.employee)
+
+        call_command('convert_face_encodings', rewrite=True, dtype='float32', stdout=open(os.devnull, 'w'))
+
+        converted = cache.get(Employee.objects.get(pk=self.employee.pk))
+        self.assertEqual(cache.misses, 2)
+        np.testing.assert_allclose(converted, [0.6, 0.8], atol=1e-3)
+
+    def test_evicts_least_recently_used_over_byte_cap(self):
+        user = User.objects.create_user(username='cached2', password='pass')
+        other = Employee.objects.create(user=user, employee_id='EMP203')
+        store_face_encoding(other, [1.0, 0.0])
+        other.save()
+        cache = EmbeddingCache(max_bytes=8)
+
+        cache.get(self.employee)
+        cache.get(other)
+
+        self.assertEqual(cache.stats()['entries'], 1)
+        self.assertEqual(cache.evictions, 1)
+        cache.get(self.employee)
+        self.assertEqual(cache.misses, 3)
+
+
+class FaceEnrollmentTests(TestCase):
+    def test_mean_template_ignores_outlier_sample(self):
+        rng = np.random.default_rng(1)
+        base = _unit(rng.random(64))
+        samples = [_unit(base + rng.normal(0, 0.01, 64)) for _ in range(4)] + [_unit(rng.random(64))]
+
+        template = build_template(samples, method='mean')
+
+        self.assertAlmostEqual(float(np.linalg.norm(template)), 1.0, places=5)
+        inliers = _unit(np.mean(samples[:4], axis=0))
+        self.assertLess(np.linalg.norm(template - inliers), 1e-4)
+        self.assertIn(build_template(samples, method='medoid').tolist(), [np.float32(v).tolist() for v in samples[:4]])
+
+    def test_rejects_poor_quality_samples(self):
+        good = {'sharpness': 500.0, 'brightness': 120.0, 'face_size': 150}
+        self.assertIsNone(rejection_reason(good))
+        self.assertEqual(rejection_reason(dict(good, sharpness=1.0)), 'image too blurry')
+        self.assertEqual(rejection_reason(dict(good, brightness=10.0)), 'too dark')
+        self.assertEqual(rejection_reason(dict(good, face_size=20)), 'face too small')
+
+
+class DetectorPoolTests(TestCase):
+    def test_concurrent_checkouts_never_share_a_detector(self):
+        import threading
+        import face_recognition
+
+        pool = face_recognition.DetectorPool(size=2)
+        start = threading.Barrier(6)
+        borrowed, errors = [], []
+
+        def check_in():
+            start.wait()
+            try:
+                for _ in range(5):
+                    with pool.acquire(timeout=5) as detector:
+                        borrowed.append(id(detector))
+                        self.assertLessEqual(pool.stats()['in_use'], 2)
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=check_in) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        stats = pool.stats()
+        self.assertEqual((stats['loaded'], stats['in_use'], stats['acquisitions']), (2, 0, 30))
+        self.assertLessEqual(stats['peak_in_use'], 2)
+        self.assertEqual(len(set(borrowed)), 2)
+
+    def test_exhausted_pool_times_out(self):
+        import face_recognition
+
+        pool = face_recognition.DetectorPool(size=1)
+        with pool.acquire():
+            with self.assertRaises(TimeoutError):
+                with pool.acquire(timeout=0.05):
+                    pass
+        with pool.acquire(timeout=0.05):
+            self.assertEqual(pool.stats()['in_use'], 1)
+
+
+class DetectionResolutionTests(TestCase):
+    def test_small_faces_in_large_photos_are_found_outside_the_check_in_path(self):
+        import cv2
+        import face_recognition
+
+        path = sorted((Path(settings.BASE_DIR) / 'media' / 'face_images').glob('*.jpg'))[0]
+        image = face_recognition.load_image_file(path)
+        top, right, bottom, left = face_recognition.face_locations(image)[0]
+        # A ~70px face on a 3200px canvas shrinks below the cascade window at 640px
+        face = cv2.resize(image, None, fx=70 / (right - left), fy=70 / (right - left), interpolation=cv2.INTER_AREA)
+        canvas = np.full((2400, 3200, 3), 128, dtype=np.uint8)
+        canvas[1000:1000 + face.shape[0], 1500:1500 + face.shape[1]] = face
+        encoded = cv2.imencode('.jpg', cv2.cvtColor(canvas, cv2.COLOR_RGB2BGR))[1].tobytes()
+
+        self.assertEqual(len(face_recognition.face_locations(canvas)), 1)
+        self.assertEqual(face_recognition.face_locations(canvas, max_dimension=640), [])
+        self.assertIsNotNone(face_recognition.enrollment_sample(encoded))
+
+
+class BatchFaceEncodingTests(TestCase):
+    def test_batches_match_single_image_encodings(self):
+        import face_recognition
+
+        paths = sorted((Path(settings.BASE_DIR) / 'media' / 'face_images').glob('*.jpg'))[:3]
+        images = [face_recognition.load_image_file(path) for path in paths]
+        locations = face_recognition.batch_face_locations(images, batch_size=2)
+        locations[0] = locations[0] * 2  # two faces from one image so a batch spans images
+
+        batched = face_recognition.batch_face_encodings(images, locations, batch_size=2)
+
+        self.assertEqual([len(encodings) for encodings in batched], [len(boxes) for boxes in locations])
+        for image, boxes, encodings in zip(images, locations, batched):
+            for expected, actual in zip(face_recognition.face_encodings(image, boxes), encodings):
+                self.assertEqual(actual.dtype, np.float32)
+                np.testing.assert_allclose(actual, expected, atol=1e-6)
+
+
+class FaceDescriptorTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.rois = rng.integers(0, 256, size=(6, 100, 100), dtype=np.uint8)
+
+    def test_lbp_is_compact_and_normalized(self):
+        import face_descriptors
+
+        features = face_descriptors.get_descriptor('lbp').compute(self.rois)
+
+        self.assertEqual(features.shape, (6, 250))
+        self.assertEqual(features.dtype, np.float32)
+        np.testing.assert_allclose(np.linalg.norm(features, axis=1), 1.0, rtol=1e-5)
+        # A brightness shift leaves LBP codes unchanged
+        shifted = np.clip(self.rois.astype(np.int16) // 2 + 10, 0, 255).astype(np.uint8)
+        np.testing.assert_allclose(face_descriptors.get_descriptor('lbp').compute(shifted[:1])[0], features[0], atol=0.05)
+
+    def test_pca_model_round_trip(self):
+        import face_descriptors
+
+        raw = face_descriptors.get_descriptor('raw').compute(self.rois)
+        mean, components = face_descriptors.fit_pca(raw, n_components=4)
+        path = os.path.join(tempfile.mkdtemp(), 'face_pca.npz')
+        self.addCleanup(os.remove, path)
+        face_descriptors.save_pca_model(path, mean, components, revision=3)
+
+        pca = face_descriptors.PCADescriptor(path)
+        features = pca.compute(self.rois)
+
+        self.assertEqual(pca.revision, 3)
+        self.assertEqual(features.shape, (6, 4))
+        np.testing.assert_allclose(np.linalg.norm(features, axis=1), 1.0, rtol=1e-5)
+
+    def test_blobs_record_descriptor_and_v1_still_reads(self):
+        from .face_encoding_format import encoding_descriptor
+
+        blob = pack_encoding([0.6, 0.8], dtype='float32', descriptor='lbp')
+        self.assertEqual(encoding_descriptor(blob), ('lbp', 1))
+
+        v1 = struct.pack('<2sBBI', b'FE', 1, 1, 2) + np.asarray([0.6, 0.8], dtype='<f4').tobytes()
+        self.assertEqual(encoding_descriptor(v1), ('raw', 1))
+        np.testing.assert_allclose(unpack_encoding(v1), [0.6, 0.8], rtol=1e-6)
+
+    def test_active_descriptor_and_its_tolerance_come_from_settings(self):
+        import face_descriptors
+        from .face_recognition_utils import match_tolerance
+
+        self.assertEqual(face_descriptors.get_descriptor().name, 'raw')
+        self.assertEqual(match_tolerance(), settings.FACE_RECOGNITION_TOLERANCE)
+        with self.settings(FACE_DESCRIPTOR='lbp', FACE_DESCRIPTOR_TOLERANCES={'lbp': 0.97}):
+            self.assertEqual(face_descriptors.get_descriptor().name, 'lbp')
+            self.assertEqual(match_tolerance(), 0.97)
+            self.assertEqual(match_tolerance('raw'), settings.FACE_RECOGNITION_TOLERANCE)
+
+    def test_migration_packs_legacy_json_as_raw_pixels(self):
+        from importlib import import_module
+        from django.apps import apps
+        from .face_encoding_format import encoding_descriptor
+
+        migration = import_module('employees.migrations.0002_face_encoding_data')
+        legacy = Employee.objects.create(
+            user=User.objects.create_user(username='legacy-json', password='pass'), employee_id='EMP212',
+            face_encoding=json.dumps([0.6, 0.8]),
+        )
+        template = Employee.objects.create(
+            user=User.objects.create_user(username='legacy-template', password='pass'), employee_id='EMP213',
+            face_encoding=json.dumps([12.0, 200.0]),
+        )
+
+        with self.settings(FACE_DESCRIPTOR='lbp'):
+            migration.convert_json_encodings(apps, None)
+
+        for employee, backend in ((legacy, ''), (template, 'opencv_template')):
+            employee.refresh_from_db()
+            self.assertEqual(employee.face_encoding, '')
+            self.assertEqual(employee.face_encoding_backend, backend)
+            self.assertEqual(encoding_descriptor(employee.face_encoding_data), ('raw', 1))
+        np.testing.assert_allclose(unpack_encoding(legacy.face_encoding_data), [0.6, 0.8], atol=1e-3)
+        np.testing.assert_allclose(unpack_encoding(template.face_encoding_data), [12.0, 200.0], atol=1e-1)
+
+
+class FaceBackendTests(TestCase):
+    def setUp(self):
+        self.image_bytes = (Path(settings.BASE_DIR) / 'media' / 'face_images' / 'face_temp_1761470253725.jpg').read_bytes()
+
+    def test_backends_share_interface(self):
+        for name in ('opencv', 'opencv_template'):
+            backend = get_face_backend(name)
+            self.assertIs(get_face_backend(name), backend)
+            self.assertEqual(len(backend.detect(self.image_bytes)), 1)
+            known = backend.encode(self.image_bytes)
+            match, score = backend.verify(known, self.image_bytes, 0.6)
+            self.assertTrue(match, name)
+            self.assertAlmostEqual(score, 1.0, places=3)
+
+        with self.assertRaises(ValueError):
+            get_face_backend('missing')
+
+    @override_settings(FACE_BACKEND='opencv_template')
+    def test_enrollment_uses_and_records_the_configured_backend(self):
+        from .face_encoding_format import load_face_backend
+        from .face_enrollment import enroll_employee
+        from .face_recognition_utils import match_tolerance
+
+        employee = Employee.objects.create(
+            user=User.objects.create_user(username='template', password='pass'), employee_id='EMP213',
+        )
+        result = enroll_employee(employee, [self.image_bytes])
+
+        self.assertTrue(result['enrolled'], result)
+        employee.refresh_from_db()
+        self.assertEqual(load_face_backend(employee), 'opencv_template')
+        self.assertEqual(match_tolerance(), settings.FACE_BACKEND_TOLERANCES['opencv_template'])
+        self.assertEqual(match_tolerance(backend='opencv'), settings.FACE_RECOGNITION_TOLERANCE)
+
+    def test_face_helpers_do_not_load_opencv_at_import(self):
+        code = (
+            "import django, sys; django.setup(); "
+            "import employees.face_recognition_utils, attendance.utils; "
+            "print('cv2' in sys.modules)"
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='smart_hr_backend.settings')
+        output = subprocess.run([sys.executable, '-c', code], cwd=settings.BASE_DIR, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), 'False')
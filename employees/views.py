@@ -86,7 +86,8 @@ def employee_detail(request, employee_id):
             cursor.execute(r"""
                 SELECT e.id, e.employee_id, e.phone_number, e.role, e.date_of_birth, e.emergency_contact,
                        e.address, e.floor_number, e.cabin_number, e.salary_base,
-                       e.face_encoding, e.created_at, e.updated_at,
+                       (e.face_encoding_data IS NOT NULL OR e.face_encoding != '') AS has_face_encoding,
+                       e.created_at, e.updated_at,
                        u.id as user_id, u.username, u.first_name, u.last_name, u.email,
                        d.name as dept_name
                 FROM employees_employee e
@@ -103,7 +104,7 @@ def employee_detail(request, employee_id):
 
         # Build lightweight namespaces to mimic model attributes used by templates
         (eid, empid, phone, role, dob, emergency, address, floor, cabin, salary_base,
-         face_encoding, created_at, updated_at, user_id, username, first_name, last_name, email, dept_name) = row
+         has_face_encoding, created_at, updated_at, user_id, username, first_name, last_name, email, dept_name) = row
 
         def _get_full_name(fn=first_name or '', ln=last_name or ''):
             return f"{(fn or '').strip()} {(ln or '').strip()}".strip()
@@ -128,7 +129,7 @@ def employee_detail(request, employee_id):
             floor_number=floor,
             cabin_number=cabin or '',
             salary_base=salary_val,
-            face_encoding=face_encoding,
+            has_face_encoding=bool(has_face_encoding),
             face_image=None,
             created_at=created_at,
             updated_at=updated_at,
@@ -223,13 +224,20 @@ def upload_face_image(request, employee_id):
             }, status=400)
             
         image = request.FILES['face_image']
+        
+        # Generate face encoding from the upload in memory (before storage may move a temp upload)
+        from .face_backends import get_face_backend
+        from .face_encoding_format import store_face_encoding
+        from .face_embedding_cache import invalidate_reference_embedding
+        from attendance.image_hashing import hash_upload, record_fingerprint, upload_digest
+        backend = get_face_backend()
+        face_encoding = backend.encode(image)
+        image_hash = hash_upload(image)
+        digest = upload_digest(image)
+        
         employee.face_image = image
         employee.save()
         
-        # Generate face encoding
-        from .face_recognition_utils import encode_face
-        face_encoding = encode_face(employee.face_image.path)
-        
         if face_encoding is None:
             return JsonResponse({
                 'success': False,
@@ -237,8 +245,13 @@ def upload_face_image(request, employee_id):
             }, status=400)
             
         # Store the encoding
-        employee.face_encoding = json.dumps(face_encoding)
+        store_face_encoding(employee, face_encoding, descriptor=backend.descriptor)
         employee.save()
+        invalidate_reference_embedding(employee.pk)
+
+        # Remember the registration photo so it cannot be replayed at check-in
+        if image_hash is not None:
+            record_fingerprint(image_hash, employee, 'FACE', image_name=employee.face_image.name, digest=digest)
         
         return JsonResponse({
             'success': True,
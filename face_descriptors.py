@@ -0,0 +1,223 @@
+"""
+Face descriptor backends for face_recognition.face_encodings
+
+A descriptor turns a stack of equalized 100x100 face ROIs into compact,
+L2-normalized float32 vectors:
+
+    raw  the 10,000 equalized pixels (the original encoding)
+    lbp  spatial histogram of uniform rotation-invariant LBP codes, 5x5 grid -> 250-d
+    pca  projection of the raw vector onto components fitted on enrolled faces -> <=128-d
+
+The active backend is chosen with settings.FACE_DESCRIPTOR (default 'raw';
+compact descriptors need their own match tolerance, see
+settings.FACE_DESCRIPTOR_TOLERANCES). The PCA model is a versioned .npz file (FACE_PCA_MODEL_PATH)
+loaded once per process; fit one with `python manage.py fit_face_pca`.
+"""
+
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Used when Django settings are not available (benchmarks, scripts)
+DEFAULT_DESCRIPTOR = 'raw'
+PCA_MODEL_PATH = os.environ.get(
+    'FACE_PCA_MODEL_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'face_models', 'face_pca.npz'),
+)
+PCA_MODEL_FORMAT = 1
+
+
+def _normalize(features: np.ndarray) -> np.ndarray:
+    """L2-normalize every row in place"""
+    norms = np.sqrt(np.einsum('ij,ij->i', features, features))
+    norms[norms == 0] = 1.0
+    features /= norms[:, None]
+    return features
+
+
+class RawDescriptor:
+    """Equalized pixels, kept so templates enrolled before descriptors existed still verify"""
+    name = 'raw'
+    code = 1
+    revision = 1
+
+    @property
+    def dimension(self) -> int:
+        return 100 * 100
+
+    def compute(self, rois: np.ndarray) -> np.ndarray:
+        """(N, 100, 100) uint8 ROIs -> (N, 10000) float32"""
+        return _normalize(rois.reshape(len(rois), -1).astype(np.float32))
+
+
+class LBPDescriptor:
+    """
+    Uniform rotation-invariant LBP (8 neighbours, radius 1) histogrammed over a
+    grid of cells, as used by OpenCV's LBPH recognizer. Cell histograms are
+    square-rooted (Hellinger) before normalization so Euclidean distance behaves.
+    """
+    name = 'lbp'
+    code = 2
+    revision = 1
+    grid = 5
+    bins = 10  # codes 0..8 for uniform patterns plus one bin for everything else
+
+    # Neighbour offsets (dy, dx) in circular order
+    _OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1))
+
+    def __init__(self):
+        self._cells = {}
+
+    @property
+    def dimension(self) -> int:
+        return self.grid * self.grid * self.bins
+
+    def _cell_map(self, height: int, width: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Cell index of every pixel and the pixel count of every cell"""
+        key = (height, width)
+        if key not in self._cells:
+            rows = np.minimum(np.arange(height) * self.grid // height, self.grid - 1)
+            cols = np.minimum(np.arange(width) * self.grid // width, self.grid - 1)
+            cell = (rows[:, None] * self.grid + cols[None, :]).astype(np.int64)
+            counts = np.bincount(cell.ravel(), minlength=self.grid * self.grid).astype(np.float32)
+            self._cells[key] = (cell, counts)
+        return self._cells[key]
+
+    def codes(self, rois: np.ndarray) -> np.ndarray:
+        """riu2 LBP code (0..9) of every interior pixel, shape (N, H-2, W-2)"""
+        rois = rois.astype(np.int16)
+        height, width = rois.shape[1:]
+        center = rois[:, 1:-1, 1:-1]
+        bits = np.stack([
+            rois[:, 1 + dy:height - 1 + dy, 1 + dx:width - 1 + dx] >= center
+            for dy, dx in self._OFFSETS
+        ]).astype(np.uint8)
+        transitions = np.abs(np.diff(bits, axis=0, append=bits[:1])).sum(axis=0)
+        ones = bits.sum(axis=0)
+        return np.where(transitions <= 2, ones, self.bins - 1).astype(np.int64)
+
+    def compute(self, rois: np.ndarray) -> np.ndarray:
+        """(N, 100, 100) uint8 ROIs -> (N, 250) float32"""
+        codes = self.codes(rois)
+        count = len(codes)
+        cell, pixels = self._cell_map(*codes.shape[1:])
+        cells = self.grid * self.grid
+        # One bincount for the whole batch: (image, cell, code) flattened
+        flat = (np.arange(count)[:, None, None] * cells + cell[None]) * self.bins + codes
+        hist = np.bincount(flat.ravel(), minlength=count * cells * self.bins).astype(np.float32)
+        hist = hist.reshape(count, cells, self.bins) / pixels[None, :, None]
+        return _normalize(np.sqrt(hist).reshape(count, -1))
+
+
+class PCADescriptor:
+    """Projects raw vectors onto principal components loaded from a versioned model file"""
+    name = 'pca'
+    code = 3
+
+    def __init__(self, path: str = PCA_MODEL_PATH):
+        self.path = path
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self) -> dict:
+        with self._lock:
+            if self._model is None:
+                if not os.path.exists(self.path):
+                    raise RuntimeError(
+                        f"PCA face model not found at {self.path}; run `python manage.py fit_face_pca`"
+                    )
+                with np.load(self.path) as data:
+                    if int(data['format']) != PCA_MODEL_FORMAT:
+                        raise RuntimeError(f"Unsupported PCA face model format in {self.path}")
+                    self._model = {
+                        'revision': int(data['revision']),
+                        'mean': data['mean'].astype(np.float32),
+                        'components': np.ascontiguousarray(data['components'], dtype=np.float32),
+                    }
+            return self._model
+
+    @property
+    def revision(self) -> int:
+        return self.load()['revision']
+
+    @property
+    def dimension(self) -> int:
+        return self.load()['components'].shape[0]
+
+    def compute(self, rois: np.ndarray) -> np.ndarray:
+        """(N, 100, 100) uint8 ROIs -> (N, k) float32"""
+        model = self.load()
+        raw = RawDescriptor().compute(rois)
+        return _normalize((raw - model['mean']) @ model['components'].T)
+
+
+def fit_pca(raw_vectors: np.ndarray, n_components: int = 128) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fit principal components on raw descriptor vectors.
+
+    Returns:
+        (mean, components) with components shaped (k, 10000), k <= n_components
+    """
+    data = np.asarray(raw_vectors, dtype=np.float32)
+    if data.ndim != 2 or len(data) < 2:
+        raise ValueError("At least two face vectors are needed to fit PCA")
+    mean = data.mean(axis=0)
+    # Economy SVD of the centred data; rows of vt are the principal axes
+    _, singular, vt = np.linalg.svd(data - mean, full_matrices=False)
+    k = int(min(n_components, int((singular > 1e-6).sum())))
+    return mean, vt[:k].astype(np.float32)
+
+
+def save_pca_model(path: str, mean: np.ndarray, components: np.ndarray, revision: int) -> None:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as handle:
+        np.savez(handle, format=PCA_MODEL_FORMAT, revision=revision, mean=mean, components=components)
+
+
+def pca_model_revision(path: str = PCA_MODEL_PATH) -> int:
+    """Revision of the model at path, or 0 when there is none"""
+    if not os.path.exists(path):
+        return 0
+    with np.load(path) as data:
+        return int(data['revision'])
+
+
+_DESCRIPTORS: Dict[str, object] = {
+    'raw': RawDescriptor(),
+    'lbp': LBPDescriptor(),
+    'pca': PCADescriptor(),
+}
+DESCRIPTORS_BY_CODE = {descriptor.code: name for name, descriptor in _DESCRIPTORS.items()}
+
+
+def default_descriptor() -> str:
+    """Name of the active descriptor: settings.FACE_DESCRIPTOR, or DEFAULT_DESCRIPTOR outside Django"""
+    try:
+        from django.conf import settings
+        return getattr(settings, 'FACE_DESCRIPTOR', DEFAULT_DESCRIPTOR)
+    except Exception:
+        return DEFAULT_DESCRIPTOR
+
+
+def get_descriptor(name: Optional[str] = None):
+    """Descriptor backend by name (defaults to FACE_DESCRIPTOR)"""
+    name = name or default_descriptor()
+    try:
+        return _DESCRIPTORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown face descriptor: {name}")
+
+
+def load_descriptor() -> int:
+    """Load the active descriptor's model (if any) up front; returns its dimension"""
+    return get_descriptor().dimension
+
+
+def is_current(name: str, revision: int) -> bool:
+    """Can a probe computed now be compared with a template stored as (name, revision)?"""
+    try:
+        return get_descriptor(name).revision == revision
+    except (ValueError, RuntimeError):
+        return False
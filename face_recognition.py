@@ -4,30 +4,261 @@ This module provides the same API as the popular face_recognition library
 but uses OpenCV for face detection and recognition.
 """
 
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
 import cv2
 import numpy as np
-from typing import List, Tuple, Any
+from typing import List, Tuple, Any, Optional
+
+import face_descriptors
 
-# Initialize face cascade
-_face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+HAAR_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
 
-def load_image_file(file_path: str) -> np.ndarray:
+
+def _setting(name: str, default: Any) -> Any:
+    """A FACE_* value from Django settings, or the default when run outside Django (benchmarks)"""
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+class DetectorPool:
+    """
+    Pool of Haar cascade detectors shared by request threads.
+
+    A CascadeClassifier must not be used by two threads at once, so each
+    concurrent face_locations call borrows its own instance. Instances are
+    created lazily up to `size` (or all at once by warm()) and reused for the
+    life of the process, so simultaneous check-ins never reload the model.
+    """
+
+    def __init__(self, size: Optional[int] = None, cascade_path: str = HAAR_CASCADE_PATH):
+        self.size = max(1, size or os.cpu_count() or 1)
+        self.cascade_path = cascade_path
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._acquisitions = 0
+        self._waits = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _create(self) -> cv2.CascadeClassifier:
+        detector = cv2.CascadeClassifier(self.cascade_path)
+        if detector.empty():
+            raise RuntimeError(f"Could not load face cascade from {self.cascade_path}")
+        return detector
+
+    def warm(self) -> int:
+        """Load every detector up front (call at worker start-up). Returns the pool size."""
+        while True:
+            with self._lock:
+                if self._created >= self.size:
+                    return self._created
+                self._created += 1
+            try:
+                self._idle.put(self._create())
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+    def _checkout(self, timeout: Optional[float]) -> cv2.CascadeClassifier:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._create()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No face detector available within {timeout}s")
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None):
+        """Borrow a detector for the duration of a with-block"""
+        started = time.perf_counter()
+        detector = self._checkout(timeout)
+        waited = time.perf_counter() - started
+
+        with self._lock:
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._acquisitions += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            if waited > 0.001:
+                self._waits += 1
+        try:
+            yield detector
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._idle.put(detector)
+
+    def stats(self) -> dict:
+        """Snapshot of pool usage: size, loaded/in-use detectors and wait times (ms)"""
+        with self._lock:
+            acquisitions = self._acquisitions
+            return {
+                'size': self.size,
+                'loaded': self._created,
+                'in_use': self._in_use,
+                'peak_in_use': self._peak_in_use,
+                'acquisitions': acquisitions,
+                'waits': self._waits,
+                'avg_wait_ms': round(self._total_wait * 1000 / acquisitions, 3) if acquisitions else 0.0,
+                'max_wait_ms': round(self._max_wait * 1000, 3),
+            }
+
+
+# Process-wide detector pool; settings.FACE_DETECTOR_POOL_SIZE (0 = the CPU count)
+detector_pool = DetectorPool(size=int(_setting('FACE_DETECTOR_POOL_SIZE', 0)) or None)
+
+
+def warm_detector_pool() -> int:
+    """Pre-load all detectors so the first check-ins do not pay the model load"""
+    return detector_pool.warm()
+
+
+def detector_pool_stats() -> dict:
+    return detector_pool.stats()
+
+# Longest image side used by the check-in path (detect_faces_in_file, face_encodings_from_file);
+# larger uploads are detected on a downscaled copy. 0 disables downscaling. Boxes are always
+# reported in full-resolution coordinates. face_locations and enrolment detect at full resolution
+# unless given a max_dimension.
+DETECTION_MAX_DIMENSION = int(_setting('FACE_DETECTION_MAX_DIMENSION', 640))
+
+# Smallest face (pixels, full resolution) the cascade looks for
+MIN_FACE_SIZE = 30
+
+# JPEG decoders can produce 1/2, 1/4 and 1/8 scale images directly
+_REDUCED_GRAYSCALE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+)
+
+def read_image_bytes(source: Any) -> np.ndarray:
+    """
+    Return the encoded bytes of an image as a uint8 buffer for cv2.imdecode
+    
+    Args:
+        source: A file path, raw bytes, a binary file-like object or a Django
+            File/UploadedFile (read in memory, no temporary file is written)
+    """
+    if isinstance(source, np.ndarray):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return np.frombuffer(source, dtype=np.uint8)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as fh:
+            return np.frombuffer(fh.read(), dtype=np.uint8)
+    if hasattr(source, 'chunks'):
+        # Django File/UploadedFile: chunks() rewinds first and works for in-memory and temp-file uploads
+        return np.frombuffer(b''.join(source.chunks()), dtype=np.uint8)
+    if hasattr(source, 'read'):
+        position = source.tell() if hasattr(source, 'tell') else None
+        data = source.read()
+        if position is not None and hasattr(source, 'seek'):
+            # Leave the stream where we found it so callers can still save it
+            source.seek(position)
+        return np.frombuffer(data, dtype=np.uint8)
+    raise TypeError(f"Unsupported image source: {type(source).__name__}")
+
+def load_image_file(file_path: Any) -> np.ndarray:
     """
     Loads an image file (.jpg, .png, etc.) into a numpy array
     
     Args:
-        file_path: Path to the image file
+        file_path: Path to the image file, or bytes / file-like / UploadedFile
+            holding the encoded image (decoded in memory with cv2.imdecode)
         
     Returns:
-        Numpy array representing the image in BGR format
+        Numpy array representing the image in RGB format
     """
-    image = cv2.imread(str(file_path))
+    image = cv2.imdecode(read_image_bytes(file_path), cv2.IMREAD_COLOR)
     if image is None:
         raise ValueError(f"Could not load image from {file_path}")
     # Convert BGR to RGB to match face_recognition library format
     return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
 
-def face_locations(img: np.ndarray, number_of_times_to_upsample: int = 1, model: str = "hog") -> List[Tuple[int, int, int, int]]:
+def _detect_gray(gray: np.ndarray, scale: float = 1.0) -> List[Tuple[int, int, int, int]]:
+    """
+    Run the Haar cascade on a grayscale image and return (top, right, bottom, left) boxes.
+    scale is the image's size relative to the original, so MIN_FACE_SIZE keeps meaning
+    original pixels when detecting on a downscaled copy.
+    """
+    min_size = max(1, int(round(MIN_FACE_SIZE * scale)))
+    # Detect faces with a pooled detector (cascades are not thread-safe)
+    with detector_pool.acquire() as detector:
+        faces = detector.detectMultiScale(
+            gray, 
+            scaleFactor=1.1, 
+            minNeighbors=5,
+            minSize=(min_size, min_size)
+        )
+    
+    # Convert to face_recognition library format (top, right, bottom, left)
+    locations = []
+    for (x, y, w, h) in faces:
+        top = int(y)
+        right = int(x + w)
+        bottom = int(y + h)
+        left = int(x)
+        locations.append((top, right, bottom, left))
+    
+    return locations
+
+def _downscale(gray: np.ndarray, max_dimension: int) -> np.ndarray:
+    """Shrink so the longest side is at most max_dimension (no-op for small images)"""
+    height, width = gray.shape[:2]
+    longest = max(height, width)
+    if not max_dimension or longest <= max_dimension:
+        return gray
+    scale = max_dimension / float(longest)
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+def _map_locations(locations, small_shape, full_shape) -> List[Tuple[int, int, int, int]]:
+    """Map boxes found on a downscaled image back to full-resolution coordinates"""
+    if tuple(small_shape[:2]) == tuple(full_shape[:2]):
+        return locations
+    scale_y = full_shape[0] / float(small_shape[0])
+    scale_x = full_shape[1] / float(small_shape[1])
+    mapped = []
+    for (top, right, bottom, left) in locations:
+        mapped.append((
+            max(0, int(round(top * scale_y))),
+            min(full_shape[1], int(round(right * scale_x))),
+            min(full_shape[0], int(round(bottom * scale_y))),
+            max(0, int(round(left * scale_x))),
+        ))
+    return mapped
+
+def face_locations(img: np.ndarray, number_of_times_to_upsample: int = 1, model: str = "hog",
+                   max_dimension: Optional[int] = None) -> List[Tuple[int, int, int, int]]:
     """
     Returns an array of bounding boxes of human faces in an image
     
@@ -35,45 +266,179 @@ def face_locations(img: np.ndarray, number_of_times_to_upsample: int = 1, model:
         img: An image (as a numpy array)
         number_of_times_to_upsample: How many times to upsample the image looking for faces
         model: Which face detection model to use. "hog" or "cnn"
+        max_dimension: Detect on a copy whose longest side is at most this many pixels
+            (default: full resolution)
         
     Returns:
         A list of tuples of found face locations in css (top, right, bottom, left) order
     """
     # Convert RGB to grayscale for face detection
-    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+    small = _downscale(gray, max_dimension or 0)
+    
+    return _map_locations(_detect_gray(small, small.shape[0] / float(gray.shape[0])), small.shape, gray.shape)
+
+def _image_size(buffer: np.ndarray) -> Optional[Tuple[int, int]]:
+    """(width, height) from the image header without decoding pixels"""
+    from io import BytesIO
+    try:
+        from PIL import Image
+        with Image.open(BytesIO(buffer.tobytes())) as probe:
+            return probe.size
+    except Exception:
+        return None
+
+def _decode_small(buffer: np.ndarray, max_dimension: Optional[int]):
+    if max_dimension is None:
+        max_dimension = DETECTION_MAX_DIMENSION
+
+    flag = cv2.IMREAD_GRAYSCALE
+    size = _image_size(buffer)
+    if size and max_dimension:
+        longest = max(size)
+        for factor, reduced_flag in _REDUCED_GRAYSCALE_FLAGS:
+            if longest // factor >= max_dimension:
+                flag = reduced_flag
+                break
+
+    gray = cv2.imdecode(buffer, flag)
+    if gray is None:
+        raise ValueError("Could not decode image data")
+    small = _downscale(gray, max_dimension)
+    # Without a header size the decode was full resolution
+    longest = max(size) if size else max(gray.shape[:2])
+    return small, size, min(1.0, max(small.shape[:2]) / float(longest))
+
+def decode_for_detection(buffer: np.ndarray, max_dimension: Optional[int] = None) -> np.ndarray:
+    """
+    Decode an encoded image straight into a small grayscale image for detection.
     
-    # Detect faces
-    faces = _face_cascade.detectMultiScale(
-        gray, 
-        scaleFactor=1.1, 
-        minNeighbors=5,
-        minSize=(30, 30)
-    )
+    JPEGs are decoded at 1/2, 1/4 or 1/8 scale (never below max_dimension) so the
+    full-resolution pixels are not materialised just to be thrown away.
+    """
+    return _decode_small(buffer, max_dimension)[0]
+
+def _detect_buffer(buffer: np.ndarray, max_dimension: Optional[int], decode_full: bool = True):
+    """Detect on a reduced decode; returns (full-resolution boxes, full grayscale image or None)"""
+    small, size, scale = _decode_small(buffer, max_dimension)
+    locations = _detect_gray(small, scale)
+    if not locations:
+        return [], None
+
+    if decode_full or size is None:
+        # Only now pay for the full-resolution decode, which the ROI crop needs anyway
+        gray = cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            raise ValueError("Could not decode image data")
+        return _map_locations(locations, small.shape, gray.shape), gray
+
+    width, height = size
+    if width != height and (small.shape[0] > small.shape[1]) != (height > width):
+        # EXIF orientation was applied by the decoder; the header size is pre-rotation
+        width, height = height, width
+    return _map_locations(locations, small.shape, (height, width)), None
+
+def detect_faces_in_file(file_path: Any, max_dimension: Optional[int] = None) -> List[Tuple[int, int, int, int]]:
+    """
+    Downscale-then-detect pipeline: decode at reduced resolution, detect on the
+    small image and return boxes in full-resolution coordinates.
     
-    # Convert to face_recognition library format (top, right, bottom, left)
-    locations = []
-    for (x, y, w, h) in faces:
-        top = y
-        right = x + w
-        bottom = y + h
-        left = x
-        locations.append((top, right, bottom, left))
+    file_path may also be bytes, a file-like object or an UploadedFile.
+    """
+    return _detect_buffer(read_image_bytes(file_path), max_dimension, decode_full=False)[0]
+
+def face_encodings_from_file(file_path: Any, max_dimension: Optional[int] = None,
+                             descriptor: Optional[str] = None) -> List[np.ndarray]:
+    """
+    Encode every face in an image file using the downscale-then-detect pipeline.
+    ROIs are cropped from the original resolution image, so encodings keep full detail.
     
-    return locations
+    file_path may also be bytes, a file-like object or an UploadedFile.
+    descriptor selects the face_descriptors backend (defaults to FACE_DESCRIPTOR).
+    """
+    locations, gray = _detect_buffer(read_image_bytes(file_path), max_dimension)
+    if not locations:
+        return []
+    return _encode_gray(gray, locations, descriptor)
+
+ENCODING_SIZE = (100, 100)
+
+
+def _face_roi(gray: np.ndarray, location: Tuple[int, int, int, int]) -> Optional[np.ndarray]:
+    """Crop, resize to ENCODING_SIZE and histogram-equalize one face (uint8), or None for an empty box"""
+    top, right, bottom, left = location
+    face_roi = gray[top:bottom, left:right]
+    if face_roi.size == 0:
+        return None
+    # Resize to standard size (100x100 for simplicity) and equalize for better consistency
+    return cv2.equalizeHist(cv2.resize(face_roi, ENCODING_SIZE))
+
+def _encode_gray(gray: np.ndarray, locations, descriptor: Optional[str] = None) -> List[np.ndarray]:
+    rois = [roi for roi in (_face_roi(gray, location) for location in locations) if roi is not None]
+    if not rois:
+        return []
+    # Describe every ROI in one vectorized pass (see face_descriptors)
+    return list(face_descriptors.get_descriptor(descriptor).compute(np.stack(rois)))
+
+def face_quality(gray: np.ndarray, location: Tuple[int, int, int, int]) -> dict:
+    """
+    Score a detected face for enrolment.
+    
+    Args:
+        gray: Grayscale image the location refers to
+        location: (top, right, bottom, left) face box
+        
+    Returns:
+        dict with sharpness (variance of the Laplacian over the face, higher is
+        sharper), brightness (mean intensity 0-255) and face_size (shorter box side in pixels)
+    """
+    top, right, bottom, left = location
+    roi = gray[top:bottom, left:right]
+    if roi.size == 0:
+        return {'sharpness': 0.0, 'brightness': 0.0, 'face_size': 0}
+    return {
+        'sharpness': float(cv2.Laplacian(roi, cv2.CV_64F).var()),
+        'brightness': float(roi.mean()),
+        'face_size': int(min(bottom - top, right - left)),
+    }
+
+def enrollment_sample(source: Any, max_dimension: Optional[int] = 0,
+                      descriptor: Optional[str] = None) -> Optional[Tuple[np.ndarray, dict]]:
+    """
+    Encode and score the largest face in one enrolment photo.
+    
+    Args:
+        source: Image path, bytes, file-like object or UploadedFile
+        max_dimension: Detection resolution (see detect_faces_in_file); enrolment
+            photos are detected at full resolution by default
+        descriptor: face_descriptors backend (defaults to FACE_DESCRIPTOR)
+        
+    Returns:
+        (encoding, quality) or None when no face is found
+    """
+    locations, gray = _detect_buffer(read_image_bytes(source), max_dimension)
+    if not locations:
+        return None
+    largest = max(locations, key=lambda box: (box[2] - box[0]) * (box[1] - box[3]))
+    encodings = _encode_gray(gray, [largest], descriptor)
+    if not encodings:
+        return None
+    return encodings[0], face_quality(gray, largest)
 
 def face_encodings(face_image: np.ndarray, known_face_locations: List[Tuple[int, int, int, int]] = None, 
-                  num_jitters: int = 1, model: str = "small") -> List[np.ndarray]:
+                  num_jitters: int = 1, model: str = "small", descriptor: Optional[str] = None) -> List[np.ndarray]:
     """
-    Given an image, return the 128-dimension face encoding for each face in the image.
+    Given an image, return a face encoding for each face in the image.
     
     Args:
         face_image: The image that contains one or more faces
         known_face_locations: Optional - the bounding boxes of each face if you already know them
         num_jitters: How many times to re-sample the face when calculating encoding
         model: Optional - which model to use. "large" or "small"
+        descriptor: face_descriptors backend (defaults to FACE_DESCRIPTOR)
         
     Returns:
-        A list of 128-dimensional face encodings (one for each face in the image)
+        A list of unit-length float32 face encodings (one for each face in the image)
     """
     if known_face_locations is None:
         known_face_locations = face_locations(face_image)
@@ -81,27 +446,7 @@ def face_encodings(face_image: np.ndarray, known_face_locations: List[Tuple[int,
     # Convert RGB to grayscale
     gray = cv2.cvtColor(face_image, cv2.COLOR_RGB2GRAY)
     
-    encodings = []
-    for (top, right, bottom, left) in known_face_locations:
-        # Extract face ROI
-        face_roi = gray[top:bottom, left:right]
-        
-        if face_roi.size > 0:
-            # Resize to standard size (100x100 for simplicity)
-            face_roi = cv2.resize(face_roi, (100, 100))
-            
-            # Apply histogram equalization for better consistency
-            face_roi = cv2.equalizeHist(face_roi)
-            
-            # Flatten to create a simple "encoding"
-            encoding = face_roi.flatten().astype(np.float64)
-            
-            # Normalize the encoding
-            encoding = encoding / np.linalg.norm(encoding)
-            
-            encodings.append(encoding)
-    
-    return encodings
+    return _encode_gray(gray, known_face_locations, descriptor)
 
 def compare_faces(known_face_encodings: List[np.ndarray], face_encoding_to_check: np.ndarray, 
                  tolerance: float = 0.6) -> List[bool]:
@@ -116,20 +461,13 @@ def compare_faces(known_face_encodings: List[np.ndarray], face_encoding_to_check
     Returns:
         A list of True/False values indicating which known_face_encodings match the face encoding to check
     """
-    if not known_face_encodings:
+    if len(known_face_encodings) == 0:
         return []
     
-    matches = []
-    for known_encoding in known_face_encodings:
-        # Calculate Euclidean distance
-        distance = np.linalg.norm(known_encoding - face_encoding_to_check)
-        
-        # Convert distance to similarity (lower distance = higher similarity)
-        similarity = 1.0 - (distance / 2.0)  # Normalize to 0-1 range
-        
-        matches.append(similarity > tolerance)
+    # Convert distance to similarity (lower distance = higher similarity)
+    similarity = 1.0 - (face_distance(known_face_encodings, face_encoding_to_check) / 2.0)  # Normalize to 0-1 range
     
-    return matches
+    return (similarity > tolerance).tolist()
 
 def face_distance(face_encodings: List[np.ndarray], face_to_compare: np.ndarray) -> np.ndarray:
     """
@@ -143,17 +481,18 @@ def face_distance(face_encodings: List[np.ndarray], face_to_compare: np.ndarray)
     Returns:
         A numpy ndarray with the distance for each face in the same order as the 'faces' array
     """
-    if not face_encodings:
+    if len(face_encodings) == 0:
         return np.array([])
     
-    distances = []
-    for encoding in face_encodings:
-        distance = np.linalg.norm(encoding - face_to_compare)
-        distances.append(distance)
-    
-    return np.array(distances)
+    # One broadcast subtraction over the stacked encodings instead of a norm per encoding
+    return np.linalg.norm(np.asarray(face_encodings) - face_to_compare, axis=1)
 
 # Additional utility functions that might be useful
+def _chunks(items: List[Any], size: int):
+    size = max(1, int(size or 1))
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
 def batch_face_locations(images: List[np.ndarray], number_of_times_to_upsample: int = 1, 
                         batch_size: int = 128) -> List[List[Tuple[int, int, int, int]]]:
     """
@@ -162,12 +501,70 @@ def batch_face_locations(images: List[np.ndarray], number_of_times_to_upsample:
     Args:
         images: List of images to search for faces in
         number_of_times_to_upsample: How many times to upsample each image looking for faces
-        batch_size: Number of images to include in each GPU processing batch
+        batch_size: Number of images in flight at once; each batch is spread over the
+            detector pool's threads (OpenCV releases the GIL while detecting)
         
     Returns:
         A list of lists of face locations for each image
     """
-    return [face_locations(img, number_of_times_to_upsample) for img in images]
+    from concurrent.futures import ThreadPoolExecutor
+
+    images = list(images)
+    results = []
+    workers = max(1, min(detector_pool.size, batch_size or 1))
+    if workers == 1:
+        return [face_locations(img, number_of_times_to_upsample) for img in images]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _, batch in _chunks(images, batch_size):
+            results.extend(executor.map(lambda img: face_locations(img, number_of_times_to_upsample), batch))
+    return results
+
+def batch_face_encodings(images: List[np.ndarray], locations: Optional[List[List[Tuple[int, int, int, int]]]] = None,
+                         batch_size: int = 128, descriptor: Optional[str] = None) -> List[List[np.ndarray]]:
+    """
+    Encode the faces of many images with one vectorized normalization per batch.
+    
+    Args:
+        images: RGB (or grayscale) images
+        locations: Optional face boxes per image; detected with batch_face_locations when omitted
+        batch_size: Maximum number of face ROIs described in one vectorized pass
+        descriptor: face_descriptors backend (defaults to FACE_DESCRIPTOR)
+        
+    Returns:
+        For each image, the list of its face encodings (same order as its locations)
+    """
+    images = list(images)
+    if locations is None:
+        locations = batch_face_locations(images, batch_size=batch_size)
+    if len(locations) != len(images):
+        raise ValueError("locations must have one entry per image")
+
+    # (image index, location) for every face, so batches can span image boundaries
+    faces = [(i, location) for i, boxes in enumerate(locations) for location in boxes]
+    results: List[List[np.ndarray]] = [[] for _ in images]
+    grays = {}
+    for _, batch in _chunks(faces, batch_size):
+        rois = []
+        owners = []
+        for i, location in batch:
+            gray = grays.get(i)
+            if gray is None:
+                img = images[i]
+                gray = grays[i] = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+            roi = _face_roi(gray, location)
+            if roi is not None:
+                rois.append(roi)
+                owners.append(i)
+        # Grayscale copies are only kept while a batch may still need them
+        last = batch[-1][0]
+        for i in [key for key in grays if key < last]:
+            del grays[i]
+        if not rois:
+            continue
+        stack = face_descriptors.get_descriptor(descriptor).compute(np.stack(rois))
+        for owner, row in zip(owners, stack):
+            results[owner].append(row)
+    return results
 
 # Example usage
 if __name__ == "__main__":
@@ -179,6 +576,8 @@ if __name__ == "__main__":
         print("- load_image_file()")
         print("- face_locations()")
         print("- face_encodings()")
+        print("- batch_face_locations()")
+        print("- batch_face_encodings()")
         print("- compare_faces()")
         print("- face_distance()")
     except Exception as e:
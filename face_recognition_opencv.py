@@ -6,14 +6,23 @@ import cv2
 import numpy as np
 from pathlib import Path
 
+from face_recognition import detector_pool
+
 class FaceRecognition:
-    def __init__(self):
-        # Load OpenCV's pre-trained face detection model
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        self.face_recognizer = cv2.face.LBPHFaceRecognizer_create()
+    def __init__(self, pool=None):
+        # Face detectors come from the shared, pre-warmed pool instead of a new cascade per instance
+        self.detector_pool = pool or detector_pool
+        self._face_recognizer = None
         self.known_faces = {}
         self.known_names = []
         
+    @property
+    def face_recognizer(self):
+        """LBPH recognizer, only created when actually used"""
+        if self._face_recognizer is None:
+            self._face_recognizer = cv2.face.LBPHFaceRecognizer_create()
+        return self._face_recognizer
+    
     def load_image_file(self, image_path):
         """Load an image file (.jpg, .png, etc.) into a numpy array"""
         image = cv2.imread(str(image_path))
@@ -24,7 +33,8 @@ class FaceRecognition:
     def face_locations(self, image):
         """Find all face locations in an image"""
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+        with self.detector_pool.acquire() as detector:
+            faces = detector.detectMultiScale(gray, 1.1, 4)
         
         # Convert to face_recognition library format (top, right, bottom, left)
         locations = []
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0003_face_samples'),
+        ('leave_management', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['status', '-created_at'], name='leave_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(condition=models.Q(('status', 'APPROVED')), fields=['employee', 'start_date', 'end_date'], name='leave_approved_emp_dates_idx'),
+        ),
+    ]
@@ -49,3 +49,13 @@ class LeaveRequest(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Leave lists and the approval queue: filtered by status, newest first
+            models.Index(fields=['status', '-created_at'], name='leave_status_created_idx'),
+            # Payroll and conflict checks only ever look for approved leave overlapping a range
+            models.Index(
+                fields=['employee', 'start_date', 'end_date'],
+                condition=models.Q(status='APPROVED'),
+                name='leave_approved_emp_dates_idx',
+            ),
+        ]
@@ -1,9 +1,11 @@
+from django.db import connection
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth.models import User
 from employees.models import Employee
 from .models import LeaveType, LeaveRequest
 from datetime import date, timedelta
+from smart_hr_backend.dates import overlaps_month
 
 
 class TestStaffApproval(TestCase):
@@ -42,3 +44,32 @@ class TestStaffApproval(TestCase):
 		self.assertIsNotNone(self.leave.approval_date)
 		# Redirect to list
 		self.assertEqual(resp.status_code, 200)
+
+
+class LeaveQueryPlanTests(TestCase):
+	def setUp(self):
+		self.emp = Employee.objects.create(user=User.objects.create_user(username='planner', password='pass'), employee_id='EMP470')
+		leave_type = LeaveType.objects.create(name='Annual')
+		for start, status in [(date(2025, 1, 30), 'APPROVED'), (date(2025, 2, 20), 'PENDING'), (date(2025, 3, 1), 'APPROVED')]:
+			LeaveRequest.objects.create(
+				employee=self.emp, leave_type=leave_type, start_date=start, end_date=start + timedelta(days=2),
+				days_requested=3, reason='Plan', status=status,
+			)
+
+	def _plan(self, queryset):
+		if connection.vendor != 'sqlite':
+			self.skipTest('plan assertions are written against SQLite EXPLAIN QUERY PLAN output')
+		return queryset.explain()
+
+	def test_month_overlap_uses_the_approved_leave_index(self):
+		leaves = LeaveRequest.objects.filter(
+			overlaps_month('start_date', 'end_date', 2025, 2), employee=self.emp, status='APPROVED',
+		)
+		# Spills over from January; the pending and March requests are excluded
+		self.assertEqual([leave.start_date for leave in leaves], [date(2025, 1, 30)])
+		self.assertIn('USING INDEX leave_approved_emp_dates_idx (employee_id=? AND start_date<?)', self._plan(leaves))
+
+	def test_status_list_is_served_in_created_order_by_the_status_index(self):
+		plan = self._plan(LeaveRequest.objects.filter(status='PENDING').order_by('-created_at'))
+		self.assertIn('USING INDEX leave_status_created_idx (status=?)', plan)
+		self.assertNotIn('TEMP B-TREE', plan)
@@ -0,0 +1,29 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from salary.slips import FORMATS, write_slips_zip
+
+
+class Command(BaseCommand):
+    help = 'Write every salary slip of a month into one ZIP file'
+
+    def add_arguments(self, parser):
+        today = timezone.localdate()
+        parser.add_argument('--month', type=int, default=today.month)
+        parser.add_argument('--year', type=int, default=today.year)
+        parser.add_argument('--format', choices=sorted(FORMATS), default='pdf')
+        parser.add_argument('--output', help='ZIP path (default: salary_slips_YYYY_MM_FORMAT.zip)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Rendering processes')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Records read per query')
+
+    def handle(self, *args, **options):
+        year, month, fmt = options['year'], options['month'], options['format']
+        if not 1 <= month <= 12:
+            raise CommandError('Invalid month')
+        path = options['output'] or f'salary_slips_{year}_{month:02d}_{fmt}.zip'
+        count = write_slips_zip(
+            path, year, month, fmt, workers=max(1, options['workers']), chunk_size=max(1, options['chunk_size']),
+        )
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} salary slips to {path}'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from salary.payroll import generate_payroll
+
+
+class Command(BaseCommand):
+    help = 'Create or update SalaryRecords for every active employee for one month'
+
+    def add_arguments(self, parser):
+        today = timezone.localdate()
+        parser.add_argument('--month', type=int, default=today.month)
+        parser.add_argument('--year', type=int, default=today.year)
+        parser.add_argument('--batch-size', type=int, default=1000, help='Employees computed and upserted per batch')
+
+    def handle(self, *args, **options):
+        def report(done, total):
+            self.stdout.write(f'{done}/{total} employees')
+
+        try:
+            count = generate_payroll(
+                options['year'], options['month'], batch_size=max(1, options['batch_size']), on_progress=report,
+            )
+        except ValueError as exc:
+            raise CommandError(exc)
+        self.stdout.write(self.style.SUCCESS(f"Generated salary for {count} employees for {options['month']}/{options['year']}"))
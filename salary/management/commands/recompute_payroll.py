@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from salary.payroll import recompute_payroll
+
+
+class Command(BaseCommand):
+    help = 'Regenerate SalaryRecords for employee-months changed since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', type=int, help='Only this month (with --year); --full defaults to the current month')
+        parser.add_argument('--year', type=int)
+        parser.add_argument('--full', action='store_true', help='Regenerate every active employee for the month')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Employees computed and upserted per batch')
+
+    def handle(self, *args, **options):
+        if bool(options['month']) != bool(options['year']):
+            raise CommandError('--month and --year go together')
+        try:
+            written = recompute_payroll(
+                full=options['full'], year=options['year'], month=options['month'],
+                batch_size=max(1, options['batch_size']),
+            )
+        except ValueError as exc:
+            raise CommandError(exc)
+        if not written:
+            self.stdout.write('No payroll changes to recompute')
+        for (year, month), count in sorted(written.items()):
+            self.stdout.write(self.style.SUCCESS(f'Recomputed {count} salary records for {month}/{year}'))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0003_face_samples'),
+        ('salary', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollDirtyMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('marked_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dirty_payroll_months', to='employees.employee')),
+            ],
+            options={
+                'ordering': ['year', 'month', 'employee'],
+                'unique_together': {('employee', 'year', 'month')},
+            },
+        ),
+    ]
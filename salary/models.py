@@ -35,3 +35,18 @@ class SalaryRecord(models.Model):
         ordering = ['-year', '-month']
         unique_together = ['employee', 'month', 'year']
 
+
+
+class PayrollDirtyMonth(models.Model):
+    """An (employee, month) whose SalaryRecord is stale; cleared by `manage.py recompute_payroll`"""
+    employee = models.ForeignKey('employees.Employee', on_delete=models.CASCADE, related_name='dirty_payroll_months')
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    marked_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.month}/{self.year}"
+
+    class Meta:
+        ordering = ['year', 'month', 'employee']
+        unique_together = ['employee', 'year', 'month']
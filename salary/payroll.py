@@ -0,0 +1,200 @@
+# salary/payroll.py
+# Bulk monthly payroll.
+#
+# Employees are processed in pk-ordered batches. Each batch costs five
+# queries whatever its size: the employees, their monthly attendance rollups,
+# their approved leaves overlapping the month, the bonuses already on their
+# records, and one upsert of the SalaryRecords. Each batch's salaries come from one calculator.calculate_batch
+# call over its columns.
+#
+# Writes that change an employee-month's pay (attendance, leave decisions,
+# salary_base edits; see salary/signals.py) mark it in PayrollDirtyMonth, and
+# recompute_payroll() regenerates only those records.
+
+import calendar
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from attendance.models import MonthlyAttendanceRollup
+from attendance.rollups import monthly_counts
+from employees.models import Employee
+from leave_management.models import LeaveRequest
+from smart_hr_backend.dates import month_bounds, overlaps_month
+from .calculator import calculate_batch, from_cents, to_cents
+from .models import PayrollDirtyMonth, SalaryRecord
+
+logger = logging.getLogger(__name__)
+
+RESULT_FIELDS = ['base_salary', 'deductions', 'days_worked', 'days_absent', 'days_leave', 'total_salary', 'updated_at']
+
+
+def leave_days(employee_ids, year, month):
+    """{employee_pk: approved leave days falling inside the month}, from one query"""
+    first, following = month_bounds(year, month)
+    days = {}
+    leaves = LeaveRequest.objects.filter(
+        overlaps_month('start_date', 'end_date', year, month), employee_id__in=employee_ids, status='APPROVED',
+    ).order_by().values_list('employee_id', 'start_date', 'end_date')
+    for employee_id, start, end in leaves:
+        # end_date is inclusive, the month bound is not
+        overlap = min(end + timedelta(days=1), following) - max(start, first)
+        days[employee_id] = days.get(employee_id, 0) + overlap.days
+    return days
+
+
+def build_records(employees, year, month):
+    """
+    Unsaved SalaryRecords for (pk, salary_base) pairs, from three queries.
+    Bonuses entered on existing records are kept and counted in the total.
+    """
+    employee_ids = [pk for pk, _ in employees]
+    days_in_month = calendar.monthrange(year, month)[1]
+    rollups = monthly_counts(employee_ids, year, month)
+    leaves = leave_days(employee_ids, year, month)
+    bonuses = dict(SalaryRecord.objects.filter(
+        employee_id__in=employee_ids, year=year, month=month,
+    ).order_by().values_list('employee_id', 'bonuses'))
+
+    counts = [rollups.get(pk) or MonthlyAttendanceRollup() for pk in employee_ids]
+    salaries = calculate_batch(
+        [to_cents(salary_base) for _, salary_base in employees],
+        days_in_month,
+        [rollup.absent for rollup in counts],
+        [rollup.half_day for rollup in counts],
+        [to_cents(bonuses.get(pk, 0)) for pk in employee_ids],
+    )
+    return [
+        SalaryRecord(
+            employee_id=pk,
+            month=month,
+            year=year,
+            base_salary=from_cents(salaries.base[i]),
+            bonuses=from_cents(salaries.bonuses[i]),
+            deductions=from_cents(salaries.deductions[i]),
+            days_worked=rollup.days_worked,
+            days_absent=rollup.absent,
+            days_leave=leaves.get(pk, 0),
+            total_salary=from_cents(salaries.total[i]),
+        )
+        for i, (pk, rollup) in enumerate(zip(employee_ids, counts))
+    ]
+
+
+def generate_payroll(year, month, batch_size=1000, employee_ids=None, on_progress=None):
+    """
+    Create or update the month's SalaryRecord for every active employee (or
+    only employee_ids). Payment status and notes on existing records are kept.
+    on_progress(done, total) is called after each batch. Returns the number of
+    records written.
+    """
+    year, month = int(year), int(month)
+    if not 1 <= month <= 12:
+        raise ValueError('Invalid month')
+    employees = Employee.objects.filter(is_active=True)
+    if employee_ids is not None:
+        employees = employees.filter(pk__in=employee_ids)
+    total = employees.count()
+
+    done = last_pk = 0
+    while True:
+        batch = list(employees.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'salary_base')[:batch_size])
+        if not batch:
+            break
+        with transaction.atomic():
+            SalaryRecord.objects.bulk_create(
+                build_records(batch, year, month),
+                update_conflicts=True,
+                unique_fields=['employee', 'month', 'year'],
+                update_fields=RESULT_FIELDS,
+            )
+        done += len(batch)
+        last_pk = batch[-1][0]
+        if on_progress:
+            on_progress(done, total)
+    return done
+
+
+def mark_payroll_dirty(employee_months):
+    """Record (employee_pk, year, month) triples whose SalaryRecord needs regenerating; one query"""
+    employee_months = set(employee_months)
+    if not employee_months:
+        return
+    PayrollDirtyMonth.objects.bulk_create(
+        [PayrollDirtyMonth(employee_id=pk, year=year, month=month) for pk, year, month in employee_months],
+        update_conflicts=True,
+        unique_fields=['employee', 'year', 'month'],
+        update_fields=['marked_at'],
+    )
+
+
+def _paid_marks():
+    """Dirty marks whose SalaryRecord is already paid"""
+    return PayrollDirtyMonth.objects.filter(Exists(SalaryRecord.objects.filter(
+        employee_id=OuterRef('employee_id'), year=OuterRef('year'), month=OuterRef('month'), is_paid=True,
+    )))
+
+
+def _claim_dirty(year=None, month=None):
+    """
+    Delete and return the dirty marks as {(year, month): {employee_pk, ...}}.
+    Marks of paid records are left in place.
+    """
+    marks = PayrollDirtyMonth.objects.exclude(pk__in=_paid_marks().values('pk'))
+    if year and month:
+        marks = marks.filter(year=year, month=month)
+    claimed = {}
+    with transaction.atomic():
+        rows = list(marks.select_for_update().values_list('pk', 'employee_id', 'year', 'month'))
+        PayrollDirtyMonth.objects.filter(pk__in=[pk for pk, _, _, _ in rows]).delete()
+    for _, employee_id, mark_year, mark_month in rows:
+        claimed.setdefault((mark_year, mark_month), set()).add(employee_id)
+    return claimed
+
+
+def recompute_payroll(full=False, year=None, month=None, batch_size=1000, on_progress=None):
+    """
+    Regenerate stale SalaryRecords. By default only dirty employee-months
+    (optionally just one month) that already have an unpaid record are
+    recomputed; marks of paid records are kept and logged, and marks of months
+    never generated are dropped. full=True regenerates the whole month
+    (default: the current one) like generate_payroll. Marks made while this
+    runs are kept for the next run. Returns {(year, month): records written}.
+    """
+    if full:
+        today = timezone.localdate()
+        year, month = int(year or today.year), int(month or today.month)
+        PayrollDirtyMonth.objects.filter(year=year, month=month).delete()
+        return {(year, month): generate_payroll(year, month, batch_size=batch_size, on_progress=on_progress)}
+
+    written = {}
+    claimed = _claim_dirty(year, month)
+    try:
+        for (mark_year, mark_month), employee_ids in sorted(claimed.items()):
+            unpaid = set(SalaryRecord.objects.filter(
+                year=mark_year, month=mark_month, employee_id__in=employee_ids, is_paid=False,
+            ).values_list('employee_id', flat=True))
+            if not unpaid:
+                continue
+            written[(mark_year, mark_month)] = generate_payroll(
+                mark_year, mark_month, batch_size=batch_size, employee_ids=unpaid, on_progress=on_progress,
+            )
+    except Exception:
+        # Put the claimed marks back so the next run retries them
+        mark_payroll_dirty(
+            (pk, mark_year, mark_month)
+            for (mark_year, mark_month), employee_ids in claimed.items() if (mark_year, mark_month) not in written
+            for pk in employee_ids
+        )
+        raise
+
+    paid = _paid_marks()
+    if year and month:
+        paid = paid.filter(year=year, month=month)
+    stale = paid.count()
+    if stale:
+        logger.warning('%d paid salary records have changed since payment and were left as they are', stale)
+    return written
@@ -0,0 +1,58 @@
+# salary/signals.py
+# Mark employee-months dirty when something their pay depends on changes, so
+# recompute_payroll only regenerates those SalaryRecords
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from attendance.rollups import monthly_rollups_refreshed
+from employees.models import Employee
+from leave_management.models import LeaveRequest
+from smart_hr_backend.dates import months_between
+from .payroll import mark_payroll_dirty
+
+
+@receiver(monthly_rollups_refreshed)
+def attendance_changed(sender, employee_months, **kwargs):
+    # Every attendance write path (signals, bulk ingest, projection, status
+    # recompute) refreshes the monthly rollup, so this sees them all
+    mark_payroll_dirty(employee_months)
+
+
+@receiver(post_save, sender=LeaveRequest)
+@receiver(post_delete, sender=LeaveRequest)
+def leave_changed(sender, instance, **kwargs):
+    # Only approved leave is paid, but approving, rejecting or cancelling can all
+    # add or remove approved days; new pending requests change nothing
+    if instance.status == 'PENDING':
+        return
+    employee_months = [
+        (instance.employee_id, year, month) for year, month in months_between(instance.start_date, instance.end_date)
+    ]
+
+    def mark():
+        # Deleting an employee cascades to their leave requests; do not mark them again
+        if Employee.objects.filter(pk=instance.employee_id).exists():
+            mark_payroll_dirty(employee_months)
+
+    transaction.on_commit(mark)
+
+
+@receiver(post_init, sender=Employee)
+def remember_salary_base(sender, instance, **kwargs):
+    # Read __dict__ so deferred loads (.only()/.defer()) are not triggered
+    instance._loaded_salary_base = instance.__dict__.get('salary_base')
+
+
+@receiver(post_save, sender=Employee)
+def salary_base_changed(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and 'salary_base' not in update_fields):
+        return
+    salary_base = instance.__dict__.get('salary_base')
+    if salary_base == instance._loaded_salary_base:
+        return
+    instance._loaded_salary_base = salary_base
+    today = timezone.localdate()
+    mark_payroll_dirty([(instance.pk, today.year, today.month)])
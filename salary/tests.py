@@ -1,3 +1,240 @@
+from datetime import date, time
+from decimal import Decimal
+import os
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from attendance.models import Attendance
+from attendance.shifts import get_shift_table
+from employees.models import Department, Employee
+from leave_management.models import LeaveRequest, LeaveType
+from .calculator import calculate, calculate_batch, from_cents, to_cents
+from .models import PayrollDirtyMonth, SalaryRecord
+from .payroll import generate_payroll, recompute_payroll
+from .slips import iter_slips
+from .utils import calculate_monthly_salary, generate_salary_slip_text
+
+
+class SalaryCalculatorTests(TestCase):
+    def test_amounts_round_trip_through_cents(self):
+        self.assertEqual(to_cents(Decimal('1234.565')), 123457)
+        self.assertEqual(to_cents('10'), 1000)
+        self.assertEqual(from_cents(123457), Decimal('1234.57'))
+
+    def test_deductions_round_once_and_split_into_absent_and_half_days(self):
+        # 1000.00 over 30 days: 33.333.. per day, 3 absences and 1 half day = 116.67
+        salary = calculate(100000, 30, days_absent=3, days_half=1, bonuses_cents=500)
+        self.assertEqual((salary.per_day, salary.deductions), (3333, 11667))
+        self.assertEqual(salary.absent_deduction + salary.half_day_deduction, salary.deductions)
+        self.assertEqual(salary.total, 100000 - 11667 + 500)
+
+    def test_batch_matches_scalar_row_by_row(self):
+        rows = [(3100000, 31, 1, 1), (100000, 30, 3, 1), (99999, 28, 0, 5), (0, 31, 2, 0), (5000050, 30, 30, 0)]
+        batch = calculate_batch(*zip(*rows))
+        for i, row in enumerate(rows):
+            self.assertEqual(tuple(int(column[i]) for column in batch), tuple(calculate(*row)))
+
+
+class PayrollEngineTests(TestCase):
+    def setUp(self):
+        self.employees = [
+            Employee.objects.create(
+                user=User.objects.create_user(username=f'pay{i}', password='pass'),
+                employee_id=f'EMP48{i}', salary_base=Decimal('31000.00'),
+            )
+            for i in range(3)
+        ]
+        get_shift_table()
+        first = self.employees[0]
+        # March 2025 has 31 days: one absence and one half day
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(employee=first, date=date(2025, 3, 3))
+            Attendance.objects.create(employee=first, date=date(2025, 3, 4), check_in=time(9, 0), check_out=time(11, 0))
+            Attendance.objects.create(employee=first, date=date(2025, 3, 5), check_in=time(9, 0), check_out=time(17, 0))
+        LeaveRequest.objects.create(
+            employee=first, leave_type=LeaveType.objects.create(name='Annual'), start_date=date(2025, 2, 27),
+            end_date=date(2025, 3, 2), days_requested=4, reason='Trip', status='APPROVED',
+        )
+
+    def test_month_is_generated_in_constant_queries(self):
+        # Headcount, then per batch the employees, a savepoint pair around rollups,
+        # leaves, existing bonuses and the upsert, and the final empty batch
+        with self.assertNumQueries(9):
+            self.assertEqual(generate_payroll(2025, 3), 3)
+
+        record = SalaryRecord.objects.get(employee=self.employees[0], year=2025, month=3)
+        self.assertEqual(record.deductions, Decimal('1500.00'))
+        self.assertEqual(record.total_salary, Decimal('29500.00'))
+        self.assertEqual((record.days_worked, record.days_absent, record.days_leave), (1, 1, 2))
+        self.assertEqual(SalaryRecord.objects.get(employee=self.employees[2], year=2025, month=3).total_salary, Decimal('31000.00'))
+
+        single = calculate_monthly_salary(self.employees[0], 3, 2025)
+        self.assertEqual((single['total_deductions'], single['total_salary']), (record.deductions, record.total_salary))
+        self.assertEqual(single['days_leave'], record.days_leave)
+
+    def test_rerun_updates_amounts_and_keeps_payment_status(self):
+        generate_payroll(2025, 3)
+        SalaryRecord.objects.filter(employee=self.employees[0]).update(is_paid=True, notes='Paid by transfer', bonuses=Decimal('750.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.filter(employee=self.employees[0], date=date(2025, 3, 3)).delete()
+
+        out = StringIO()
+        call_command('generate_payroll', month=3, year=2025, batch_size=2, stdout=out)
+
+        self.assertIn('2/3 employees', out.getvalue())
+        record = SalaryRecord.objects.get(employee=self.employees[0], year=2025, month=3)
+        self.assertEqual((record.bonuses, record.total_salary), (Decimal('750.00'), Decimal('31250.00')))
+        self.assertTrue(record.is_paid)
+        self.assertEqual(record.notes, 'Paid by transfer')
+        self.assertEqual(SalaryRecord.objects.count(), 3)
+
+    def test_my_salary_api_previews_an_ungenerated_month(self):
+        client = APIClient()
+        client.force_authenticate(self.employees[0].user)
+
+        self.assertEqual(client.get('/api/salary/my/', {'month': 3, 'year': 2025}).status_code, 404)
+        resp = client.get('/api/salary/my/', {'month': 3, 'year': 2025, 'preview': 1})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.data['preview'])
+        self.assertEqual(resp.data['salary']['total_salary'], '29500.00')
+        for params in ({'month': 13, 'year': 2025}, {'month': 3, 'year': 'next'}):
+            resp = client.get('/api/salary/my/', {**params, 'preview': 1})
+            self.assertEqual((resp.status_code, resp.data['message']), (400, 'Invalid month or year'))
+
+
+class PayrollDirtyTrackingTests(TestCase):
+    def setUp(self):
+        self.employees = [
+            Employee.objects.create(
+                user=User.objects.create_user(username=f'dirty{i}', password='pass'),
+                employee_id=f'EMP49{i}', salary_base=Decimal('30000.00'),
+            )
+            for i in range(3)
+        ]
+        get_shift_table()
+        generate_payroll(2025, 4)
+        PayrollDirtyMonth.objects.all().delete()
+
+    def _dirty(self):
+        return sorted(PayrollDirtyMonth.objects.values_list('employee__employee_id', 'year', 'month'))
+
+    def test_writes_mark_the_affected_employee_months(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(employee=self.employees[0], date=date(2025, 4, 7))
+        leave = LeaveRequest.objects.create(
+            employee=self.employees[1], leave_type=LeaveType.objects.create(name='Annual'),
+            start_date=date(2025, 4, 29), end_date=date(2025, 5, 2), days_requested=4, reason='Trip',
+        )
+        self.assertEqual(self._dirty(), [('EMP490', 2025, 4)])
+
+        leave.status = 'APPROVED'
+        with self.captureOnCommitCallbacks(execute=True):
+            leave.save()
+        employee = Employee.objects.get(pk=self.employees[2].pk)
+        employee.phone_number = '0771234567'
+        employee.save()
+        self.assertEqual(self._dirty(), [('EMP490', 2025, 4), ('EMP491', 2025, 4), ('EMP491', 2025, 5)])
+
+        employee.salary_base = Decimal('36000.00')
+        employee.save(update_fields=['salary_base'])
+        today = timezone.localdate()
+        self.assertIn(('EMP492', today.year, today.month), self._dirty())
+
+    def test_recompute_regenerates_only_dirty_unpaid_records(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(employee=self.employees[0], date=date(2025, 4, 7))
+            Attendance.objects.create(employee=self.employees[1], date=date(2025, 4, 7))
+            # May was never generated, so there is nothing to recompute
+            Attendance.objects.create(employee=self.employees[2], date=date(2025, 5, 7))
+        SalaryRecord.objects.filter(employee=self.employees[1]).update(is_paid=True)
+        SalaryRecord.objects.filter(employee=self.employees[2]).update(total_salary=0)
+
+        with self.assertLogs('salary.payroll', 'WARNING') as logs:
+            self.assertEqual(recompute_payroll(), {(2025, 4): 1})
+
+        totals = dict(SalaryRecord.objects.values_list('employee__employee_id', 'total_salary'))
+        self.assertEqual(totals, {'EMP490': Decimal('29000.00'), 'EMP491': Decimal('30000.00'), 'EMP492': Decimal('0.00')})
+        self.assertEqual(SalaryRecord.objects.filter(month=5).count(), 0)
+        self.assertIn('1 paid salary records have changed', logs.output[0])
+        # The paid record's mark stays so the change is not forgotten
+        self.assertEqual(self._dirty(), [('EMP491', 2025, 4)])
+        with self.assertLogs('salary.payroll', 'WARNING'):
+            self.assertEqual(recompute_payroll(), {})
+
+        out = StringIO()
+        call_command('recompute_payroll', full=True, month=4, year=2025, stdout=out)
+        self.assertIn('Recomputed 3 salary records for 4/2025', out.getvalue())
+        self.assertEqual(SalaryRecord.objects.get(employee=self.employees[2]).total_salary, Decimal('30000.00'))
+
+    def test_deleting_an_employee_with_leave_and_attendance_marks_nothing(self):
+        employee = self.employees[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            Attendance.objects.create(employee=employee, date=date(2025, 4, 7))
+            LeaveRequest.objects.create(
+                employee=employee, leave_type=LeaveType.objects.create(name='Sick'), start_date=date(2025, 4, 8),
+                end_date=date(2025, 4, 9), days_requested=2, reason='Flu', status='APPROVED',
+            )
+        PayrollDirtyMonth.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            employee.user.delete()
+        connection.check_constraints()
+
+        self.assertEqual(self._dirty(), [])
+
+
+class SalarySlipTests(TestCase):
+    def setUp(self):
+        department = Department.objects.create(name='Finance')
+        for i in range(5):
+            user = User.objects.create_user(username=f'slip{i}', password='pass', first_name=f'Name{i}', last_name='Payee')
+            employee = Employee.objects.create(
+                user=user, employee_id=f'EMP50{i}', department=department if i % 2 else None,
+                salary_base=Decimal('25000.00'),
+            )
+            SalaryRecord.objects.create(
+                employee=employee, month=6, year=2025, base_salary=Decimal('25000.00'),
+                deductions=Decimal('1250.50'), total_salary=Decimal('23749.50'), days_worked=20,
+            )
+        self.client.force_login(User.objects.create_user(username='payroll', password='pass', is_staff=True))
+
+    def test_zip_streams_every_slip_in_one_query_per_chunk(self):
+        resp = self.client.get('/salary/slips/', {'month': 6, 'year': 2025})
+
+        self.assertTrue(resp.streaming)
+        # Only the record chunk and the empty tail query, whatever the headcount
+        with self.assertNumQueries(2):
+            body = b''.join(resp.streaming_content)
+        archive = zipfile.ZipFile(BytesIO(body))
+        self.assertEqual(len(archive.namelist()), 5)
+        record = SalaryRecord.objects.select_related('employee__user', 'employee__department').get(employee__employee_id='EMP501')
+        self.assertEqual(archive.read('EMP501_2025_06.txt').decode(), generate_salary_slip_text(record))
+
+    def test_pdf_slips_render_in_worker_processes(self):
+        slips = list(iter_slips(2025, 6, 'pdf', workers=2, chunk_size=2))
+
+        self.assertEqual([name for name, _ in slips], [f'EMP50{i}_2025_06.pdf' for i in range(5)])
+        content = slips[1][1]
+        self.assertTrue(content.startswith(b'%PDF-1.4'))
+        self.assertTrue(content.endswith(b'%%EOF\n'))
+        self.assertIn(b'(Department: Finance) Tj', content)
+        self.assertIn(b'(Total Salary:      Rs. 23,749.50) Tj', content)
+
+    def test_command_writes_the_archive_to_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'slips.zip')
+            out = StringIO()
+            call_command('export_salary_slips', month=6, year=2025, format='txt', workers=1, output=path, stdout=out)
 
-# Create your tests here.
+            self.assertIn('Wrote 5 salary slips', out.getvalue())
+            with zipfile.ZipFile(path) as archive:
+                self.assertIsNone(archive.testzip())
+                self.assertEqual(len(archive.namelist()), 5)
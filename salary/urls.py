@@ -7,4 +7,5 @@ urlpatterns = [
     path('generate/', views.salary_generate, name='salary_generate'),
     path('report/<str:employee_id>/', views.salary_report, name='salary_report'),
     path('mark-paid/<int:salary_id>/', views.salary_mark_paid, name='salary_mark_paid'),
+    path('slips/', views.salary_slips_download, name='salary_slips_download'),
 ]
@@ -0,0 +1,52 @@
+# smart_hr_backend/dates.py
+# Index-friendly date filters.
+#
+# `date__month=m, date__year=y` compiles to strftime()/EXTRACT() on the
+# column, which no index can serve. These helpers turn months and days into
+# half-open ranges on the raw column so lookups can use the (…, date) indexes.
+
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+
+def month_bounds(year, month):
+    """(first day of the month, first day of the next month)"""
+    year, month = int(year), int(month)
+    first = date(year, month, 1)
+    following = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return first, following
+
+
+def month_range(field, year, month):
+    """Filter kwargs selecting `field` within the month: {field__gte: first, field__lt: next first}"""
+    first, following = month_bounds(year, month)
+    return {f'{field}__gte': first, f'{field}__lt': following}
+
+
+def overlaps_month(start_field, end_field, year, month):
+    """Q for [start_field, end_field] date ranges sharing at least one day with the month"""
+    first, following = month_bounds(year, month)
+    return Q(**{f'{start_field}__lt': following, f'{end_field}__gte': first})
+
+
+def months_between(first_day, last_day):
+    """(year, month) pairs of every month touched by first_day..last_day, in order"""
+    year, month = first_day.year, first_day.month
+    while (year, month) <= (last_day.year, last_day.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def day_start(day):
+    """Aware datetime for local midnight at the start of `day`, for comparing DateTimeFields to dates"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def overlaps_days(start_field, end_field, first_day, last_day):
+    """Q for DateTimeField ranges touching any local day in first_day..last_day (like __date lookups)"""
+    return Q(**{
+        f'{start_field}__lt': day_start(last_day + timedelta(days=1)),
+        f'{end_field}__gte': day_start(first_day),
+    })
@@ -139,6 +139,10 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'  # ADD THIS
 MEDIA_URL = 'media/'  # ADD THIS
 MEDIA_ROOT = BASE_DIR / 'media'  # ADD THIS
 
+# Keep phone-camera uploads (face check-ins are a few MB) in memory so they can be
+# decoded from the buffer instead of being spooled to a temporary file first
+FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -204,6 +208,78 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='').strip()
 # Default the FROM address to the authenticated SMTP user when not explicitly set
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default=EMAIL_HOST_USER or 'noreply@smarthr.com')
 
+# Face Recognition Settings
+# Face engine from employees/face_backends.py: 'opencv' (face_recognition.py) or 'opencv_template'
+FACE_BACKEND = config('FACE_BACKEND', default='opencv')
+FACE_RECOGNITION_TOLERANCE = config('FACE_RECOGNITION_TOLERANCE', cast=float, default=0.6)
+# Descriptor new encodings are computed with: 'raw', 'lbp' or 'pca' (see face_descriptors.py)
+FACE_DESCRIPTOR = config('FACE_DESCRIPTOR', default='raw')
+# Similarity a probe must exceed, per descriptor; compact descriptors score every face close to 1,
+# so they cannot share FACE_RECOGNITION_TOLERANCE (lbp: the equal error rate point from
+# benchmarks/face_benchmark.py). Descriptors not listed use FACE_RECOGNITION_TOLERANCE.
+FACE_DESCRIPTOR_TOLERANCES = {
+    'lbp': config('FACE_LBP_TOLERANCE', cast=float, default=0.965),
+}
+# Backends with their own similarity scale override the tolerances above (opencv_template scores
+# normalized template correlation; 0.68 is its equal error rate point in the same benchmark)
+FACE_BACKEND_TOLERANCES = {
+    'opencv_template': config('FACE_TEMPLATE_TOLERANCE', cast=float, default=0.68),
+}
+# Storage precision for Employee.face_encoding_data ('float16' or 'float32')
+FACE_ENCODING_DTYPE = config('FACE_ENCODING_DTYPE', default='float16')
+# Seconds before a worker rebuilds its kiosk identification index in the background (picks up other
+# workers' enrolments); identification needs a compact FACE_DESCRIPTOR ('lbp' or 'pca')
+FACE_INDEX_MAX_AGE = config('FACE_INDEX_MAX_AGE', cast=int, default=300)
+# Multi-photo enrolment: per-sample quality limits, photos per request, samples needed,
+# and how samples are combined into the stored template ('mean' or 'medoid')
+FACE_ENROLL_MIN_SHARPNESS = config('FACE_ENROLL_MIN_SHARPNESS', cast=float, default=30.0)
+FACE_ENROLL_MIN_BRIGHTNESS = config('FACE_ENROLL_MIN_BRIGHTNESS', cast=float, default=40.0)
+FACE_ENROLL_MAX_BRIGHTNESS = config('FACE_ENROLL_MAX_BRIGHTNESS', cast=float, default=220.0)
+FACE_ENROLL_MIN_FACE_SIZE = config('FACE_ENROLL_MIN_FACE_SIZE', cast=int, default=80)
+FACE_ENROLL_MAX_SAMPLES = config('FACE_ENROLL_MAX_SAMPLES', cast=int, default=10)
+FACE_ENROLL_MIN_SAMPLES = config('FACE_ENROLL_MIN_SAMPLES', cast=int, default=1)
+FACE_ENROLL_TEMPLATE = config('FACE_ENROLL_TEMPLATE', default='mean')
+# Check-in photos byte-identical to, or within this many bits (dHash Hamming distance, at most 3)
+# of, one of the same employee's stored check-in or registration photos are rejected as replays.
+# Genuine captures seconds apart were 3 bits apart in media/attendance_images; check your own
+# with `manage.py hash_media_images --calibrate` before raising it
+IMAGE_REPLAY_MAX_DISTANCE = config('IMAGE_REPLAY_MAX_DISTANCE', cast=int, default=1)
+# Memory cap for each process's cache of decoded reference embeddings
+FACE_EMBEDDING_CACHE_BYTES = config('FACE_EMBEDDING_CACHE_BYTES', cast=int, default=64 * 1024 * 1024)
+# Check-in verification pool: worker processes (0 = verify inline in the request),
+# extra jobs allowed to wait before clients get 429, and the per-job deadline in seconds
+FACE_VERIFY_WORKERS = config('FACE_VERIFY_WORKERS', cast=int, default=os.cpu_count() or 1)
+FACE_VERIFY_QUEUE_SIZE = config('FACE_VERIFY_QUEUE_SIZE', cast=int, default=FACE_VERIFY_WORKERS * 4)
+FACE_VERIFY_TIMEOUT = config('FACE_VERIFY_TIMEOUT', cast=float, default=10)
+FACE_VERIFY_RETRY_AFTER = config('FACE_VERIFY_RETRY_AFTER', cast=int, default=2)
+# Longest side check-in photos are downscaled to before face detection (0 = full resolution)
+FACE_DETECTION_MAX_DIMENSION = config('FACE_DETECTION_MAX_DIMENSION', cast=int, default=640)
+# Haar cascade detectors each process keeps for concurrent requests (0 = one per CPU)
+FACE_DETECTOR_POOL_SIZE = config('FACE_DETECTOR_POOL_SIZE', cast=int, default=0)
+
+# Attendance Settings
+# Largest batch of buffered taps a gate terminal may post to api/attendance/bulk-mark/
+ATTENDANCE_BULK_MAX_EVENTS = config('ATTENDANCE_BULK_MAX_EVENTS', cast=int, default=1000)
+# Fold each mobile tap into its Attendance row in the request; when off, taps are only appended
+# to the event log and `manage.py project_attendance_events` (cron) updates the rows
+ATTENDANCE_PROJECT_ON_INGEST = config('ATTENDANCE_PROJECT_ON_INGEST', cast=bool, default=True)
+# Seconds the projector leaves new events alone so ids committed out of order are not skipped
+ATTENDANCE_PROJECTION_LAG = config('ATTENDANCE_PROJECTION_LAG', cast=int, default=5)
+# Shift used for employees without a ShiftAssignment (HH:MM local time); LATE after start + grace,
+# HALF_DAY below the half-day hours
+ATTENDANCE_DEFAULT_SHIFT_START = config('ATTENDANCE_DEFAULT_SHIFT_START', default='09:00')
+ATTENDANCE_DEFAULT_SHIFT_END = config('ATTENDANCE_DEFAULT_SHIFT_END', default='17:00')
+ATTENDANCE_DEFAULT_GRACE_MINUTES = config('ATTENDANCE_DEFAULT_GRACE_MINUTES', cast=int, default=30)
+ATTENDANCE_DEFAULT_HALF_DAY_HOURS = config('ATTENDANCE_DEFAULT_HALF_DAY_HOURS', cast=float, default=4.0)
+ATTENDANCE_DEFAULT_FULL_DAY_HOURS = config('ATTENDANCE_DEFAULT_FULL_DAY_HOURS', cast=float, default=8.0)
+# Seconds before a worker recompiles its shift table (picks up other workers' policy edits)
+ATTENDANCE_SHIFT_TABLE_MAX_AGE = config('ATTENDANCE_SHIFT_TABLE_MAX_AGE', cast=int, default=300)
+# Seconds the attendance dashboard payload is cached; writes in this process drop it sooner
+ATTENDANCE_DASHBOARD_CACHE_TTL = config('ATTENDANCE_DASHBOARD_CACHE_TTL', cast=int, default=60)
+
+# Test runner that resets process-wide caches when tests override the settings above
+TEST_RUNNER = 'smart_hr_backend.test_runner.TestRunner'
+
 # Authentication Settings
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
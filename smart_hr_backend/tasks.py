@@ -16,38 +16,29 @@ def send_birthday_emails_task():
     return f"Sent birthday wishes to {count} employees"
 
 
-@shared_task
-def generate_monthly_salaries_task(month, year):
-    """Celery task to generate monthly salaries"""
-    from employees.models import Employee
-    from salary.utils import calculate_monthly_salary
-    from salary.models import SalaryRecord
+@shared_task(bind=True)
+def generate_monthly_salaries_task(self, month, year):
+    """Celery task to generate monthly salaries; progress is reported as PROGRESS state meta"""
+    from salary.payroll import generate_payroll
     
-    employees = Employee.objects.filter(is_active=True)
-    count = 0
+    def report(done, total):
+        self.update_state(state='PROGRESS', meta={'done': done, 'total': total})
     
-    for employee in employees:
-        salary_data = calculate_monthly_salary(employee, month, year)
-        
-        SalaryRecord.objects.update_or_create(
-            employee=employee,
-            month=month,
-            year=year,
-            defaults={
-                'base_salary': salary_data['base_salary'],
-                'deductions': salary_data['total_deductions'],
-                'bonuses': salary_data['bonuses'],
-                'days_worked': salary_data['days_worked'],
-                'days_absent': salary_data['days_absent'],
-                'days_leave': salary_data['days_leave'],
-                'total_salary': salary_data['total_salary']
-            }
-        )
-        count += 1
+    count = generate_payroll(year, month, on_progress=report)
     
     return f"Generated salary for {count} employees"
 
 
+@shared_task
+def recompute_payroll_task(full=False):
+    """Celery task (e.g. hourly) regenerating SalaryRecords whose inputs changed"""
+    from salary.payroll import recompute_payroll
+    
+    written = recompute_payroll(full=full)
+    
+    return f"Recomputed {sum(written.values())} salary records"
+
+
 @shared_task
 def send_leave_reminder_task():
     """Celery task to send reminders for pending leave requests"""
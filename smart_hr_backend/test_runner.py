@@ -0,0 +1,39 @@
+# smart_hr_backend/test_runner.py
+# Test runner that keeps process-wide caches in step with override_settings.
+#
+# setting_changed is only sent by django.test, so its receivers are connected
+# here for the test run instead of from the apps' production signal modules.
+
+from django.test.runner import DiscoverRunner
+from django.test.signals import setting_changed
+
+
+def _reset_face_verification(setting, **kwargs):
+    """Rebuild the verification pool when tests override FACE_VERIFY_* settings"""
+    from employees.face_verification_service import reset_verification_service
+    reset_verification_service(setting=setting)
+
+
+def _reset_shift_table(setting, **kwargs):
+    """Recompile the shift table when tests override the ATTENDANCE_DEFAULT_* shift"""
+    if setting.startswith('ATTENDANCE_DEFAULT_'):
+        from attendance.shifts import invalidate_shift_table
+        invalidate_shift_table()
+
+
+RECEIVERS = (
+    _reset_face_verification,
+    _reset_shift_table,
+)
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        for receiver in RECEIVERS:
+            setting_changed.connect(receiver, dispatch_uid=f'{__name__}.{receiver.__name__}')
+
+    def teardown_test_environment(self, **kwargs):
+        for receiver in RECEIVERS:
+            setting_changed.disconnect(dispatch_uid=f'{__name__}.{receiver.__name__}')
+        super().teardown_test_environment(**kwargs)
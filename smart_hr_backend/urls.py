@@ -52,7 +52,11 @@ urlpatterns = [
     path('api/salary/my/', api_views.my_salary_api, name='api_my_salary'),
     path('api/calendar/my/', api_views.my_calendar_api, name='api_my_calendar'),  # ← MAKE SURE THIS IS HERE
     path('api/employee/upload-face/', api_views.upload_face_image, name='upload_face'),
+    path('api/employee/enroll-face/', api_views.enroll_face_api, name='api_enroll_face'),
     path('api/attendance/mark-with-face/', api_views.mark_attendance_with_face, name='mark_attendance_face'),
+    path('api/attendance/identify/', api_views.identify_face_api, name='api_identify_face'),
+    path('api/attendance/bulk-mark/', api_views.bulk_mark_attendance_api, name='api_bulk_mark_attendance'),
+    path('api/face/stats/', api_views.face_stats_api, name='api_face_stats'),
 ]
 
 if settings.DEBUG:
@@ -5,10 +5,9 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
 from employees.models import Employee
-from attendance.models import Attendance
+from attendance.rollups import daily_status_counts, employee_month
 from leave_management.models import LeaveRequest
 from recruitment.models import Recruitment
-from django.db.models import Count, Q
 
 
 def home(request):
@@ -77,12 +76,10 @@ def dashboard(request):
     # Total employees
     context['total_employees'] = Employee.objects.filter(is_active=True).count()
     
-    # Today's attendance
-    today_attendance = Attendance.objects.filter(date=today)
-    context['today_present'] = today_attendance.filter(
-        Q(status='PRESENT') | Q(status='LATE')
-    ).count()
-    context['today_absent'] = today_attendance.filter(status='ABSENT').count()
+    # Today's attendance, from the daily rollup
+    today_counts = daily_status_counts(today, today)
+    context['today_present'] = today_counts.get((today, 'PRESENT'), 0) + today_counts.get((today, 'LATE'), 0)
+    context['today_absent'] = today_counts.get((today, 'ABSENT'), 0)
     
     # Pending leave requests
     context['pending_leaves'] = LeaveRequest.objects.filter(status='PENDING').count()
@@ -102,12 +99,9 @@ def dashboard(request):
     # User role-based data
     if employee:
         # Employee's own data
-        context['my_attendance_this_month'] = Attendance.objects.filter(
-            employee=employee,
-            date__month=current_month,
-            date__year=current_year,
-            status__in=['PRESENT', 'LATE']
-        ).count()
+        context['my_attendance_this_month'] = employee_month(
+            employee.pk, current_year, current_month
+        ).days_worked
         
         context['my_leaves'] = LeaveRequest.objects.filter(
             employee=employee
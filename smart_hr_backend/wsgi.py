@@ -14,3 +14,16 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smart_hr_backend.settings')
 
 application = get_wsgi_application()
+
+# Load the face detector pool and descriptor model once per worker so the first check-ins do not pay for it
+if os.environ.get('FACE_DETECTOR_WARMUP', '1') == '1':
+    import logging
+
+    import face_descriptors
+    import face_recognition
+    face_recognition.warm_detector_pool()
+    try:
+        face_descriptors.load_descriptor()
+    except (RuntimeError, ValueError) as exc:
+        # e.g. FACE_DESCRIPTOR='pca' before `manage.py fit_face_pca` has run; check-ins report it
+        logging.getLogger(__name__).warning('Face descriptor warm-up skipped: %s', exc)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0003_face_samples'),
+        ('workforce_calendar', '0002_alter_workforceevent_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workforceevent',
+            index=models.Index(fields=['start_date', 'end_date'], name='event_start_end_idx'),
+        ),
+    ]
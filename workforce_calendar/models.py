@@ -37,5 +37,6 @@ class WorkforceEvent(models.Model):
 
     class Meta:
         ordering = ['start_date']
+        indexes = [models.Index(fields=['start_date', 'end_date'], name='event_start_end_idx')]
 
     # keep start_date/end_date fields (used throughout app)
\ No newline at end of file
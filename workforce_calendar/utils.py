@@ -36,6 +36,7 @@ def check_leave_conflicts(employee, start_date, end_date):
     """
     from workforce_calendar.models import WorkforceEvent
     from leave_management.models import LeaveRequest
+    from smart_hr_backend.dates import overlaps_days
     
     # Check for approved leaves
     existing_leaves = LeaveRequest.objects.filter(
@@ -48,8 +49,7 @@ def check_leave_conflicts(employee, start_date, end_date):
     # Check for important events
     important_events = WorkforceEvent.objects.filter(
         Q(employees=employee) | Q(employees__department=employee.department),
-        start_date__date__lte=end_date,
-        end_date__date__gte=start_date,
+        overlaps_days('start_date', 'end_date', start_date, end_date),
         event_type__in=['MEETING', 'DEADLINE', 'TRAINING']
     )
     
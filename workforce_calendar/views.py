@@ -8,6 +8,7 @@ from django.db.models import Q
 from datetime import datetime, timedelta
 from .models import WorkforceEvent
 from employees.models import Employee, Department
+from smart_hr_backend.dates import overlaps_days
 import json
 from django.http import JsonResponse
 from django.urls import reverse
@@ -302,8 +303,7 @@ def check_schedule_conflict(request):
             # Check for events during requested period (events where employee is participant or employees in same dept)
             conflicts = WorkforceEvent.objects.filter(
                 Q(employees=employee) | Q(employees__department=employee.department),
-                start_date__date__lte=end_date,
-                end_date__date__gte=start_date
+                overlaps_days('start_date', 'end_date', start_date, end_date)
             ).select_related('created_by__user')
             
             has_conflict = conflicts.exists()